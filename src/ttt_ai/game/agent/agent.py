@@ -1,6 +1,9 @@
 from abc import ABC
 
+import numpy as np
+
 from ttt_ai.game.field import FieldState
+from ttt_ai.game.vec_board import player_code
 
 
 class Agent(ABC):
@@ -48,15 +51,32 @@ class Agent(ABC):
 
     def update_stats(self, board) -> None:
         if board.is_game_over():
-            if not board.is_winner(FieldState.X) and not board.is_winner(FieldState.O):
+            winner = board.get_winner()
+            if winner is None:
                 self.games_draw += 1
-            elif board.is_winner(self.FIELD_STATE_TYPE):
+            elif winner == self.FIELD_STATE_TYPE:
                 self.games_won += 1
-            elif not board.is_winner(self.FIELD_STATE_TYPE):
+            else:
                 self.games_lost += 1
 
             self.total_reward += self._calculate_reward(board)
 
+    def update_stats_batch(self, winners: np.ndarray) -> None:
+        """
+        Update the stats with the results of finished VecBoard games.
+        Args:
+            winners (np.ndarray): The winner codes of the finished games (see VecBoard.get_winners).
+        """
+        own_code = player_code(self.FIELD_STATE_TYPE)
+        won = int((winners == own_code).sum())
+        lost = int((winners == -own_code).sum())
+        draw = int((winners == 0).sum())
+        self.games_won += won
+        self.games_lost += lost
+        self.games_draw += draw
+        # Same rewards as _calculate_reward: win +2, draw +1, loss -1
+        self.total_reward += 2 * won + draw - lost
+
     # Decrease epsilon over time to reduce exploration
     def _get_epsilon_by_game_count(self) -> float:
         value = (min(0.1, self.epsilon) ** 0.01) * (0.99 ** (self.get_game_count() + 1))
@@ -66,11 +86,12 @@ class Agent(ABC):
         """Calculate the reward based on the board."""
         ret = 0
         if board.is_game_over():
-            if not board.is_winner(FieldState.X) and not board.is_winner(FieldState.O):
+            winner = board.get_winner()
+            if winner is None:
                 ret += 1
-            elif board.is_winner(self.FIELD_STATE_TYPE):
+            elif winner == self.FIELD_STATE_TYPE:
                 ret += 2
-            elif not board.is_winner(self.FIELD_STATE_TYPE):
+            else:
                 ret -= 1
         return ret
 
@@ -81,9 +102,9 @@ class Agent(ABC):
         best_move = self.get_best_move(board)
         if best_move is not None:
             field = board.get_field_by_flat_index(best_move)
-            if field is not None:
+            if field is not None and field.state == FieldState.EMPTY:
                 ret = best_move
-                field.state = self.FIELD_STATE_TYPE
+                board.push(best_move, self.FIELD_STATE_TYPE)
             else:
                 print(f"Invalid move by agent {self.FIELD_STATE_TYPE}.")
         else:
@@ -93,3 +114,21 @@ class Agent(ABC):
 
     def get_best_move(self, board) -> int | None:
         pass
+
+    def get_best_moves(self, vec_board, rows: np.ndarray) -> np.ndarray:
+        """
+        Get the next moves for the selected games of a VecBoard in one call.
+        Agents without a batched implementation evaluate the games one by one.
+        Args:
+            vec_board: The batch of boards.
+            rows (np.ndarray): Boolean mask of the games where this agent is to move.
+        Returns:
+            np.ndarray: The chosen flat indices, one per selected game.
+        """
+        return np.array(
+            [
+                self.get_best_move(vec_board.get_board(index))
+                for index in np.flatnonzero(rows)
+            ],
+            dtype=np.intp,
+        )
@@ -0,0 +1,89 @@
+import copy
+from functools import lru_cache
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ttt_ai.game.agent.solved_table import N_FIELDS as TABLE_FIELDS
+from ttt_ai.game.agent.solved_table import N_POSITIONS, get_position_index
+from ttt_ai.game.agent.trainer.QTrainer import mask_illegal_moves
+
+
+@lru_cache(maxsize=None)
+def _get_input_table() -> np.ndarray:
+    """Get the model input of every 3x3 position by its base-3 index (19,683 x 9, 0.7 MB)."""
+    digits = (np.arange(N_POSITIONS)[:, None] // 3 ** np.arange(TABLE_FIELDS)) % 3
+    # Digit 0 empty, 1 X, 2 O becomes -1, 0 and 1 as in Board.flatten()
+    return (digits - 1).astype(np.float32)
+
+
+class FastInferenceModel:
+    """
+    A snapshot of a model prepared for single-board inference with the lowest latency.
+    The model is traced with TorchScript (optionally after CPU dynamic int8 quantization of its
+    linear layers) and always reads its input from the same preallocated buffer.
+    Weights trained later are not seen, prepare a new snapshot after training.
+    """
+
+    def __init__(
+        self, model: nn.Module, n_fields: int, trace: bool = True, quantize: bool = False
+    ):
+        """
+        Args:
+            model (nn.Module): The network, e.g. NNModel_V1 or NNModel_V2.
+            n_fields (int): The fields of a board, size * size.
+            trace (bool): Trace and freeze the model with TorchScript.
+            quantize (bool): Quantize the linear layers to int8 (CPU dynamic quantization).
+        """
+        self.n_fields = n_fields
+        module = copy.deepcopy(model).eval()
+        if quantize:
+            module = torch.ao.quantization.quantize_dynamic(
+                module, {nn.Linear}, dtype=torch.qint8
+            )
+        self.input = torch.full((1, n_fields), -1.0)
+        self._input_array = self.input.numpy()[0]  # shares the memory of the tensor
+        self._input_table = _get_input_table() if n_fields == TABLE_FIELDS else None
+        if trace:
+            with torch.inference_mode():
+                module = torch.jit.freeze(torch.jit.trace(module, self.input))
+        self.module = module
+        self.quantized = quantize
+        self.traced = trace
+
+    def _fill_input(self, x_bits: int, o_bits: int):
+        """Write the board into the input buffer, -1 empty, 0 X and 1 O as in Board.flatten()."""
+        if self._input_table is not None:
+            self._input_array[:] = self._input_table[get_position_index(x_bits, o_bits)]
+            return
+        n_bytes = (self.n_fields + 7) // 8
+        x_fields = np.unpackbits(
+            np.frombuffer(x_bits.to_bytes(n_bytes, "little"), dtype=np.uint8),
+            count=self.n_fields,
+            bitorder="little",
+        )
+        o_fields = np.unpackbits(
+            np.frombuffer(o_bits.to_bytes(n_bytes, "little"), dtype=np.uint8),
+            count=self.n_fields,
+            bitorder="little",
+        )
+        np.subtract(x_fields + 2 * o_fields.astype(np.float32), 1.0, out=self._input_array)
+
+    def scores(self, x_bits: int, o_bits: int) -> torch.Tensor:
+        """
+        Run the model on one board.
+        Args:
+            x_bits (int): The fields occupied by X.
+            o_bits (int): The fields occupied by O.
+        Returns:
+            torch.Tensor: The (1, n_fields) scores of the moves.
+        """
+        self._fill_input(x_bits, o_bits)
+        with torch.inference_mode():
+            return self.module(self.input)
+
+    def best_move(self, x_bits: int, o_bits: int) -> int:
+        """Get the legal move with the highest score."""
+        scores = self.scores(x_bits, o_bits)
+        return int(mask_illegal_moves(scores, self.input).argmax())
@@ -0,0 +1,215 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ttt_ai.game.agent.agent import Agent
+from ttt_ai.game.field import FieldState
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 2.0  # the longest a request waits for others to join its batch
+
+
+class InferenceServer:
+    """
+    A local service that evaluates the boards of many concurrent games with batched forward passes.
+    Requests are queued, a worker thread flushes them as one batch when the batch is full or the
+    oldest request has waited max_wait_ms. Every request gets a future with its scores.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ):
+        """
+        Args:
+            model (nn.Module): The network, e.g. NNModel_V1 or NNModel_V2 in evaluation mode.
+            max_batch_size (int): The most boards per forward pass.
+            max_wait_ms (float): The time a batch waits to be filled after its first request.
+        """
+        if max_batch_size < 1:
+            raise ValueError("The batch size must be at least 1.")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        board_size = getattr(model, "board_size", 3)
+        self.n_fields = board_size * board_size
+        self._requests = queue.Queue()
+        self._input = torch.empty((max_batch_size, self.n_fields))  # reused for every batch
+        self._input_array = self._input.numpy()
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()  # no request is queued behind the stop signal
+        self.n_requests = 0
+        self.n_batches = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Start the worker thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Answer the queued requests and stop the worker thread."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._requests.put(None)  # wakes the worker up
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, flat_board) -> Future:
+        """
+        Queue a board for evaluation.
+        Args:
+            flat_board: The board in the encoding of Board.flatten() (-1 empty, 0 X, 1 O).
+        Returns:
+            Future: Resolves to the (n_fields,) scores of the moves.
+        """
+        future = Future()
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("The inference server is not running.")
+            self._requests.put((flat_board, future))
+        return future
+
+    def get_mean_batch_size(self) -> float:
+        """Calculate the average number of requests per forward pass."""
+        return self.n_requests / self.n_batches if self.n_batches > 0 else float(0)
+
+    def _collect_batch(self, first_request) -> list:
+        """Collect requests until the batch is full or the first request waited max_wait_ms."""
+        batch = [first_request]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = (
+                    self._requests.get(timeout=timeout)
+                    if timeout > 0
+                    else self._requests.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if request is None:
+                self._requests.put(None)  # handled by the loop after this batch
+                break
+            batch.append(request)
+        return batch
+
+    def _serve(self):
+        while True:
+            request = self._requests.get()
+            if request is not None:
+                self._evaluate(self._collect_batch(request))
+            elif not self._running:
+                self._drain()
+                return
+
+    def _drain(self):
+        """Answer the requests still queued when the server stops."""
+        batch = []
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                batch.append(request)
+            if len(batch) == self.max_batch_size:
+                self._evaluate(batch)
+                batch = []
+        if batch:
+            self._evaluate(batch)
+
+    def _evaluate(self, batch: list):
+        """Run one forward pass for the batch and resolve its futures."""
+        n = len(batch)
+        try:
+            for row, (flat_board, _) in enumerate(batch):
+                self._input_array[row] = flat_board
+            with torch.inference_mode():
+                scores = self.model(self._input[:n]).numpy()
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.n_requests += n
+        self.n_batches += 1
+        for row, (_, future) in enumerate(batch):
+            future.set_result(scores[row])
+
+
+class InferenceClientAgent(Agent):
+    """
+    An agent that gets its move scores from a shared InferenceServer instead of its own model.
+    Many clients in different threads share the forward passes of the server.
+    """
+
+    def __init__(
+        self,
+        server: InferenceServer,
+        field_state_type: FieldState = FieldState.X,
+        randomness: float = 0.0,
+    ):
+        super().__init__(field_state_type, randomness)
+        self.server = server
+
+    def get_best_move(self, board) -> int | None:
+        """
+        Get the legal move with the highest score from the server.
+        Args:
+            board: The current state of the Tic Tac Toe board.
+        Returns:
+            int | None: The flat index of the move, None if the game is over.
+        """
+        if board.is_game_over():
+            return None
+
+        if random.uniform(0, 1) < self._get_epsilon_by_game_count():
+            self.n_invalid_move += 1
+            return board.get_flat_index_of_radom_free_field()
+
+        self.n_best_move += 1
+        flat_board = np.array(board.flatten(), dtype=np.float32)
+        scores = self.server.submit(flat_board).result()
+        return int(np.where(flat_board == -1, scores, -np.inf).argmax())
+
+    def get_best_moves(self, vec_board, rows: np.ndarray) -> np.ndarray:
+        """
+        Submit all selected games of a VecBoard at once, the server batches them.
+        Args:
+            vec_board: The batch of boards.
+            rows (np.ndarray): Boolean mask of the games where this agent is to move.
+        Returns:
+            np.ndarray: The chosen flat indices, one per selected game.
+        """
+        flat_boards = vec_board.flatten()[rows]
+        futures = [self.server.submit(flat_board) for flat_board in flat_boards]
+        scores = np.stack([future.result() for future in futures])
+        scores[flat_boards != -1] = -np.inf
+        moves = scores.argmax(axis=1)
+
+        # Randomness condition to explore the boards
+        explore = vec_board.rng.random(len(moves)) < self._get_epsilon_by_game_count()
+        if explore.any():
+            moves[explore] = vec_board.random_legal_moves(np.flatnonzero(rows)[explore])
+        self.n_best_move += int((~explore).sum())
+        return moves
@@ -0,0 +1,243 @@
+import math
+import random
+import time
+
+from ttt_ai.game.agent.agent import Agent
+from ttt_ai.game.bit_board import BitBoard
+from ttt_ai.game.field import FieldState
+
+DEFAULT_PLAYOUTS = 1000
+DEFAULT_EXPLORATION = math.sqrt(2)  # UCT constant c of wins/visits + c * sqrt(ln(N) / n)
+
+
+def _get_opponent(player: FieldState) -> FieldState:
+    return FieldState.O if player == FieldState.X else FieldState.X
+
+
+class Node:
+    """
+    A node of the search tree, the position after move was played by player_just_moved.
+    Wins are counted for player_just_moved (1 for a win, 0.5 for a draw).
+    """
+
+    __slots__ = ("parent", "move", "player_just_moved", "children", "untried_moves", "visits", "wins")
+
+    def __init__(self, parent, move: int | None, player_just_moved: FieldState, untried_moves: list[int]):
+        self.parent = parent
+        self.move = move
+        self.player_just_moved = player_just_moved
+        self.children = {}  # move -> Node
+        self.untried_moves = untried_moves
+        self.visits = 0
+        self.wins = float(0)
+
+    def select_child(self, exploration: float):
+        """Select the child with the highest upper confidence bound (UCT)."""
+        log_visits = math.log(self.visits)
+        best_child = None
+        best_value = float("-inf")
+        for child in self.children.values():
+            value = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best_value = value
+                best_child = child
+        return best_child
+
+    def count_nodes(self) -> int:
+        """Count the nodes of the subtree."""
+        count = 1
+        stack = list(self.children.values())
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children.values())
+        return count
+
+
+class MCTSAgent(Agent):
+    """
+    An agent that uses Monte Carlo Tree Search with UCT selection and random rollouts.
+    The subtree under the chosen move and the opponent's reply is kept for the next move.
+    """
+
+    def __init__(
+        self,
+        field_state_type: FieldState = FieldState.X,
+        randomness: float = 0.1,
+        n_playouts: int = DEFAULT_PLAYOUTS,
+        time_budget_ms: float | None = None,
+        exploration: float = DEFAULT_EXPLORATION,
+        seed: int | None = None,
+    ):
+        """
+        Args:
+            field_state_type (FieldState): The player of the agent.
+            randomness (float): The exploration rate of random moves.
+            n_playouts (int): The playouts per move, used if there is no time budget.
+            time_budget_ms (float | None): Search until the time per move is used up instead.
+            exploration (float): The UCT exploration constant.
+            seed (int | None): The seed of the rollouts, for reproducible games.
+        """
+        super().__init__(field_state_type, randomness)
+        if n_playouts < 1:
+            raise ValueError("MCTS needs at least 1 playout per move.")
+        if time_budget_ms is not None and time_budget_ms <= 0:
+            raise ValueError("The time budget must be positive.")
+        self.n_playouts = n_playouts
+        self.time_budget_ms = time_budget_ms
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self._root = None
+        self._root_bits = None  # (x_bits, o_bits, size) of the root position
+        self.playouts = 0  # total over all searches
+        self.last_playouts = 0
+        self.last_playouts_per_second = float(0)
+        self.last_reused_visits = 0  # playouts inherited from the previous tree
+
+    def get_best_move(self, board) -> int | None:
+        """
+        Get the most visited move after running the playouts from the current board.
+        Args:
+            board: The current state of the Tic Tac Toe board.
+        Returns:
+            int | None: The flat index of the move, None if the game is over.
+        """
+        if board.is_game_over():
+            return None
+
+        # Explores with the seeded generator too, so a seed makes whole games reproducible
+        if self.rng.random() < self._get_epsilon_by_game_count():
+            self.n_invalid_move += 1
+            return self.rng.choice(board.bit_board.empty_indices())
+
+        self.n_best_move += 1
+        engine = board.bit_board
+        # Search on a copy, so the board itself is never changed by the playouts
+        search_board = BitBoard(engine.x_bits, engine.o_bits, engine.size, engine.win_length)
+        root = self._get_root(search_board)
+        self.last_reused_visits = root.visits
+
+        start = time.perf_counter()
+        playouts = 0
+        if self.time_budget_ms is None:
+            for _ in range(self.n_playouts):
+                self._playout(root, search_board)
+            playouts = self.n_playouts
+        else:
+            deadline = start + self.time_budget_ms / 1000
+            while True:
+                self._playout(root, search_board)
+                playouts += 1
+                if time.perf_counter() > deadline:
+                    break
+        elapsed = time.perf_counter() - start
+        self.playouts += playouts
+        self.last_playouts = playouts
+        self.last_playouts_per_second = playouts / elapsed if elapsed > 0 else float(0)
+
+        best_child = max(root.children.values(), key=lambda child: child.visits)
+        return best_child.move
+
+    def reset_tree(self):
+        """Forget the search tree, e.g. before a new game."""
+        self._root = None
+        self._root_bits = None
+
+    def _get_root(self, engine):
+        """
+        Find the current position among the root, its children and grandchildren of the previous tree.
+        A new root is created if it isn't there, e.g. at the start of a game.
+        """
+        target = (engine.x_bits, engine.o_bits, engine.size)
+        root = self._find_subtree(target)
+        if root is None:
+            root = Node(None, None, _get_opponent(self.FIELD_STATE_TYPE), self._get_moves(engine))
+        root.parent = None  # the rest of the old tree can be freed
+        self._root = root
+        self._root_bits = target
+        return root
+
+    def _find_subtree(self, target):
+        if self._root is None or self._root_bits[2] != target[2]:
+            return None
+        x_bits, o_bits, _ = self._root_bits
+        if (x_bits, o_bits) == target[:2]:
+            return self._root
+        # The position after our move and the opponent's reply is two levels down
+        candidates = [(self._root, x_bits, o_bits)]
+        for _ in range(2):
+            next_candidates = []
+            for node, node_x_bits, node_o_bits in candidates:
+                for move, child in node.children.items():
+                    child_x_bits, child_o_bits = node_x_bits, node_o_bits
+                    if child.player_just_moved == FieldState.X:
+                        child_x_bits |= 1 << move
+                    else:
+                        child_o_bits |= 1 << move
+                    if (child_x_bits, child_o_bits) == target[:2]:
+                        return child if child.player_just_moved != self.FIELD_STATE_TYPE else None
+                    next_candidates.append((child, child_x_bits, child_o_bits))
+            candidates = next_candidates
+        return None
+
+    def _get_moves(self, engine) -> list[int]:
+        """Get the empty fields in random order, so expansion order has no bias."""
+        moves = engine.empty_indices() if engine.winner is None else []
+        self.rng.shuffle(moves)
+        return moves
+
+    def _playout(self, root, engine):
+        """Run one selection, expansion, rollout and backpropagation from the root."""
+        node = root
+        depth = 0
+        # Selection: follow UCT while all moves of the node are expanded
+        while not node.untried_moves and node.children:
+            node = node.select_child(self.exploration)
+            engine.push(node.move, node.player_just_moved)
+            depth += 1
+
+        # Expansion: add one child for an untried move
+        if node.untried_moves:
+            move = node.untried_moves.pop()
+            player = _get_opponent(node.player_just_moved)
+            engine.push(move, player)
+            depth += 1
+            child = Node(node, move, player, self._get_moves(engine))
+            node.children[move] = child
+            node = child
+
+        winner = engine.winner
+        if winner is None and engine.empty_count > 0:
+            winner = self._rollout(engine, _get_opponent(node.player_just_moved))
+
+        for _ in range(depth):
+            engine.pop()
+
+        # Backpropagation: every node counts the result for the player who moved into it
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.player_just_moved:
+                node.wins += 1
+            node = node.parent
+
+    def _rollout(self, engine, player: FieldState) -> FieldState | None:
+        """
+        Play random moves to the end of the game on plain bitmasks.
+        A random order of the empty fields is a uniformly random game, so it is shuffled once.
+        Returns:
+            FieldState | None: The winner, None for a draw.
+        """
+        moves = engine.empty_indices()
+        self.rng.shuffle(moves)
+        lines_through_index = engine.lines_through_index
+        bits = {FieldState.X: engine.x_bits, FieldState.O: engine.o_bits}
+        for move in moves:
+            player_bits = bits[player] | 1 << move
+            bits[player] = player_bits
+            for mask in lines_through_index[move]:
+                if player_bits & mask == mask:
+                    return player
+            player = FieldState.O if player == FieldState.X else FieldState.X
+        return None
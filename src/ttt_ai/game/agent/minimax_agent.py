@@ -1,8 +1,118 @@
+import multiprocessing
+import os
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from enum import StrEnum
+from functools import lru_cache
 
 from ttt_ai.game.agent.agent import Agent
+from ttt_ai.game.agent.solved_table import SolvedTable, load_solved_table
+from ttt_ai.game.agent.transposition_table import TranspositionTable
+from ttt_ai.game.bit_board import BOARD_SIZE, BitBoard, get_lines_through_index
 from ttt_ai.game.field import FieldState
 
+WIN_SCORE = 1000  # minus the depth of the win, so faster wins and slower losses score better
+
+# Bound types of alpha-beta results stored in the transposition table
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+DEFAULT_TIME_BUDGET_MS = 100  # per move in the iterative deepening mode
+DEADLINE_CHECK_INTERVAL = 1024  # nodes between two clock reads
+
+
+class SearchMode(StrEnum):
+    MINIMAX = "minimax"
+    ALPHA_BETA = "alpha_beta"
+    SOLVED_TABLE = "solved_table"  # 3x3 only, other boards use alpha-beta
+    ITERATIVE_DEEPENING = "iterative_deepening"  # negamax with a time budget per move, ignores max_depth
+    PARALLEL = "parallel"  # alpha-beta with the root moves spread across a process pool
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the deadline of the move has passed."""
+
+
+@lru_cache(maxsize=None)
+def get_move_order(size: int, win_length: int) -> tuple[int, ...]:
+    """
+    Get the flat indices ordered by the number of lines through them (center, corners, edges on 3x3).
+    Args:
+        size (int): The number of rows and columns.
+        win_length (int): The number of fields in a row needed to win.
+    Returns:
+        tuple[int, ...]: The ordered flat indices.
+    """
+    lines_through_index = get_lines_through_index(size, win_length)
+    return tuple(
+        sorted(range(size * size), key=lambda index: -len(lines_through_index[index]))
+    )
+
+
+def _to_stored_score(score: int, depth: int) -> int:
+    """Make a depth-aware score relative to the node, so it can be reused at any depth."""
+    if score > 0:
+        return score + depth
+    if score < 0:
+        return score - depth
+    return score
+
+
+def _from_stored_score(score: int, depth: int) -> int:
+    """Turn a stored node-relative score back into a score relative to the root."""
+    if score > 0:
+        return score - depth
+    if score < 0:
+        return score + depth
+    return score
+
+
+# State of a worker process of the parallel search
+_shared_alpha = None  # best root score found so far, shared by all workers of a pool
+_worker_agents = {}  # alpha-beta agents per (player, max_depth), their tables live as long as the worker
+
+
+def _init_worker(shared_alpha):
+    """Keep the shared bound of the pool in the worker process."""
+    global _shared_alpha
+    _shared_alpha = shared_alpha
+
+
+def _search_root_move(
+    x_bits: int,
+    o_bits: int,
+    size: int,
+    win_length: int,
+    player: FieldState,
+    move: int,
+    max_depth: int,
+) -> tuple[int, int, int]:
+    """
+    Search the subtree of one root move with alpha-beta in a worker process.
+    The search starts with the best root score found so far by any worker, and publishes its own score.
+    Returns:
+        tuple[int, int, int]: The score, the alpha the search started with (a score not above it
+        is only an upper bound) and the number of nodes visited.
+    """
+    agent = _worker_agents.get((player, max_depth))
+    if agent is None:
+        agent = MiniMaxAgent(player, 0, max_depth, search_mode=SearchMode.ALPHA_BETA)
+        _worker_agents[(player, max_depth)] = agent
+    engine = BitBoard(x_bits, o_bits, size, win_length)
+    engine.push(move, player)
+
+    alpha = _shared_alpha.value
+    nodes_before = agent.nodes_visited
+    score = agent._alpha_beta(
+        engine, 0, False, alpha if alpha > -WIN_SCORE else float("-inf"), float("inf")
+    )
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return score, alpha, agent.nodes_visited - nodes_before
+
 
 class MiniMaxAgent(Agent):
     """
@@ -10,9 +120,42 @@ class MiniMaxAgent(Agent):
     """
 
     def __init__(
-        self, field_state_type: FieldState = FieldState.X, randomness: float = 0.2
+        self,
+        field_state_type: FieldState = FieldState.X,
+        randomness: float = 0.2,
+        max_depth: int = 7,
+        transposition_table: TranspositionTable | None = None,
+        search_mode: SearchMode = SearchMode.MINIMAX,
+        solved_table: SolvedTable | None = None,
+        time_budget_ms: float = DEFAULT_TIME_BUDGET_MS,
+        n_workers: int | None = None,
     ):
         super().__init__(field_state_type, randomness)
+        # Limit of the search depth, needed for larger boards. Iterative deepening is limited by
+        # time_budget_ms instead and searches as deep as the budget allows.
+        self.max_depth = max_depth
+        self.search_mode = search_mode
+        self.solved_table = solved_table
+        if search_mode == SearchMode.SOLVED_TABLE and solved_table is None:
+            self.solved_table = load_solved_table()  # shared memory map of the default table
+        if time_budget_ms <= 0:
+            raise ValueError("The time budget must be positive.")
+        self.time_budget_ms = time_budget_ms
+        self.nodes_visited = 0  # total over all searches
+        self.last_nodes_visited = 0  # of the last get_best_move call
+        self.last_search_depth = 0  # deepest completed iteration of the last search
+        self.last_nodes_per_second = float(0)
+        self._deadline = None
+        self._next_deadline_check = 0
+        self.n_workers = n_workers or os.cpu_count() or 1  # processes of the parallel search
+        self._executor = None  # started with the first parallel search
+        self._shared_alpha = None
+        # Search results are memoized for the lifetime of the agent, across moves and games
+        self.transposition_table = (
+            transposition_table
+            if transposition_table is not None
+            else TranspositionTable()
+        )
 
     def get_best_move(self, board) -> int | None:
         """
@@ -37,76 +180,382 @@ class MiniMaxAgent(Agent):
             # If randomness condition is not met, use minimax algorithm
             self.n_best_move += 1
 
-            if board.is_empty():
+            if board.is_empty() and self.search_mode == SearchMode.MINIMAX:
                 return 0  # If the board is empty, return the first move
 
-            best_score = float("-inf")
-            best_move = None
-            for row in range(board.BOARD_SIZE):
-                for col in range(board.BOARD_SIZE):
-                    if board[row, col].state == FieldState.EMPTY:
-                        # Make the move
-                        board[row, col].state = self.FIELD_STATE_TYPE
-                        score = self._minimax(
-                            board, 0, False  # Start with the opponent's turn
-                        )
-                        # Undo the move
-                        board[row, col].state = FieldState.EMPTY
-
-                        if score > best_score:
-                            best_score = score
-                            best_move = board.get_flat_index(row, col)
+            if (
+                self.search_mode == SearchMode.SOLVED_TABLE
+                and board.BOARD_SIZE == BOARD_SIZE
+                and board.WIN_LENGTH == BOARD_SIZE
+            ):
+                # Perfect play with a single table lookup, no search needed
+                self.last_nodes_visited = 0
+                return self.solved_table.get_best_move(board, self.FIELD_STATE_TYPE)
+
+            # Search on the bitboard engine with make/unmake moves
+            engine = board.bit_board
+            nodes_before = self.nodes_visited
+            start = time.perf_counter()
+            if self.search_mode == SearchMode.ITERATIVE_DEEPENING:
+                best_move = self._get_best_move_iterative_deepening(engine)
+            elif self.search_mode == SearchMode.PARALLEL:
+                best_move = self._get_best_move_parallel(engine)
+            elif self.search_mode != SearchMode.MINIMAX:
+                best_move = self._get_best_move_alpha_beta(engine)
+            else:
+                best_move = self._get_best_move_minimax(engine)
+            elapsed = time.perf_counter() - start
+            self.last_nodes_visited = self.nodes_visited - nodes_before
+            self.last_nodes_per_second = (
+                self.last_nodes_visited / elapsed if elapsed > 0 else float(0)
+            )
 
             return best_move
 
+    def _get_best_move_minimax(self, engine) -> int | None:
+        """Try every move in index order and keep the first one with the best minimax score."""
+        best_score = float("-inf")
+        best_move = None
+        for index in engine.empty_indices():
+            # Make the move
+            engine.push(index, self.FIELD_STATE_TYPE)
+            score = self._minimax(engine, 0, False)  # Start with the opponent's turn
+            # Undo the move
+            engine.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = index
+
+        return best_move
+
+    def _get_best_move_alpha_beta(self, engine) -> int | None:
+        """Try the moves in center/corner/edge order and keep the first one with the best score."""
+        alpha = float("-inf")
+        best_score = float("-inf")
+        best_move = None
+        for index in self._get_ordered_moves(engine):
+            engine.push(index, self.FIELD_STATE_TYPE)
+            score = self._alpha_beta(engine, 0, False, alpha, float("inf"))
+            engine.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = index
+            alpha = max(alpha, score)
+
+        return best_move
+
+    def _get_best_move_parallel(self, engine) -> int | None:
+        """
+        Search the root moves in parallel, each worker process takes the next move from the queue.
+        The best root score is shared between the workers, so later moves are searched with a
+        tighter alpha and pruned as in the single-core alpha-beta search.
+        """
+        moves = self._get_ordered_moves(engine)
+        if len(moves) == 1:
+            return moves[0]
+        if self._executor is None:
+            self._shared_alpha = multiprocessing.Value("i", -WIN_SCORE - 1)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                initializer=_init_worker,
+                initargs=(self._shared_alpha,),
+            )
+        with self._shared_alpha.get_lock():
+            self._shared_alpha.value = -WIN_SCORE - 1
+
+        def submit(move):
+            return self._executor.submit(
+                _search_root_move,
+                engine.x_bits,
+                engine.o_bits,
+                engine.size,
+                engine.win_length,
+                self.FIELD_STATE_TYPE,
+                move,
+                self.max_depth,
+            )
+
+        # The most promising move is searched first on its own, so the others start with its bound
+        first_future = submit(moves[0])
+        first_future.result()
+        futures = [first_future] + [submit(move) for move in moves[1:]]
+        best_score = None
+        best_move = None
+        for move, future in zip(moves, futures):
+            score, alpha, nodes = future.result()
+            self.nodes_visited += nodes
+            if score <= alpha:
+                continue  # Failed low, the move is not better than one searched before
+            if best_score is None or score > best_score:
+                best_score = score
+                best_move = move
+        return best_move
+
+    def close(self):
+        """Shut down the worker processes of the parallel search."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._shared_alpha = None
+
+    def _get_best_move_iterative_deepening(self, engine) -> int | None:
+        """
+        Search with increasing depth limits until the time budget is used up.
+        The move of the deepest completed iteration is returned. The depth 1 iteration
+        ignores the deadline, so there always is a move. max_depth is not applied, the
+        iterations only stop at the deadline, a forced result or the end of the game.
+        """
+        self._deadline = time.perf_counter() + self.time_budget_ms / 1000
+        self._next_deadline_check = self.nodes_visited + DEADLINE_CHECK_INTERVAL
+        self.last_search_depth = 0
+        best_move = None
+        for depth_limit in range(1, engine.empty_count + 1):
+            try:
+                move, score = self._negamax_root(engine, depth_limit, best_move)
+            except _SearchTimeout:
+                break
+            best_move = move
+            self.last_search_depth = depth_limit
+            if abs(score) >= WIN_SCORE - depth_limit:
+                break  # A forced win or loss was found, deeper searches can't change it
+        self._deadline = None
+        return best_move
+
+    def _negamax_root(self, engine, depth_limit, first_move) -> tuple[int, int]:
+        """Search all moves to depth_limit, starting with the best move of the previous iteration."""
+        moves = self._get_ordered_moves(engine)
+        if first_move is not None:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+        opponent = self._get_opponent()
+        alpha = -WIN_SCORE - 1
+        best_move = None
+        for index in moves:
+            engine.push(index, self.FIELD_STATE_TYPE)
+            try:
+                score = -self._negamax(
+                    engine, 1, depth_limit, opponent, -WIN_SCORE - 1, -alpha
+                )
+            finally:
+                engine.pop()
+            if best_move is None or score > alpha:
+                alpha = score
+                best_move = index
+        return best_move, alpha
+
+    def _negamax(self, board, depth, depth_limit, player, alpha, beta) -> int:
+        """
+        The alpha-beta search in negamax form, scores are seen from the player to move.
+        Args:
+            board: The bitboard engine of the current Tic Tac Toe board.
+            depth: The current depth in the game tree.
+            depth_limit: The depth of the current iteration.
+            player: The player to move.
+            alpha: The score the player to move is already assured of.
+            beta: The score the opponent is already assured of.
+        Returns:
+            The score of the board state for the player to move, WIN_SCORE - depth for a win.
+        Raises:
+            _SearchTimeout: If the deadline has passed, only in iterations deeper than 1.
+        """
+        self.nodes_visited += 1
+        if self.nodes_visited >= self._next_deadline_check:
+            self._next_deadline_check = self.nodes_visited + DEADLINE_CHECK_INTERVAL
+            if depth_limit > 1 and time.perf_counter() > self._deadline:
+                raise _SearchTimeout
+
+        winner = board.winner
+        if winner is not None:
+            return WIN_SCORE - depth if winner == player else depth - WIN_SCORE
+        elif board.empty_count == 0 or depth >= depth_limit:
+            return 0
+
+        key = (
+            SearchMode.ITERATIVE_DEEPENING,
+            board.zobrist_hash,
+            board.size,
+            board.win_length,
+            player,
+            min(depth_limit - depth, board.empty_count),
+        )
+        entry = self.transposition_table.get(key)
+        if entry is not None:
+            stored_score, bound = entry
+            score = _from_stored_score(stored_score, depth)
+            if bound == EXACT:
+                return score
+            if bound == LOWER_BOUND:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score
+
+        alpha_original = alpha
+        opponent = FieldState.O if player == FieldState.X else FieldState.X
+        best_score = -WIN_SCORE - 1
+        for index in self._get_ordered_moves(board):
+            board.push(index, player)
+            try:
+                score = -self._negamax(board, depth + 1, depth_limit, opponent, -beta, -alpha)
+            finally:
+                board.pop()
+            best_score = max(score, best_score)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break  # The opponent will avoid this branch
+
+        if best_score <= alpha_original:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.put(key, (_to_stored_score(best_score, depth), bound))
+        return best_score
+
+    @staticmethod
+    def _get_ordered_moves(board) -> list[int]:
+        """Get the empty fields of the bitboard engine, the most promising first."""
+        occupied = board.x_bits | board.o_bits
+        return [
+            index
+            for index in get_move_order(board.size, board.win_length)
+            if not occupied >> index & 1
+        ]
+
+    def _get_opponent(self) -> FieldState:
+        """Get the field state of the opponent."""
+        return FieldState.O if self.FIELD_STATE_TYPE == FieldState.X else FieldState.X
+
     def _minimax(self, board, depth, is_maximizing):
         """
         The minimax algorithm to evaluate the best move.
         Args:
-            board: The current state of the Tic Tac Toe board.
+            board: The bitboard engine of the current Tic Tac Toe board.
             depth: The current depth in the game tree.
             is_maximizing: Boolean indicating if the current player is maximizing or minimizing.
         Returns:
             The score of the board state.
         """
-        # Base case: check for terminal states (win/loss/draw)
-        if board.is_board_full():
+        self.nodes_visited += 1
+        # Base case: read the cached terminal status (win/loss/draw)
+        winner = board.winner
+        if winner is not None:
+            return +1 if winner == self.FIELD_STATE_TYPE else -1
+        elif board.empty_count == 0:
             return 0
-        elif board.is_winner(self.FIELD_STATE_TYPE):
-            return +1
-        elif board.is_winner(
-            FieldState.O if self.FIELD_STATE_TYPE == FieldState.X else FieldState.X
-        ):
-            return -1
-
-        if depth >= 7:  # Limit the depth to prevent excessive recursion
+
+        if depth >= self.max_depth:  # Limit the depth to prevent excessive recursion
             print(f"Critical depth of {depth} reached, returning 0")
             return 0
 
+        # The score only depends on the position, the players and the remaining depth.
+        # With more depth left than empty fields the search is exact, so these share one entry.
+        key = (
+            board.zobrist_hash,
+            board.size,
+            board.win_length,
+            is_maximizing,
+            self.FIELD_STATE_TYPE,
+            min(self.max_depth - depth, board.empty_count),
+        )
+        best_score = self.transposition_table.get(key)
+        if best_score is not None:
+            return best_score
+
         # Recursive case: explore all possible moves
         if is_maximizing:  # Maximizing player's turn
             # Maximizing player is the agent with FIELD_STATE_TYPE
             best_score = float("-inf")
-            for row in range(board.BOARD_SIZE):
-                for col in range(board.BOARD_SIZE):
-                    if board[row, col].state == FieldState.EMPTY:
-                        board[row, col].state = self.FIELD_STATE_TYPE
-                        score = self._minimax(board, depth + 1, False)
-                        board[row, col].state = FieldState.EMPTY
-                        best_score = max(score, best_score)
-            return best_score
+            for index in board.empty_indices():
+                board.push(index, self.FIELD_STATE_TYPE)
+                score = self._minimax(board, depth + 1, False)
+                board.pop()
+                best_score = max(score, best_score)
         else:  # Minimizing player's turn
             # The opponent's turn, which is minimizing the score
             best_score = float("inf")
-            for row in range(board.BOARD_SIZE):
-                for col in range(board.BOARD_SIZE):
-                    if board[row, col].state == FieldState.EMPTY:
-                        board[row, col].state = (
-                            FieldState.O
-                            if self.FIELD_STATE_TYPE == FieldState.X
-                            else FieldState.X
-                        )
-                        score = self._minimax(board, depth + 1, True)
-                        board[row, col].state = FieldState.EMPTY
-                        best_score = min(score, best_score)
-            return best_score
+            opponent = self._get_opponent()
+            for index in board.empty_indices():
+                board.push(index, opponent)
+                score = self._minimax(board, depth + 1, True)
+                board.pop()
+                best_score = min(score, best_score)
+
+        self.transposition_table.put(key, best_score)
+        return best_score
+
+    def _alpha_beta(self, board, depth, is_maximizing, alpha, beta) -> int:
+        """
+        The minimax algorithm with alpha-beta pruning, move ordering and depth-aware scores.
+        Args:
+            board: The bitboard engine of the current Tic Tac Toe board.
+            depth: The current depth in the game tree.
+            is_maximizing: Boolean indicating if the current player is maximizing or minimizing.
+            alpha: The score the maximizing player is already assured of.
+            beta: The score the minimizing player is already assured of.
+        Returns:
+            The score of the board state, WIN_SCORE - depth for a win of the agent.
+        """
+        self.nodes_visited += 1
+        winner = board.winner
+        if winner is not None:
+            return WIN_SCORE - depth if winner == self.FIELD_STATE_TYPE else depth - WIN_SCORE
+        elif board.empty_count == 0 or depth >= self.max_depth:
+            return 0
+
+        key = (
+            SearchMode.ALPHA_BETA,
+            board.zobrist_hash,
+            board.size,
+            board.win_length,
+            is_maximizing,
+            self.FIELD_STATE_TYPE,
+            min(self.max_depth - depth, board.empty_count),
+        )
+        entry = self.transposition_table.get(key)
+        if entry is not None:
+            stored_score, bound = entry
+            score = _from_stored_score(stored_score, depth)
+            if bound == EXACT:
+                return score
+            if bound == LOWER_BOUND:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score
+
+        alpha_original = alpha
+        beta_original = beta
+        if is_maximizing:
+            player = self.FIELD_STATE_TYPE
+            best_score = float("-inf")
+        else:
+            player = self._get_opponent()
+            best_score = float("inf")
+
+        for index in self._get_ordered_moves(board):
+            board.push(index, player)
+            score = self._alpha_beta(board, depth + 1, not is_maximizing, alpha, beta)
+            board.pop()
+            if is_maximizing:
+                best_score = max(score, best_score)
+                alpha = max(alpha, score)
+            else:
+                best_score = min(score, best_score)
+                beta = min(beta, score)
+            if alpha >= beta:
+                break  # The other player will avoid this branch
+
+        if best_score <= alpha_original:
+            bound = UPPER_BOUND
+        elif best_score >= beta_original:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.put(key, (_to_stored_score(best_score, depth), bound))
+        return best_score
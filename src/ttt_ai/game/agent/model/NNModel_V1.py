@@ -3,9 +3,10 @@ import torch.nn as nn
 
 class NNModel_V1(nn.Module):
 
-    def __init__(self):
+    def __init__(self, board_size: int = 3):
         super(NNModel_V1, self).__init__()
-        size = 9
+        self.board_size = board_size
+        size = board_size * board_size
         layer_multiplier = 32
         self.fc1 = nn.Linear(size, size * layer_multiplier)  # Input layer
         self.fc2 = nn.Linear(
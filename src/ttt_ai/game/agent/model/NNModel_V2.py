@@ -3,9 +3,10 @@ import torch.nn as nn
 
 class NNModel_V2(nn.Module):
 
-    def __init__(self, randomness: float = 0.2):
+    def __init__(self, randomness: float = 0.2, board_size: int = 3):
         super(NNModel_V2, self).__init__()
-        size = 9
+        self.board_size = board_size
+        size = board_size * board_size
         layer_multiplier = 32
         self.fc1 = nn.Linear(size, size * (layer_multiplier // 2))
         self.fc2 = nn.Linear(size * (layer_multiplier // 2), size * layer_multiplier)
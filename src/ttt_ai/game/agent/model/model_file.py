@@ -0,0 +1,158 @@
+import pickle
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.game.agent.model.NNModel_V2 import NNModel_V2
+from ttt_ai.tools.atomic_file import write_atomically
+
+FORMAT_VERSION = 1
+
+# Architecture ids stored in the model files, the names of the agent types in the README
+ARCHITECTURES = {"nn_v1": NNModel_V1, "nn_v2": NNModel_V2}
+HEADER_KEYS = ("format_version", "architecture", "board_size", "training_step")
+
+
+def get_architecture_id(model: nn.Module) -> str:
+    """
+    Get the id of the architecture of a model.
+    Args:
+        model (nn.Module): The network.
+    Returns:
+        str: The key of the model class in ARCHITECTURES.
+    """
+    for architecture, model_class in ARCHITECTURES.items():
+        if type(model) is model_class:
+            return architecture
+    raise TypeError(f"Unknown model architecture {type(model).__name__}.")
+
+
+def make_model_payload(
+    model: nn.Module,
+    state_dict: dict | None = None,
+    training_step: int = 0,
+    metadata: dict | None = None,
+) -> dict:
+    """
+    Build the content of a model file.
+    Args:
+        model (nn.Module): The network, one of ARCHITECTURES.
+        state_dict (dict | None): The weights to store, by default the current ones of the model,
+            e.g. a snapshot taken earlier.
+        training_step (int): The number of training steps the weights have seen.
+        metadata (dict | None): Extra plain values stored with the weights.
+    Returns:
+        dict: The payload to save with torch.save.
+    """
+    return {
+        "format_version": FORMAT_VERSION,
+        "architecture": get_architecture_id(model),
+        "board_size": getattr(model, "board_size", 3),
+        "training_step": training_step,
+        "metadata": metadata or {},
+        "state_dict": model.state_dict() if state_dict is None else state_dict,
+    }
+
+
+def save_model(
+    model: nn.Module, path, training_step: int = 0, metadata: dict | None = None
+):
+    """
+    Save the state dict of a model with the metadata needed to rebuild it, written atomically.
+    Args:
+        model (nn.Module): The network, one of ARCHITECTURES.
+        path: The target file.
+        training_step (int): The number of training steps the weights have seen.
+        metadata (dict | None): Extra plain values stored with the weights.
+    """
+    write_atomically(
+        make_model_payload(model, training_step=training_step, metadata=metadata), Path(path)
+    )
+
+
+def is_legacy_model_file(path) -> bool:
+    """Check if the file is a pickled module from before the versioned format."""
+    try:
+        torch.load(path, weights_only=True, mmap=True)
+    except pickle.UnpicklingError:
+        return True
+    return False
+
+
+def migrate_model_file(path) -> bool:
+    """
+    Rewrite a pickled module (torch.save(model)) in the versioned state dict format.
+    The old file is unpickled completely, only migrate files you trust, e.g. written by this project.
+    Args:
+        path: The model file, replaced atomically.
+    Returns:
+        bool: True if the file was migrated, False if it already had the versioned format.
+    """
+    if not is_legacy_model_file(path):
+        return False
+    model = torch.load(path, weights_only=False)
+    if not isinstance(model, nn.Module):
+        raise ValueError(f"{path} holds neither a versioned model nor a pickled module.")
+    save_model(model, path, metadata={"migrated_from": "module"})
+    print(f"Migrated model file {path} to format version {FORMAT_VERSION}.")
+    return True
+
+
+def load_model(path, mmap: bool = True, migrate: bool = False) -> tuple[nn.Module, dict]:
+    """
+    Build a model from a versioned model file.
+    Only tensors and plain values are unpickled (weights_only=True). With mmap the tensors are
+    mapped from the file instead of read, and the model takes them over without another copy.
+    Args:
+        path: The model file.
+        mmap (bool): Map the file into memory, best for short-lived processes that only play.
+            The mapped file must not be replaced while the model uses it on Windows.
+        migrate (bool): Migrate a legacy pickled module first, instead of raising ValueError.
+    Returns:
+        tuple[nn.Module, dict]: The model and the file header (architecture, board_size,
+        training_step, metadata, format_version).
+    """
+    try:
+        payload = torch.load(path, weights_only=True, mmap=mmap)
+    except pickle.UnpicklingError:
+        if not migrate:
+            raise ValueError(
+                f"{path} is a legacy pickled module, migrate it with migrate_model_file "
+                "or python -m ttt_ai.game.agent.model.model_file."
+            )
+        migrate_model_file(path)
+        payload = torch.load(path, weights_only=True, mmap=mmap)
+
+    if not isinstance(payload, dict) or any(
+        key not in payload for key in HEADER_KEYS + ("state_dict",)
+    ):
+        raise ValueError(
+            f"{path} is not a versioned model file, e.g. a plain state dict without the header."
+        )
+    if payload["format_version"] > FORMAT_VERSION:
+        raise ValueError(
+            f"{path} has format version {payload['format_version']}, this version reads up to {FORMAT_VERSION}."
+        )
+    architecture = payload["architecture"]
+    if architecture not in ARCHITECTURES:
+        raise ValueError(f"{path} has the unknown architecture {architecture}.")
+
+    # Built without allocating weights, the loaded tensors are assigned directly
+    with torch.device("meta"):
+        model = ARCHITECTURES[architecture](board_size=payload["board_size"])
+    model.load_state_dict(payload["state_dict"], assign=True)
+    header = {key: value for key, value in payload.items() if key != "state_dict"}
+    return model, header
+
+
+def main():
+    """Migrate the model files in assets/resources/models to the versioned format."""
+    project_root = Path(__file__).parent.parent.parent.parent.parent.parent
+    for path in sorted((project_root / "assets" / "resources" / "models").glob("*.pt")):
+        migrate_model_file(path)
+
+
+if __name__ == "__main__":
+    main()
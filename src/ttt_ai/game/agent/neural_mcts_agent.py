@@ -0,0 +1,302 @@
+import math
+import random
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ttt_ai.game.agent.agent import Agent
+from ttt_ai.game.bit_board import get_lines_through_index
+from ttt_ai.game.field import FieldState
+from ttt_ai.game.vec_board import O as O_CODE
+from ttt_ai.game.vec_board import X as X_CODE
+
+DEFAULT_SIMULATIONS = 200
+DEFAULT_LEAF_BATCH_SIZE = 16  # leaves per tree and forward pass
+DEFAULT_C_PUCT = 1.5
+DEFAULT_VIRTUAL_LOSS = 1.0
+
+
+def _get_opponent(player: FieldState) -> FieldState:
+    return FieldState.O if player == FieldState.X else FieldState.X
+
+
+class PUCTNode:
+    """
+    A node of the search tree, the position after move was played by player_just_moved.
+    The value sum is counted for player_just_moved, in [-1, 1] per visit.
+    """
+
+    __slots__ = (
+        "move",
+        "player_just_moved",
+        "prior",
+        "children",
+        "visits",
+        "value_sum",
+        "terminal_value",
+    )
+
+    def __init__(self, move: int | None, player_just_moved: FieldState, prior: float):
+        self.move = move
+        self.player_just_moved = player_just_moved
+        self.prior = prior
+        self.children = None  # move -> PUCTNode, set when the network evaluated the node
+        self.visits = 0
+        self.value_sum = float(0)
+        self.terminal_value = None  # for player_just_moved, set if the game is over
+
+    def select_child(self, c_puct: float):
+        """Select the child with the highest PUCT score Q + c * P * sqrt(N) / (1 + n)."""
+        sqrt_visits = math.sqrt(max(self.visits, 1))
+        best_child = None
+        best_score = float("-inf")
+        for child in self.children.values():
+            q = child.value_sum / child.visits if child.visits > 0 else float(0)
+            score = q + c_puct * child.prior * sqrt_visits / (1 + child.visits)
+            if score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
+
+
+class _SearchTree:
+    """The root of one search and the position it starts from."""
+
+    __slots__ = ("root", "x_bits", "o_bits")
+
+    def __init__(self, x_bits: int, o_bits: int, player: FieldState):
+        self.root = PUCTNode(None, _get_opponent(player), float(1))
+        self.x_bits = x_bits
+        self.o_bits = o_bits
+
+
+class NeuralMCTSAgent(Agent):
+    """
+    An agent that combines Monte Carlo Tree Search with a neural network (AlphaZero style PUCT).
+    Leaves of many simulations, and of many games in get_best_moves, are evaluated with one
+    batched forward pass. Virtual loss keeps the simulations of a batch on different paths.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        field_state_type: FieldState = FieldState.X,
+        randomness: float = 0.1,
+        n_simulations: int = DEFAULT_SIMULATIONS,
+        leaf_batch_size: int = DEFAULT_LEAF_BATCH_SIZE,
+        c_puct: float = DEFAULT_C_PUCT,
+        virtual_loss: float = DEFAULT_VIRTUAL_LOSS,
+        size: int | None = None,
+        win_length: int | None = None,
+    ):
+        """
+        Args:
+            model (nn.Module): The network, either a Q-network like NNModel_V1/NNModel_V2 or a
+                model returning (policy logits, value) for the player to move.
+            field_state_type (FieldState): The player of the agent.
+            randomness (float): The exploration rate of random moves.
+            n_simulations (int): The simulations per move.
+            leaf_batch_size (int): The leaves collected per tree before a forward pass.
+            c_puct (float): The exploration constant of PUCT.
+            virtual_loss (float): The loss added to pending paths while their leaf is evaluated.
+            size (int | None): The board size of the model, None for the model's board_size.
+            win_length (int | None): The number of fields in a row needed to win, None for size.
+        """
+        super().__init__(field_state_type, randomness)
+        if n_simulations < 1 or leaf_batch_size < 1:
+            raise ValueError("The search needs at least 1 simulation and 1 leaf per batch.")
+        self.model = model
+        self.n_simulations = n_simulations
+        self.leaf_batch_size = leaf_batch_size
+        self.c_puct = c_puct
+        self.virtual_loss = virtual_loss
+        self.size = size or getattr(model, "board_size", 3)
+        self.win_length = win_length or self.size
+        self.n_fields = self.size * self.size
+        self.lines_through_index = get_lines_through_index(self.size, self.win_length)
+        self.full_mask = (1 << self.n_fields) - 1
+        self.last_simulations = 0
+        self.last_forward_passes = 0
+        self.last_simulations_per_second = float(0)
+
+    def get_best_move(self, board) -> int | None:
+        """
+        Get the most visited move after the simulations from the current board.
+        Args:
+            board: The current state of the Tic Tac Toe board.
+        Returns:
+            int | None: The flat index of the move, None if the game is over.
+        """
+        if board.is_game_over():
+            return None
+        if board.BOARD_SIZE != self.size:
+            raise ValueError(f"The agent plays {self.size}x{self.size} boards, not {board.BOARD_SIZE}x{board.BOARD_SIZE}.")
+
+        if random.uniform(0, 1) < self._get_epsilon_by_game_count():
+            self.n_invalid_move += 1
+            return board.get_flat_index_of_radom_free_field()
+
+        self.n_best_move += 1
+        engine = board.bit_board
+        tree = _SearchTree(engine.x_bits, engine.o_bits, self.FIELD_STATE_TYPE)
+        self._search([tree])
+        return self._get_most_visited_move(tree)
+
+    def get_best_moves(self, vec_board, rows: np.ndarray) -> np.ndarray:
+        """
+        Search all selected games of a VecBoard at once, their leaves share the forward passes.
+        Args:
+            vec_board: The batch of boards.
+            rows (np.ndarray): Boolean mask of the games where this agent is to move.
+        Returns:
+            np.ndarray: The chosen flat indices, one per selected game.
+        """
+        if vec_board.size != self.size:
+            raise ValueError(f"The agent plays {self.size}x{self.size} boards, not {vec_board.size}x{vec_board.size}.")
+        boards = vec_board.boards[rows]
+        x_masks = np.packbits(boards == X_CODE, axis=1, bitorder="little")
+        o_masks = np.packbits(boards == O_CODE, axis=1, bitorder="little")
+        trees = [
+            _SearchTree(
+                int.from_bytes(x_mask.tobytes(), "little"),
+                int.from_bytes(o_mask.tobytes(), "little"),
+                self.FIELD_STATE_TYPE,
+            )
+            for x_mask, o_mask in zip(x_masks, o_masks)
+        ]
+        self._search(trees)
+        moves = np.array(
+            [self._get_most_visited_move(tree) for tree in trees], dtype=np.intp
+        )
+
+        # Randomness condition to explore the boards
+        explore = vec_board.rng.random(len(moves)) < self._get_epsilon_by_game_count()
+        if explore.any():
+            moves[explore] = vec_board.random_legal_moves(np.flatnonzero(rows)[explore])
+        self.n_best_move += int((~explore).sum())
+        return moves
+
+    @staticmethod
+    def _get_most_visited_move(tree) -> int:
+        return max(tree.root.children.values(), key=lambda child: child.visits).move
+
+    def _search(self, trees: list):
+        """Run the simulations of all trees, one batched forward pass per round."""
+        start = time.perf_counter()
+        forward_passes = 0
+        was_training = self.model.training
+        self.model.eval()  # no dropout while searching
+        try:
+            searching = trees
+            while searching:
+                pending = []  # (node path, x_bits, o_bits) of the leaves to evaluate
+                for tree in searching:
+                    self._collect_leaves(tree, pending)
+                if pending:
+                    self._evaluate(pending)
+                    forward_passes += 1
+                searching = [
+                    tree for tree in searching if tree.root.visits < self.n_simulations
+                ]
+        finally:
+            self.model.train(was_training)
+        elapsed = time.perf_counter() - start
+        self.last_simulations = sum(tree.root.visits for tree in trees)
+        self.last_forward_passes = forward_passes
+        self.last_simulations_per_second = (
+            self.last_simulations / elapsed if elapsed > 0 else float(0)
+        )
+
+    def _collect_leaves(self, tree, pending: list):
+        """Select up to leaf_batch_size leaves of a tree, applying virtual loss on their paths."""
+        pending_leaves = set()
+        n_leaves = min(self.leaf_batch_size, self.n_simulations - tree.root.visits)
+        for _ in range(n_leaves):
+            node = tree.root
+            path = [node]
+            x_bits, o_bits = tree.x_bits, tree.o_bits
+            while node.children is not None and node.terminal_value is None:
+                node = node.select_child(self.c_puct)
+                if node.player_just_moved == FieldState.X:
+                    x_bits |= 1 << node.move
+                else:
+                    o_bits |= 1 << node.move
+                path.append(node)
+
+            if node.terminal_value is None and node.children is None:
+                self._set_terminal_value(node, x_bits, o_bits)
+            if node.terminal_value is not None:
+                self._backpropagate(path, node.terminal_value, False)
+                continue
+            if id(node) in pending_leaves:
+                break  # even with virtual loss the search wants the same leaf again
+
+            pending_leaves.add(id(node))
+            for path_node in path[1:]:
+                path_node.visits += self.virtual_loss
+                path_node.value_sum -= self.virtual_loss
+            pending.append((path, x_bits, o_bits))
+
+    def _set_terminal_value(self, node, x_bits: int, o_bits: int):
+        """Mark the node as game over if its move won or filled the board."""
+        if node.move is None:
+            return
+        bits = x_bits if node.player_just_moved == FieldState.X else o_bits
+        for mask in self.lines_through_index[node.move]:
+            if bits & mask == mask:
+                node.terminal_value = float(1)
+                return
+        if x_bits | o_bits == self.full_mask:
+            node.terminal_value = float(0)
+
+    def _evaluate(self, pending: list):
+        """Evaluate all pending leaves with one forward pass, expand them and back up the values."""
+        n_bytes = (self.n_fields + 7) // 8
+        x_masks = np.frombuffer(
+            b"".join(x_bits.to_bytes(n_bytes, "little") for _, x_bits, _ in pending),
+            dtype=np.uint8,
+        ).reshape(len(pending), n_bytes)
+        o_masks = np.frombuffer(
+            b"".join(o_bits.to_bytes(n_bytes, "little") for _, _, o_bits in pending),
+            dtype=np.uint8,
+        ).reshape(len(pending), n_bytes)
+        x_fields = np.unpackbits(x_masks, axis=1, count=self.n_fields, bitorder="little")
+        o_fields = np.unpackbits(o_masks, axis=1, count=self.n_fields, bitorder="little")
+        # Same encoding as Board.flatten(): -1 empty, 0 X, 1 O
+        flat_boards = np.where(x_fields == 1, 0, np.where(o_fields == 1, 1, -1))
+        legal = torch.from_numpy((x_fields | o_fields) == 0)
+
+        with torch.no_grad():
+            output = self.model(torch.from_numpy(flat_boards).float())
+        if isinstance(output, tuple):
+            logits, values = output
+            values = values.reshape(-1)
+        else:
+            # A Q-network has no value head, the best legal Q-value is squashed to [-1, 1]
+            logits = output
+            values = torch.tanh(output.masked_fill(~legal, float("-inf")).max(dim=1).values)
+        priors = torch.softmax(logits.masked_fill(~legal, float("-inf")), dim=1).numpy()
+        values = values.numpy()
+        legal = legal.numpy()
+
+        for (path, _, _), leaf_priors, leaf_legal, value in zip(pending, priors, legal, values):
+            leaf = path[-1]
+            player = _get_opponent(leaf.player_just_moved)
+            leaf.children = {
+                move: PUCTNode(move, player, float(leaf_priors[move]))
+                for move in np.flatnonzero(leaf_legal).tolist()
+            }
+            # The value is for the player to move, the leaf counts it for the player who moved into it
+            self._backpropagate(path, -float(value), True)
+
+    def _backpropagate(self, path: list, value: float, remove_virtual_loss: bool):
+        """Add the value of the leaf (for the player who moved into it) to all nodes of the path."""
+        for node in reversed(path):
+            node.visits += 1
+            node.value_sum += value
+            if remove_virtual_loss and node is not path[0]:
+                node.visits -= self.virtual_loss
+                node.value_sum += self.virtual_loss
+            value = -value
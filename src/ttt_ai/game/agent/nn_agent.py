@@ -1,29 +1,52 @@
 import random
+import time
 from collections import deque
+from dataclasses import dataclass
 
+import numpy as np
 import torch
 import torch.nn as nn
 
 from ttt_ai.game.agent.agent import Agent
-from ttt_ai.game.agent.minimax_agent import MiniMaxAgent
-from ttt_ai.game.agent.trainer.QTrainer import QTrainer
+from ttt_ai.game.agent.inference import FastInferenceModel
+from ttt_ai.game.agent.minimax_agent import MiniMaxAgent, SearchMode
+from ttt_ai.game.agent.model.model_file import load_model, save_model
+from ttt_ai.game.agent.replay_buffer import PrioritizedReplayBuffer, ReplayBuffer
+from ttt_ai.game.agent.trainer.QTrainer import QTrainer, mask_illegal_moves
+from ttt_ai.game.bit_board import BOARD_SIZE
 from ttt_ai.game.field import FieldState
 
 MAX_MEMORY = 100_000
 BATCH_SIZE = 1000
 LR = 0.001
+MAX_ORACLE_BOARD_SIZE = 3  # the minimax oracle is only affordable on small boards
+LATENCY_WINDOW = 10_000  # recent moves kept for the latency stats
 
 
-def is_valid_move(board, move: int) -> bool:
+@dataclass
+class TrainingSchedule:
     """
-    Check if the move is valid.
-    Args:
-        board: The current state of the Tic Tac Toe board.
-        move: The move to check.
-    Returns:
-        True if the move is valid, False otherwise.
+    When NNAgent trains while playing. The defaults train after every move and at every game end.
+    Attributes:
+        training (bool): False for inference-only play, nothing is trained or remembered.
+        short_memory_every (int): Train on the transitions of the last N moves as one micro-batch,
+            0 to skip short-memory training.
+        long_memory_every (int): Train on a batch from the replay memory every K finished games,
+            0 to skip long-memory training.
     """
-    return board.get_field_by_flat_index(move).state == FieldState.EMPTY
+
+    training: bool = True
+    short_memory_every: int = 1
+    long_memory_every: int = 1
+
+    def __post_init__(self):
+        if self.short_memory_every < 0 or self.long_memory_every < 0:
+            raise ValueError("Training intervals can't be negative.")
+
+    @classmethod
+    def inference_only(cls) -> "TrainingSchedule":
+        """A schedule that never trains, for the lowest move latency."""
+        return cls(training=False)
 
 
 class NNAgent(Agent):
@@ -36,26 +59,81 @@ class NNAgent(Agent):
         model: nn.Module,
         field_state_type: FieldState = FieldState.X,
         randomness: float = 0.2,
+        prioritized_replay: bool = False,
+        schedule: TrainingSchedule | None = None,
+        augment_symmetries: bool = False,
     ):
+        """
+        Args:
+            model (nn.Module): The network, e.g. NNModel_V1 or NNModel_V2.
+            field_state_type (FieldState): The player of the agent.
+            randomness (float): The exploration rate.
+            prioritized_replay (bool): Sample the replay memory by TD error.
+            schedule (TrainingSchedule | None): When to train, by default after every move and game.
+            augment_symmetries (bool): Train long memory on random rotations and reflections of the
+                stored transitions, every game teaches up to 8 equivalent games.
+        """
         super().__init__(field_state_type, randomness)
+        self.schedule = schedule if schedule is not None else TrainingSchedule()
+        self.pending_transitions = []  # short-memory micro-batch
+        self.games_since_long_training = 0
+        self.move_latencies = deque(maxlen=LATENCY_WINDOW)  # seconds per perform_action
         self.model = model
         self.gamma = 0.9  # discount rate
-        self.memory = deque(maxlen=MAX_MEMORY)  # popleft()
+        board_size = getattr(model, "board_size", 3)
+        # Ring buffer, the oldest transitions are overwritten once MAX_MEMORY is reached
+        self.prioritized_replay = prioritized_replay
+        self.memory = (
+            PrioritizedReplayBuffer(
+                MAX_MEMORY, board_size * board_size, augment=augment_symmetries
+            )
+            if prioritized_replay
+            else ReplayBuffer(MAX_MEMORY, board_size * board_size, augment=augment_symmetries)
+        )
         self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)
         self.minimax_agent = MiniMaxAgent(
-            field_state_type, 0.0
-        )  # internal minimax agent for reinforcement learning
+            field_state_type, 0.0, search_mode=SearchMode.SOLVED_TABLE
+        )  # internal minimax agent for reinforcement learning, answers from the solved table
         self.perfect_hit_reward = 0
+        self.use_oracle = True  # compare moves with the minimax oracle for the reward
+        self.fast_inference = None  # FastInferenceModel, see enable_fast_inference
 
-    def load_weights(self, path: str, training: bool = True) -> None:
+    def enable_fast_inference(
+        self, trace: bool = True, quantize: bool = False, use_oracle: bool = False
+    ) -> None:
         """
-        Load the weights of the neural network from a file.
+        Answer get_best_move from a traced (and optionally int8 quantized) snapshot of the model.
+        The snapshot doesn't follow training or loaded weights, call this again afterwards.
         Args:
-            :param path:
-            :param training:
+            trace (bool): Trace and freeze the model with TorchScript.
+            quantize (bool): Quantize the linear layers to int8 (CPU dynamic quantization).
+            use_oracle (bool): Keep asking the minimax oracle for the perfect hit reward.
         """
-        # self.model.load_state_dict(torch.load(path))
-        self.model = torch.load(path, weights_only=False)
+        board_size = getattr(self.model, "board_size", 3)
+        self.fast_inference = FastInferenceModel(
+            self.model, board_size * board_size, trace=trace, quantize=quantize
+        )
+        self.use_oracle = use_oracle
+
+    def disable_fast_inference(self) -> None:
+        """Go back to running the training model itself, with the oracle."""
+        self.fast_inference = None
+        self.use_oracle = True
+
+    def load_weights(self, path: str, training: bool = True, migrate: bool = False) -> None:
+        """
+        Load the network from a versioned model file, its architecture replaces the current model.
+        Args:
+            path (str): The model file, see save_weights.
+            training (bool): Train the loaded model. Otherwise the file is memory-mapped, which loads
+                fastest for processes that only play.
+            migrate (bool): Migrate a legacy file with a pickled module to the versioned format first.
+                This unpickles the whole file, only use it for files you trust. Without it a legacy
+                file raises ValueError.
+        """
+        self.model, header = load_model(path, mmap=not training, migrate=migrate)
+        self.fast_inference = None  # the snapshot has the old weights
+        self.use_oracle = True
 
         if training:
             self.model.train()  # set model to train mode
@@ -63,15 +141,16 @@ class NNAgent(Agent):
             self.model.eval()  # set model to evaluation mode
 
         self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)
+        self.trainer.steps = header["training_step"]
 
     def save_weights(self, path: str) -> None:
         """
-        Save the weights of the neural network to a file.
+        Save the weights of the neural network to a file, as state dict with the architecture,
+        board size and training step (see model_file.save_model).
         Args:
             path (str): The path to the file where the weights will be saved.
         """
-        # torch.save(self.model.state_dict(), path)
-        torch.save(self.model, path)
+        save_model(self.model, path, training_step=self.trainer.steps)
 
     def remember(
         self,
@@ -81,23 +160,24 @@ class NNAgent(Agent):
         new_board_flattened,
         game_over,
     ):
-        self.memory.append(
-            (
-                old_board_flattened,
-                chosen_field,
-                reward_for_move,
-                new_board_flattened,
-                game_over,
-            )
-        )  # popleft if MAX_MEMORY is reached
+        self.memory.add(
+            old_board_flattened,
+            chosen_field,
+            reward_for_move,
+            new_board_flattened,
+            game_over,
+        )
 
     def train_long_memory(self):
-        if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE)  # list of tuples
-        else:
-            mini_sample = self.memory
+        if self.prioritized_replay:
+            # Transitions with large TD errors are drawn more often, the weights undo the bias
+            batch, weights, indices = self.memory.sample_prioritized(BATCH_SIZE)
+            td_errors = self.trainer.train_step(*batch, weights=weights)
+            self.memory.update_priorities(indices, td_errors)
+            return
 
-        states, actions, rewards, next_states, dones = zip(*mini_sample)
+        # A random batch of BATCH_SIZE transitions, or the whole memory while it is smaller
+        states, actions, rewards, next_states, dones = self.memory.sample(BATCH_SIZE)
         self.trainer.train_step(states, actions, rewards, next_states, dones)
         # for state, chosen_field, reward_for_move, new_board_flattened, game_over in mini_sample:
         #    self.trainer.train_step(state, chosen_field, reward_for_move, new_board_flattened, game_over)
@@ -117,35 +197,70 @@ class NNAgent(Agent):
     def _calculate_reward(self, board) -> float:
         return super()._calculate_reward(board) + self.perfect_hit_reward
 
+    def _train_pending_transitions(self):
+        """Train short memory on the collected transitions as one micro-batch."""
+        if len(self.pending_transitions) == 1:
+            self.train_short_memory(*self.pending_transitions[0])
+        elif self.pending_transitions:
+            states, actions, rewards, next_states, dones = zip(*self.pending_transitions)
+            self.trainer.train_step(states, actions, rewards, next_states, dones)
+        self.pending_transitions.clear()
+
     def perform_action(self, board) -> None:
+        start = time.perf_counter()
         old_board_flattened = board.flatten()
         chosen_field = super().perform_action(board)
         new_board_flattened = board.flatten()
         reward_for_move = self._calculate_reward(board)
         game_over = board.is_game_over()
 
-        # train short memory
-        self.train_short_memory(
-            old_board_flattened,
-            chosen_field,
-            reward_for_move,
-            new_board_flattened,
-            game_over,
-        )
+        schedule = self.schedule
+        if schedule.training:
+            transition = (
+                old_board_flattened,
+                chosen_field,
+                reward_for_move,
+                new_board_flattened,
+                game_over,
+            )
+            # train short memory, every short_memory_every moves and at the end of a game
+            if schedule.short_memory_every > 0:
+                self.pending_transitions.append(transition)
+                if (
+                    len(self.pending_transitions) >= schedule.short_memory_every
+                    or game_over
+                ):
+                    self._train_pending_transitions()
 
-        # remember
-        self.remember(
-            old_board_flattened,
-            chosen_field,
-            reward_for_move,
-            new_board_flattened,
-            game_over,
-        )
+            # remember
+            self.remember(*transition)
+
+            if game_over and schedule.long_memory_every > 0:
+                self.games_since_long_training += 1
+                if self.games_since_long_training >= schedule.long_memory_every:
+                    self.train_long_memory()
+                    self.games_since_long_training = 0
 
         if game_over:
-            self.train_long_memory()
             if self.total_reward > self.record:
                 self.record = self.total_reward
+        self.move_latencies.append(time.perf_counter() - start)
+
+    def get_latency_stats(self) -> dict[str, float]:
+        """
+        Get the latency of the recent moves, including the training done in perform_action.
+        Returns:
+            dict[str, float]: Mean, median, 95th percentile and maximum in milliseconds.
+        """
+        if not self.move_latencies:
+            return {"mean": float(0), "p50": float(0), "p95": float(0), "max": float(0)}
+        latencies = np.array(self.move_latencies) * 1000
+        return {
+            "mean": float(latencies.mean()),
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "max": float(latencies.max()),
+        }
 
     def get_best_move(self, board) -> int | None:
         """Get the next move for the current board state using a neural network.
@@ -169,35 +284,66 @@ class NNAgent(Agent):
             if board.is_empty():
                 return 0  # If the board is empty, return the first move
 
-            # Convert the board state to a tensor
-            board_tensor = torch.tensor(board.flatten(), dtype=torch.float)
-            board_tensor = board_tensor.unsqueeze(0)
-            # Initialize the neural network model
+            if self.fast_inference is not None:
+                # Preallocated input buffer and traced model, no tensor is built per move
+                engine = board.bit_board
+                best_move = self.fast_inference.best_move(engine.x_bits, engine.o_bits)
+            else:
+                # Convert the board state to a tensor
+                board_tensor = torch.tensor(board.flatten(), dtype=torch.float)
+                board_tensor = board_tensor.unsqueeze(0)
 
-            # Forward pass through the model to get the predicted scores for each move
-            with torch.no_grad():
-                scores = self.model(board_tensor)
-                # Get the index of the move with the highest score
-            best_move = torch.argmax(scores).item()
-            # _, best_move = torch.max(scores.data, 1)
+                # Forward pass through the model to get the predicted scores for each move
+                with torch.inference_mode():
+                    scores = mask_illegal_moves(self.model(board_tensor), board_tensor)
+                # Get the index of the legal move with the highest score
+                best_move = torch.argmax(scores).item()
 
-            best_minimax_move = self.minimax_agent.get_best_move(board)
+            # Occupied fields are masked, so the move is always valid
+            self.n_best_move += 1
+            if self.use_oracle and board.BOARD_SIZE <= MAX_ORACLE_BOARD_SIZE:
+                if self._is_optimal_move(board, best_move):
+                    self.perfect_hit_reward = 0.5  # If the best move is one of the best moves of the minimax agent, count it as a good move
 
-            # Check if the best move is valid
-            if is_valid_move(board, best_move):
-                self.n_best_move += 1
-                if best_minimax_move == best_move:
-                    self.perfect_hit_reward = 0.5  # If the best move is also the best move from the minimax agent, count it as a good move
+            return best_move
 
-                return best_move
-            else:
-                # If the best move is not valid, return a random valid move
-                self.n_invalid_move += 1
-                self.perfect_hit_reward = -0.1
-
-                # return board.get_flat_index_of_radom_free_field()
-                return (
-                    best_minimax_move
-                    if is_valid_move(board, best_minimax_move)
-                    else board.get_flat_index_of_radom_free_field()
-                )
+    def _is_optimal_move(self, board, move: int) -> bool:
+        """
+        Check the move against the oracle. On the solved 3x3 board every optimal move counts,
+        other small boards compare with the move of the minimax search.
+        Args:
+            board: The current state of the Tic Tac Toe board.
+            move (int): The flat index of the move.
+        Returns:
+            bool: True if the move is optimal.
+        """
+        if board.BOARD_SIZE == BOARD_SIZE and board.WIN_LENGTH == BOARD_SIZE:
+            engine = board.bit_board
+            _, _, move_mask = self.minimax_agent.solved_table.lookup(
+                engine.x_bits, engine.o_bits, self.FIELD_STATE_TYPE
+            )
+            return bool(move_mask >> move & 1)
+        return self.minimax_agent.get_best_move(board) == move
+
+    def get_best_moves(self, vec_board, rows: np.ndarray) -> np.ndarray:
+        """Get the next moves for the selected games of a VecBoard with one forward pass.
+        Args:
+            vec_board: The batch of boards.
+            rows (np.ndarray): Boolean mask of the games where this agent is to move.
+        Returns:
+            np.ndarray: The chosen flat indices, one per selected game.
+        """
+        board_tensor = torch.from_numpy(vec_board.flatten()[rows]).float()
+        legal = torch.from_numpy(vec_board.legal_move_mask()[rows])
+
+        with torch.no_grad():
+            scores = self.model(board_tensor)
+        # Only legal moves can be chosen, so there is no invalid move fallback here
+        moves = scores.masked_fill(~legal, float("-inf")).argmax(dim=1).numpy()
+
+        # Randomness condition to explore the boards
+        explore = vec_board.rng.random(len(moves)) < self._get_epsilon_by_game_count()
+        if explore.any():
+            moves[explore] = vec_board.random_legal_moves(np.flatnonzero(rows)[explore])
+        self.n_best_move += int((~explore).sum())
+        return moves
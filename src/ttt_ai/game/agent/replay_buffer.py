@@ -0,0 +1,365 @@
+import math
+
+import numpy as np
+import torch
+
+from ttt_ai.game.symmetry import N_TRANSFORMS, transform_transitions
+
+DEFAULT_CAPACITY = 100_000
+
+
+class ReplayBuffer:
+    """
+    A ring buffer of transitions stored in preallocated fixed-dtype arrays.
+    Boards use the encoding of Board.flatten() (-1 empty, 0 X, 1 O) as int8.
+    Once the buffer is full, the oldest transitions are overwritten.
+    With augment, every transition is returned under a random rotation or reflection of the board,
+    so each stored transition stands for its up to 8 symmetric equivalents.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        n_fields: int = 9,
+        seed: int | None = None,
+        augment: bool = False,
+    ):
+        """
+        Args:
+            capacity (int): The maximum number of transitions.
+            n_fields (int): The fields of a board, size * size.
+            seed (int | None): The seed of the sampling.
+            augment (bool): Apply a random symmetry transform to every returned transition.
+        """
+        if capacity < 1:
+            raise ValueError("The replay buffer needs room for at least 1 transition.")
+        self.capacity = capacity
+        self.n_fields = n_fields
+        self.board_size = math.isqrt(n_fields)
+        if augment and self.board_size**2 != n_fields:
+            raise ValueError("Symmetry augmentation needs a square board.")
+        self.augment = augment
+        self.states = np.zeros((capacity, n_fields), dtype=np.int8)
+        self.actions = np.zeros(capacity, dtype=np.int16)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, n_fields), dtype=np.int8)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+        self.position = 0  # next slot to write
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the arrays."""
+        return (
+            self.states.nbytes
+            + self.actions.nbytes
+            + self.rewards.nbytes
+            + self.next_states.nbytes
+            + self.dones.nbytes
+        )
+
+    def add(self, state, action: int, reward: float, next_state, done: bool):
+        """
+        Store a single transition.
+        Args:
+            state: The flattened board before the move.
+            action (int): The flat index of the move, -1 if no move was played.
+            reward (float): The reward for the move.
+            next_state: The flattened board after the move.
+            done (bool): True if the move ended the game.
+        """
+        position = self.position
+        self.states[position] = state
+        self.actions[position] = action
+        self.rewards[position] = reward
+        self.next_states[position] = next_state
+        self.dones[position] = done
+        self.position = (position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """
+        Store many transitions at once, e.g. from VecBoard games.
+        Args:
+            states: (N, n_fields) flattened boards before the moves.
+            actions: (N,) flat indices of the moves.
+            rewards: (N,) rewards for the moves.
+            next_states: (N, n_fields) flattened boards after the moves.
+            dones: (N,) True where a move ended the game.
+        """
+        n = len(actions)
+        if n > self.capacity:
+            # Only the newest transitions fit
+            states, actions, rewards, next_states, dones = (
+                array[-self.capacity :]
+                for array in (states, actions, rewards, next_states, dones)
+            )
+            n = self.capacity
+        slots = (self.position + np.arange(n)) % self.capacity
+        self.states[slots] = states
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.dones[slots] = dones
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(
+        self, batch_size: int
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Draw a random batch without replacement, or all transitions if there are not more than batch_size.
+        The gathered arrays are handed to torch without another copy.
+        Args:
+            batch_size (int): The number of transitions.
+        Returns:
+            tuple: states, actions, rewards, next_states and dones as tensors.
+        """
+        if self.size <= batch_size:
+            indices = np.arange(self.size)
+        else:
+            indices = self.rng.choice(self.size, batch_size, replace=False)
+        return self.get(indices)
+
+    def get(
+        self, indices: np.ndarray
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Get the transitions at the given slots, under random symmetry transforms with augment.
+        Args:
+            indices (np.ndarray): The slots, all below len(self).
+        Returns:
+            tuple: states, actions, rewards, next_states and dones as tensors.
+        """
+        states = self.states[indices]
+        actions = self.actions[indices]
+        next_states = self.next_states[indices]
+        if self.augment:
+            # One transform per transition, applied to the whole batch with fancy indexing
+            transforms = self.rng.integers(0, N_TRANSFORMS, len(actions))
+            states, actions, next_states = transform_transitions(
+                states, actions, next_states, transforms, self.board_size
+            )
+        return (
+            torch.from_numpy(states),
+            torch.from_numpy(actions),
+            torch.from_numpy(self.rewards[indices]),
+            torch.from_numpy(next_states),
+            torch.from_numpy(self.dones[indices]),
+        )
+
+    def clear(self):
+        """Forget all transitions, the arrays are kept."""
+        self.position = 0
+        self.size = 0
+
+    def state_dict(self) -> dict:
+        """
+        Get a copy of the stored transitions, e.g. for a checkpoint.
+        Only the filled part of the arrays is copied, as tensors so it loads with weights_only=True.
+        Returns:
+            dict: The transitions, position and size.
+        """
+        size = self.size
+        return {
+            "states": torch.from_numpy(self.states[:size].copy()),
+            "actions": torch.from_numpy(self.actions[:size].copy()),
+            "rewards": torch.from_numpy(self.rewards[:size].copy()),
+            "next_states": torch.from_numpy(self.next_states[:size].copy()),
+            "dones": torch.from_numpy(self.dones[:size].copy()),
+            "position": self.position,
+            "size": size,
+        }
+
+    def load_state_dict(self, state: dict):
+        """
+        Restore the transitions of state_dict.
+        Args:
+            state (dict): A state from state_dict of a buffer with the same number of fields.
+        """
+        size = state["size"]
+        if size > self.capacity:
+            raise ValueError(f"The state has {size} transitions, the capacity is {self.capacity}.")
+        if tuple(state["states"].shape[1:]) != (self.n_fields,):
+            raise ValueError(f"The state has boards of another size than {self.n_fields} fields.")
+        self.clear()
+        self.states[:size] = state["states"].numpy()
+        self.actions[:size] = state["actions"].numpy()
+        self.rewards[:size] = state["rewards"].numpy()
+        self.next_states[:size] = state["next_states"].numpy()
+        self.dones[:size] = state["dones"].numpy()
+        self.size = size
+        self.position = state["position"] % self.capacity
+
+
+class SumTree:
+    """
+    A binary tree where every node holds the sum of its children and the leaves hold priorities.
+    Updating a priority and finding the leaf of a prefix sum both take O(log n), for whole batches at once.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.n_leaves = 1 << max(0, (capacity - 1).bit_length())
+        self.depth = self.n_leaves.bit_length() - 1
+        self.tree = np.zeros(2 * self.n_leaves, dtype=np.float64)  # root at 1, leaf i at n_leaves + i
+
+    def total(self) -> float:
+        """The sum of all priorities."""
+        return float(self.tree[1])
+
+    def get(self, indices: np.ndarray) -> np.ndarray:
+        """Get the priorities of the leaves."""
+        return self.tree[self.n_leaves + np.asarray(indices)]
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray):
+        """
+        Set the priorities of the leaves and recompute the sums on their paths to the root.
+        Args:
+            indices (np.ndarray): The leaves, duplicates keep the last priority.
+            priorities (np.ndarray): The new priorities.
+        """
+        nodes = self.n_leaves + np.asarray(indices)
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def update_one(self, index: int, priority: float):
+        """Set the priority of a single leaf, cheaper than update for one transition."""
+        node = self.n_leaves + index
+        tree = self.tree
+        tree[node] = priority
+        node //= 2
+        while node:
+            tree[node] = tree[2 * node] + tree[2 * node + 1]
+            node //= 2
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """
+        Find the leaves whose prefix sum ranges contain the values.
+        Args:
+            values (np.ndarray): Values between 0 and total().
+        Returns:
+            np.ndarray: The leaf indices.
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sums = self.tree[left]
+            go_right = values > left_sums
+            values = np.where(go_right, values - left_sums, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.n_leaves
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    A replay buffer that samples transitions proportional to their TD error (priority ** alpha).
+    New transitions get the highest priority seen so far, so each is replayed at least once soon.
+    Importance-sampling weights correct the bias of the non-uniform sampling, beta grows to 1.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        n_fields: int = 9,
+        seed: int | None = None,
+        augment: bool = False,
+        alpha: float = 0.6,
+        beta: float = 0.4,
+        beta_increment: float = 0.001,
+        epsilon: float = 0.01,
+    ):
+        """
+        Args:
+            capacity (int): The maximum number of transitions.
+            n_fields (int): The fields of a board, size * size.
+            seed (int | None): The seed of the sampling.
+            augment (bool): Apply a random symmetry transform to every returned transition.
+            alpha (float): How strongly priorities are used, 0 is uniform sampling.
+            beta (float): The initial strength of the importance-sampling correction.
+            beta_increment (float): The growth of beta per sampled batch, up to 1.
+            epsilon (float): Added to the TD errors, so every transition keeps a chance to be sampled.
+        """
+        super().__init__(capacity, n_fields, seed, augment)
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = float(1)
+
+    def add(self, state, action: int, reward: float, next_state, done: bool):
+        position = self.position
+        super().add(state, action, reward, next_state, done)
+        self.tree.update_one(position, self.max_priority)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        n = min(len(actions), self.capacity)
+        slots = (self.position + np.arange(n)) % self.capacity
+        super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(slots, np.full(n, self.max_priority))
+
+    def sample_prioritized(
+        self, batch_size: int
+    ) -> tuple[tuple, torch.Tensor, np.ndarray]:
+        """
+        Draw a batch proportional to the priorities, one transition from each of batch_size equal
+        segments of the total priority.
+        Args:
+            batch_size (int): The number of transitions.
+        Returns:
+            tuple: The batch (states, actions, rewards, next_states, dones), the importance-sampling
+            weights normalized to a maximum of 1, and the slots for update_priorities.
+        """
+        if self.size == 0:
+            raise ValueError("Can't sample from an empty replay buffer.")
+        total = self.tree.total()
+        segment = total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        indices = np.minimum(self.tree.find(values), self.size - 1)
+
+        probabilities = self.tree.get(indices) / total
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(float(1), self.beta + self.beta_increment)
+        return self.get(indices), torch.from_numpy(weights.astype(np.float32)), indices
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray):
+        """
+        Set the priorities of sampled transitions from their new TD errors.
+        Args:
+            indices (np.ndarray): The slots returned by sample_prioritized.
+            td_errors (np.ndarray): The absolute TD errors of the transitions.
+        """
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def clear(self):
+        super().clear()
+        self.tree = SumTree(self.capacity)
+        self.max_priority = float(1)
+
+    def state_dict(self) -> dict:
+        state = super().state_dict()
+        state["priorities"] = torch.from_numpy(self.tree.get(np.arange(self.size)))
+        state["beta"] = self.beta
+        state["max_priority"] = self.max_priority
+        return state
+
+    def load_state_dict(self, state: dict):
+        super().load_state_dict(state)
+        if "priorities" in state:
+            self.tree.update(np.arange(self.size), state["priorities"].numpy())
+            self.beta = state["beta"]
+            self.max_priority = state["max_priority"]
+        else:
+            # Transitions of a uniform buffer are all replayed soon
+            self.tree.update(np.arange(self.size), np.full(self.size, self.max_priority))
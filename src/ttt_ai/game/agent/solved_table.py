@@ -0,0 +1,257 @@
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from ttt_ai.game.bit_board import BOARD_SIZE, WIN_MASKS
+from ttt_ai.game.field import FieldState
+
+N_FIELDS = BOARD_SIZE * BOARD_SIZE
+N_POSITIONS = 3**N_FIELDS  # every field is empty, X or O: 19,683 base-3 indices
+
+MAGIC = b"TTTS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, format version, board size
+
+# Layout of a record (uint32), values are seen from the player to move
+MOVE_MASK_BITS = 0x1FF  # bits 0-8: optimal moves
+DISTANCE_SHIFT = 9  # bits 9-12: plies to the end of the game with optimal play
+DISTANCE_MASK = 0xF
+VALUE_SHIFT = 13  # bits 13-14: value + 1 (0 loss, 1 draw, 2 win)
+
+DEFAULT_TABLE_PATH = (
+    Path(__file__).parent.parent.parent.parent.parent
+    / "assets"
+    / "resources"
+    / "tables"
+    / "solved_3x3.bin"
+)
+
+# Base-3 weight of every 9-bit mask of fields, so a position index costs two lookups
+_BASE3 = tuple(
+    sum(3**i for i in range(N_FIELDS) if bits >> i & 1) for bits in range(1 << N_FIELDS)
+)
+_POWERS_OF_3 = 3 ** np.arange(N_FIELDS)
+
+
+def get_position_index(x_bits: int, o_bits: int) -> int:
+    """
+    Get the base-3 index of a 3x3 position (digit 0 empty, 1 X, 2 O at field i).
+    Args:
+        x_bits (int): The fields occupied by X.
+        o_bits (int): The fields occupied by O.
+    Returns:
+        int: The index between 0 and 19,682.
+    """
+    return _BASE3[x_bits] + 2 * _BASE3[o_bits]
+
+
+def _get_side(player: FieldState) -> int:
+    """Get the table section of the player to move."""
+    if player == FieldState.X:
+        return 0
+    if player == FieldState.O:
+        return 1
+    raise ValueError("The player to move must be X or O.")
+
+
+def _is_winner(bits: int) -> bool:
+    """Check the fields of one player against all win masks."""
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def _solve(own_bits: int, other_bits: int, memo: dict) -> tuple[int, int, int]:
+    """
+    Solve a position with negamax for the player owning own_bits, who is to move.
+    Returns:
+        tuple[int, int, int]: Value (-1, 0, 1), distance to the end and the optimal move mask.
+    """
+    key = (own_bits, other_bits)
+    result = memo.get(key)
+    if result is not None:
+        return result
+
+    occupied = own_bits | other_bits
+    if _is_winner(other_bits):
+        result = (-1, 0, 0)
+    elif _is_winner(own_bits):
+        result = (1, 0, 0)
+    elif occupied == MOVE_MASK_BITS:
+        result = (0, 0, 0)
+    else:
+        best_key = None
+        best = None
+        for index in range(N_FIELDS):
+            bit = 1 << index
+            if occupied & bit:
+                continue
+            child_value, child_distance, _ = _solve(other_bits, own_bits | bit, memo)
+            value = -child_value
+            distance = child_distance + 1
+            # Higher value first, then win fast and lose slow
+            move_key = (value, -distance if value > 0 else distance)
+            if best_key is None or move_key > best_key:
+                best_key = move_key
+                best = (value, distance, bit)
+            elif move_key == best_key:
+                best = (value, distance, best[2] | bit)
+        result = best
+    memo[key] = result
+    return result
+
+
+def generate_solved_table(path: Path | str = DEFAULT_TABLE_PATH) -> Path:
+    """
+    Solve every 3x3 position for both players to move and write the binary table.
+    The file is written to a temporary file first and renamed, so readers never see a partial table.
+    Args:
+        path (Path | str): The file to write.
+    Returns:
+        Path: The path of the written table.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    records = np.zeros((2, N_POSITIONS), dtype="<u4")
+    memo = {}
+    for x_bits in range(1 << N_FIELDS):
+        for o_bits in range(1 << N_FIELDS):
+            if x_bits & o_bits:
+                continue
+            index = get_position_index(x_bits, o_bits)
+            for side, (own_bits, other_bits) in enumerate(
+                [(x_bits, o_bits), (o_bits, x_bits)]
+            ):
+                value, distance, move_mask = _solve(own_bits, other_bits, memo)
+                records[side, index] = (
+                    move_mask
+                    | distance << DISTANCE_SHIFT
+                    | (value + 1) << VALUE_SHIFT
+                )
+
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, BOARD_SIZE))
+        file.write(records.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+class SolvedTable:
+    """
+    Read-only, memory-mapped table of all solved 3x3 positions.
+    Looking up a position is a single array access, the operating system pages the file in.
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_TABLE_PATH):
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION or size != BOARD_SIZE:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a solved table of format {FORMAT_VERSION}.")
+        self.records = np.frombuffer(
+            self._mmap, dtype="<u4", count=2 * N_POSITIONS, offset=HEADER.size
+        ).reshape(2, N_POSITIONS)
+        # Single records are read through a plain memoryview, numpy scalar indexing is slower
+        self._view = (
+            memoryview(self._mmap)[HEADER.size :].cast("I")
+            if sys.byteorder == "little"
+            else None
+        )
+
+    def close(self):
+        """Release the memory map."""
+        self.records = None
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # arrays from label_boards still use it, it is closed once they are gone
+
+    def _get_record(self, side: int, index: int) -> int:
+        if self._view is not None:
+            return self._view[side * N_POSITIONS + index]
+        return int(self.records[side, index])
+
+    def lookup(self, x_bits: int, o_bits: int, player: FieldState) -> tuple[int, int, int]:
+        """
+        Look up a position.
+        Args:
+            x_bits (int): The fields occupied by X.
+            o_bits (int): The fields occupied by O.
+            player (FieldState): The player to move.
+        Returns:
+            tuple[int, int, int]: Value for the player to move (-1 loss, 0 draw, 1 win),
+            plies to the end of the game and the bitmask of optimal moves.
+        """
+        record = self._get_record(_get_side(player), get_position_index(x_bits, o_bits))
+        return (
+            (record >> VALUE_SHIFT) - 1,
+            record >> DISTANCE_SHIFT & DISTANCE_MASK,
+            record & MOVE_MASK_BITS,
+        )
+
+    def get_best_move(self, board, player: FieldState) -> int | None:
+        """
+        Get the optimal move with the lowest index.
+        Args:
+            board: The 3x3 board (Board or its BitBoard engine).
+            player (FieldState): The player to move.
+        Returns:
+            int | None: The flat index of the move, None if the game is over.
+        """
+        bit_board = getattr(board, "bit_board", board)
+        record = self._get_record(
+            _get_side(player), _BASE3[bit_board.x_bits] + 2 * _BASE3[bit_board.o_bits]
+        )
+        move_mask = record & MOVE_MASK_BITS
+        if not move_mask:
+            return None
+        return (move_mask & -move_mask).bit_length() - 1
+
+    def label_boards(self, flat_boards, players) -> np.ndarray:
+        """
+        Get the optimal moves of many flattened boards at once, e.g. as NN training labels.
+        Args:
+            flat_boards: (N, 9) boards in the encoding of Board.flatten() (-1 empty, 0 X, 1 O).
+            players: (N,) players to move, 0 for X and 1 for O as in Board.flatten().
+        Returns:
+            np.ndarray: (N, 9) boolean mask of the optimal moves.
+        """
+        flat_boards = np.asarray(flat_boards)
+        digits = np.where(flat_boards < 0, 0, flat_boards + 1)
+        indices = digits @ _POWERS_OF_3
+        records = self.records[np.asarray(players), indices]
+        return (records[:, None] >> np.arange(N_FIELDS)) & 1 == 1
+
+
+_default_table = None
+
+
+def load_solved_table(path: Path | str | None = None) -> SolvedTable:
+    """
+    Open a solved table, generating the default table first if it does not exist yet.
+    The default table is opened only once per process and shared.
+    Args:
+        path (Path | str | None): The table file, None for the default table.
+    Returns:
+        SolvedTable: The memory-mapped table.
+    """
+    global _default_table
+    if path is not None:
+        return SolvedTable(path)
+    if _default_table is None:
+        if not DEFAULT_TABLE_PATH.exists():
+            print(f"Generating solved table {DEFAULT_TABLE_PATH}...")
+            generate_solved_table(DEFAULT_TABLE_PATH)
+        _default_table = SolvedTable(DEFAULT_TABLE_PATH)
+    return _default_table
@@ -1,7 +1,22 @@
+import numpy as np
 import torch
 import torch.nn as nn
 from torch import optim
 
+EMPTY_FIELD = -1  # value of an empty field in Board.flatten()
+
+
+def mask_illegal_moves(scores: torch.Tensor, boards: torch.Tensor) -> torch.Tensor:
+    """
+    Set the scores of occupied fields to -inf, so max and argmax only see legal moves.
+    Args:
+        scores (torch.Tensor): (n, fields) move scores of the model.
+        boards (torch.Tensor): (n, fields) boards in the encoding of Board.flatten().
+    Returns:
+        torch.Tensor: The masked scores.
+    """
+    return scores.masked_fill(boards != EMPTY_FIELD, float("-inf"))
+
 
 class QTrainer:
     def __init__(self, model, lr, gamma):
@@ -10,6 +25,7 @@ class QTrainer:
         self.model = model
         self.optimizer = optim.Adam(model.parameters(), lr=self.lr)
         self.criterion = nn.MSELoss()
+        self.steps = 0  # training steps, stored in the model files
 
     def train_step(
             self,
@@ -18,11 +34,29 @@ class QTrainer:
             reward_for_move,
             new_board_flattened,
             game_over,
+            weights=None,
     ):
-        old_board_flattened = torch.tensor(old_board_flattened, dtype=torch.float)
-        new_board_flattened = torch.tensor(new_board_flattened, dtype=torch.float)
-        action = torch.tensor(action, dtype=torch.long)
-        reward_for_move = torch.tensor(reward_for_move, dtype=torch.float)
+        """
+        Train the model on one or many transitions towards the Bellman target.
+        Args:
+            old_board_flattened: The boards before the moves.
+            action: The flat indices (or one-hot encodings) of the moves.
+            reward_for_move: The rewards for the moves.
+            new_board_flattened: The boards after the moves.
+            game_over: True where a move ended the game.
+            weights: Optional importance-sampling weights per transition (prioritized replay).
+        Returns:
+            np.ndarray: The absolute TD errors per transition, e.g. as new replay priorities.
+        """
+        # Converting through numpy is much faster than torch.tensor on tuples of lists
+        old_board_flattened = torch.as_tensor(
+            np.asarray(old_board_flattened), dtype=torch.float
+        )
+        new_board_flattened = torch.as_tensor(
+            np.asarray(new_board_flattened), dtype=torch.float
+        )
+        action = torch.as_tensor(np.asarray(action), dtype=torch.long)
+        reward_for_move = torch.as_tensor(np.asarray(reward_for_move), dtype=torch.float)
         # (n, x)
 
         if len(old_board_flattened.shape) == 1:
@@ -36,21 +70,38 @@ class QTrainer:
         # 1: predicted Q values with current state
         pred = self.model(old_board_flattened)
 
-        target = pred.clone()
-        for idx in range(len(game_over)):
-            Q_new = reward_for_move[idx]
-            if not game_over[idx]:
-                Q_new = reward_for_move[idx] + self.gamma * torch.max(
-                    self.model(new_board_flattened[idx])
-                )
+        # 2: Q_new = r + y * max(next_predicted Q value) -> only do this if not done
+        # All next states go through the model in one batched forward pass,
+        # the max only covers the legal moves of the next state
+        dones = torch.as_tensor(game_over, dtype=torch.bool)
+        next_q = mask_illegal_moves(
+            self.model(new_board_flattened), new_board_flattened
+        ).max(dim=1).values
+        # A full board has no legal move, it is always a terminal state
+        next_q = torch.where(torch.isinf(next_q), torch.zeros_like(next_q), next_q)
+        q_new = torch.where(
+            dones, reward_for_move, reward_for_move + self.gamma * next_q
+        )
 
-            target[idx][torch.argmax(action[idx]).item()] = Q_new
+        # 3: preds[action] = Q_new, written for all samples at once
+        if action.dim() > 1:
+            action = torch.argmax(action, dim=1)  # one-hot encoded actions
+        valid = action >= 0  # -1 marks a move that could not be played
+        rows = torch.arange(len(action))[valid]
+        target = pred.clone()
+        target[rows, action[valid]] = q_new[valid]
 
-        # 2: Q_new = r + y * max(next_predicted Q value) -> only do this if not done
-        # pred.clone()
-        # preds[argmax(action)] = Q_new
         self.optimizer.zero_grad()
-        loss = self.criterion(target, pred)
+        if weights is None:
+            loss = self.criterion(target, pred)
+        else:
+            weights = torch.as_tensor(np.asarray(weights), dtype=torch.float).reshape(-1, 1)
+            loss = (weights * (target - pred) ** 2).mean()
         loss.backward()
 
         self.optimizer.step()
+        self.steps += 1
+
+        td_errors = torch.zeros(len(action))
+        td_errors[valid] = (q_new[valid] - pred[rows, action[valid]]).detach().abs()
+        return td_errors.numpy()
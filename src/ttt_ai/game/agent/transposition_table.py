@@ -0,0 +1,67 @@
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 200_000  # roughly 40 MB with tuple keys
+
+
+class TranspositionTable:
+    """
+    A memory-bounded cache of search results with least-recently-used eviction.
+    It lives as long as its agent, so results are reused across moves and games.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("The transposition table needs room for at least 1 entry.")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Look up a stored search result and mark it as recently used.
+        Args:
+            key: The position key, e.g. (board hash, player to move, search parameters).
+        Returns:
+            The stored value, or None if the key is unknown.
+        """
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Store a search result, evicting the least recently used entry if the table is full.
+        Args:
+            key: The position key.
+            value: The search result, must not be None.
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_hit_rate(self) -> float:
+        """Calculate the share of lookups answered from the table."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else float(0)
+
+    def get_stats(self) -> str:
+        """Get the counters as printable text."""
+        return f"tt size: {len(self)}/{self.max_entries}, hits: {self.hits}, misses: {self.misses}, evictions: {self.evictions}, hit rate: {self.get_hit_rate():.0%}"
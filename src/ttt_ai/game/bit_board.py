@@ -0,0 +1,334 @@
+import random
+from functools import lru_cache
+
+from ttt_ai.game.field import FieldState
+
+BOARD_SIZE = 3
+FULL_MASK = (1 << (BOARD_SIZE * BOARD_SIZE)) - 1
+
+# Bit i of a mask corresponds to the flat index i of the board (row * 3 + col).
+WIN_MASKS = (
+    0b000000111,  # row 0
+    0b000111000,  # row 1
+    0b111000000,  # row 2
+    0b001001001,  # column 0
+    0b010010010,  # column 1
+    0b100100100,  # column 2
+    0b100010001,  # main diagonal
+    0b001010100,  # anti-diagonal
+)
+
+ZOBRIST_SEED = 0x7177  # fixed, so hashes are stable between runs and processes
+
+# Directions of a line: row, column, main diagonal and anti-diagonal
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+@lru_cache(maxsize=None)
+def get_win_masks(size: int, win_length: int) -> tuple[int, ...]:
+    """
+    Get the masks of all lines of win_length fields on a size x size board.
+    Args:
+        size (int): The number of rows and columns.
+        win_length (int): The number of fields in a row needed to win.
+    Returns:
+        tuple[int, ...]: The line masks, bit i corresponds to flat index i.
+    """
+    if size == BOARD_SIZE and win_length == BOARD_SIZE:
+        return WIN_MASKS
+    masks = []
+    for row in range(size):
+        for col in range(size):
+            for d_row, d_col in LINE_DIRECTIONS:
+                end_row = row + d_row * (win_length - 1)
+                end_col = col + d_col * (win_length - 1)
+                if 0 <= end_row < size and 0 <= end_col < size:
+                    mask = 0
+                    for step in range(win_length):
+                        mask |= 1 << ((row + d_row * step) * size + col + d_col * step)
+                    masks.append(mask)
+    return tuple(masks)
+
+
+@lru_cache(maxsize=None)
+def get_lines_through_index(size: int, win_length: int) -> tuple[tuple[int, ...], ...]:
+    """
+    Get the win masks passing through each field, only these can be completed by a move there.
+    A field is part of at most 4 * win_length lines, so a move is checked in O(win_length).
+    Args:
+        size (int): The number of rows and columns.
+        win_length (int): The number of fields in a row needed to win.
+    Returns:
+        tuple[tuple[int, ...], ...]: The masks through each flat index.
+    """
+    win_masks = get_win_masks(size, win_length)
+    return tuple(
+        tuple(mask for mask in win_masks if mask >> index & 1)
+        for index in range(size * size)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(n_fields: int) -> tuple[tuple[int, int], ...]:
+    """
+    Get the random 64-bit Zobrist keys of a board.
+    Args:
+        n_fields (int): The number of fields of the board.
+    Returns:
+        tuple[tuple[int, int], ...]: The (X key, O key) of each flat index.
+    """
+    rng = random.Random(ZOBRIST_SEED)
+    return tuple((rng.getrandbits(64), rng.getrandbits(64)) for _ in range(n_fields))
+
+
+class BitBoard:
+    """
+    A compact board engine storing the X and O fields as two integers of size * size bits,
+    9 bits for the default 3x3 board.
+    Bit i of x_bits / o_bits is set if the field with flat index i is occupied by X / O.
+    The number of empty fields, the winner and a 64-bit Zobrist hash of the position are
+    updated incrementally on every change.
+    """
+
+    __slots__ = (
+        "x_bits",
+        "o_bits",
+        "size",
+        "win_length",
+        "n_fields",
+        "full_mask",
+        "win_masks",
+        "lines_through_index",
+        "zobrist_keys",
+        "zobrist_hash",
+        "empty_count",
+        "winner",
+        "move_stack",
+    )
+
+    def __init__(
+        self,
+        x_bits: int = 0,
+        o_bits: int = 0,
+        size: int = BOARD_SIZE,
+        win_length: int | None = None,
+    ):
+        if win_length is None:
+            win_length = size
+        if size < 1 or not (1 <= win_length <= size):
+            raise ValueError("Win length must be between 1 and the board size.")
+        self.x_bits = x_bits
+        self.o_bits = o_bits
+        self.size = size
+        self.win_length = win_length
+        self.n_fields = size * size
+        self.full_mask = (1 << self.n_fields) - 1
+        self.win_masks = get_win_masks(size, win_length)
+        self.lines_through_index = get_lines_through_index(size, win_length)
+        self.zobrist_keys = get_zobrist_keys(self.n_fields)
+        self.zobrist_hash = self._compute_hash()
+        self.empty_count = self.n_fields - (x_bits | o_bits).bit_count()
+        self.winner = self._find_winner()
+        self.move_stack = []
+
+    def reset(self):
+        """
+        Reset the board to its initial state with all fields empty.
+        """
+        self.x_bits = 0
+        self.o_bits = 0
+        self.zobrist_hash = 0
+        self.empty_count = self.n_fields
+        self.winner = None
+        self.move_stack.clear()
+
+    def _compute_hash(self) -> int:
+        """Compute the Zobrist hash of the position from scratch."""
+        zobrist_hash = 0
+        for index, (x_key, o_key) in enumerate(self.zobrist_keys):
+            if self.x_bits >> index & 1:
+                zobrist_hash ^= x_key
+            elif self.o_bits >> index & 1:
+                zobrist_hash ^= o_key
+        return zobrist_hash
+
+    def _find_winner(self) -> FieldState | None:
+        """Scan all win masks for a winner."""
+        if self.is_winner(FieldState.X):
+            return FieldState.X
+        if self.is_winner(FieldState.O):
+            return FieldState.O
+        return None
+
+    def _is_winning_move(self, index: int, bits: int) -> bool:
+        """Check only the lines through the field of the last move."""
+        for mask in self.lines_through_index[index]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def get_state(self, index: int) -> FieldState:
+        """
+        Get the state of a field by its flat index.
+        Args:
+            index (int): The index in the flattened array.
+        Returns:
+            FieldState: The state of the field.
+        """
+        bit = 1 << index
+        if self.x_bits & bit:
+            return FieldState.X
+        if self.o_bits & bit:
+            return FieldState.O
+        return FieldState.EMPTY
+
+    def set_state(self, index: int, state: FieldState):
+        """
+        Set the state of a field by its flat index.
+        Args:
+            index (int): The index in the flattened array.
+            state (FieldState): The new state of the field.
+        """
+        if not isinstance(state, FieldState):
+            raise TypeError("state must be an instance of FieldState.")
+        previous_state = self.get_state(index)
+        if previous_state == state:
+            return
+        bit = 1 << index
+        x_key, o_key = self.zobrist_keys[index]
+        if previous_state == FieldState.EMPTY:
+            self.empty_count -= 1
+        else:
+            self.x_bits &= ~bit
+            self.o_bits &= ~bit
+            self.zobrist_hash ^= x_key if previous_state == FieldState.X else o_key
+        if state == FieldState.EMPTY:
+            self.empty_count += 1
+        elif state == FieldState.X:
+            self.x_bits |= bit
+            self.zobrist_hash ^= x_key
+        else:
+            self.o_bits |= bit
+            self.zobrist_hash ^= o_key
+
+        if self.winner is not None and previous_state == self.winner:
+            # A field of the winner was removed, the line may be broken
+            self.winner = self._find_winner()
+        elif self.winner is None and state != FieldState.EMPTY:
+            if self._is_winning_move(index, self.get_bits(state)):
+                self.winner = state
+
+    def push(self, index: int, state: FieldState):
+        """
+        Make a move on an empty field, it can be taken back with pop().
+        Args:
+            index (int): The flat index of the field.
+            state (FieldState): The player making the move (X or O).
+        """
+        bit = 1 << index
+        if (self.x_bits | self.o_bits) & bit:
+            raise ValueError(f"Field {index} is not empty.")
+        if state == FieldState.X:
+            self.x_bits |= bit
+            bits = self.x_bits
+            self.zobrist_hash ^= self.zobrist_keys[index][0]
+        elif state == FieldState.O:
+            self.o_bits |= bit
+            bits = self.o_bits
+            self.zobrist_hash ^= self.zobrist_keys[index][1]
+        else:
+            raise ValueError("Only X or O can make a move.")
+        self.move_stack.append((index, self.winner))
+        self.empty_count -= 1
+        if self.winner is None and self._is_winning_move(index, bits):
+            self.winner = state
+
+    def pop(self) -> int:
+        """
+        Take back the last move made with push().
+        Returns:
+            int: The flat index of the field that was cleared.
+        """
+        index, self.winner = self.move_stack.pop()
+        bit = 1 << index
+        x_key, o_key = self.zobrist_keys[index]
+        self.zobrist_hash ^= x_key if self.x_bits & bit else o_key
+        self.x_bits &= ~bit
+        self.o_bits &= ~bit
+        self.empty_count += 1
+        return index
+
+    def get_bits(self, player: FieldState) -> int:
+        """Get the bitmask of the fields occupied by the player."""
+        if player == FieldState.X:
+            return self.x_bits
+        if player == FieldState.O:
+            return self.o_bits
+        return 0
+
+    def get_player_to_move(self) -> FieldState:
+        """Get the player to move, assuming X made the first move."""
+        if self.x_bits.bit_count() <= self.o_bits.bit_count():
+            return FieldState.X
+        return FieldState.O
+
+    def occupied_mask(self) -> int:
+        """Get the bitmask of all occupied fields."""
+        return self.x_bits | self.o_bits
+
+    def empty_mask(self) -> int:
+        """Get the bitmask of all empty fields."""
+        return ~(self.x_bits | self.o_bits) & self.full_mask
+
+    def empty_indices(self) -> list[int]:
+        """
+        Get the flat indices of all empty fields in ascending order.
+        Returns:
+            list[int]: The indices of the empty fields.
+        """
+        indices = []
+        mask = self.empty_mask()
+        while mask:
+            lowest_bit = mask & -mask
+            indices.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+        return indices
+
+    def is_empty(self) -> bool:
+        """Check if no field is occupied."""
+        return self.empty_count == self.n_fields
+
+    def is_full(self) -> bool:
+        """Check if all fields are occupied."""
+        return self.empty_count == 0
+
+    def is_winner(self, player: FieldState) -> bool:
+        """
+        Check if the specified player has won.
+        Args:
+            player (FieldState): The player to check for a win (X or O).
+        Returns:
+            bool: True if the player has won, False otherwise.
+        """
+        bits = self.get_bits(player)
+        if not bits:
+            return False
+        for mask in self.win_masks:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def is_game_over(self) -> bool:
+        """Check if a player has won or the board is full."""
+        return self.empty_count == 0 or self.winner is not None
+
+    def flatten(self) -> list[int]:
+        """
+        Flatten the board into the numeric representation used by the agents.
+        Returns:
+            list[int]: -1 for empty, 0 for X and 1 for O fields.
+        """
+        return [
+            0 if self.x_bits >> i & 1 else 1 if self.o_bits >> i & 1 else -1
+            for i in range(self.n_fields)
+        ]
@@ -1,22 +1,49 @@
 import random
 from dataclasses import dataclass
 
+from ttt_ai.game.bit_board import BOARD_SIZE, BitBoard
 from ttt_ai.game.field import Field, FieldState
 
 
 @dataclass
 class Board:
-    def __init__(self):
-        # Assuming a 3x3 board with empty fields initialized
-        self.BOARD_SIZE = 3
+    def __init__(self, size: int = BOARD_SIZE, win_length: int | None = None):
+        """
+        Create a size x size board with empty fields initialized.
+        Args:
+            size (int): The number of rows and columns, 3 by default.
+            win_length (int | None): The number of fields in a row needed to win, defaults to size.
+        """
+        self.BOARD_SIZE = size
+        # The bitboard is the engine behind all status checks, the fields are kept as view
+        self.bit_board = BitBoard(size=size, win_length=win_length)
+        self.WIN_LENGTH = self.bit_board.win_length
         self.fields = [
             [Field() for _ in range(self.BOARD_SIZE)] for _ in range(self.BOARD_SIZE)
         ]
+        for row in range(self.BOARD_SIZE):
+            for col in range(self.BOARD_SIZE):
+                self.fields[row][col].bind(self, self.get_flat_index(row, col))
 
     def __setitem__(self, key, value):
         row, col = key
+        index = self.get_flat_index(row, col)
+        self.bit_board.set_state(index, value.state)
+        replaced = self.fields[row][col]
+        if replaced is not value:
+            replaced.unbind()  # a stale reference must not write to the bitboard
+        value.bind(self, index)
         self.fields[row][col] = value
 
+    def _on_field_state_change(self, index: int, state: FieldState):
+        """
+        Called by a bound field before its state changes to keep the bitboard in sync.
+        Args:
+            index (int): The flat index of the changed field.
+            state (FieldState): The new state of the field.
+        """
+        self.bit_board.set_state(index, state)
+
     def __getitem__(self, key):
         row, col = key
         return self.fields[row][col]
@@ -25,22 +52,66 @@ class Board:
         """
         Reset the board to its initial state with all fields empty.
         """
+        self.bit_board.reset()
         for row in range(self.BOARD_SIZE):
             for col in range(self.BOARD_SIZE):
                 self.fields[row][col].state = FieldState.EMPTY
 
+    def push(self, index: int, state: FieldState | None = None):
+        """
+        Make a move on an empty field. The move can be taken back with pop().
+        Args:
+            index (int): The flat index of the field.
+            state (FieldState | None): The player making the move, defaults to the player to move.
+        """
+        field = self.get_field_by_flat_index(index)
+        if state is None:
+            state = self.bit_board.get_player_to_move()
+        self.bit_board.push(index, state)
+        # The bitboard is already up to date, so the field notification is a no-op
+        field.state = state
+
+    def pop(self) -> int:
+        """
+        Take back the last move made with push().
+        Returns:
+            int: The flat index of the field that was cleared.
+        """
+        index = self.bit_board.pop()
+        self.get_field_by_flat_index(index).state = FieldState.EMPTY
+        return index
+
+    def get_winner(self) -> FieldState | None:
+        """
+        Get the cached winner of the board.
+        Returns:
+            FieldState | None: The winning player, or None if nobody has won.
+        """
+        return self.bit_board.winner
+
+    def get_hash(self) -> int:
+        """
+        Get the 64-bit Zobrist hash of the position, e.g. as key for caches and tables.
+        Returns:
+            int: The hash, updated in O(1) on every field state change.
+        """
+        return self.bit_board.zobrist_hash
+
+    def get_player_to_move(self) -> FieldState:
+        """
+        Get the player to move, assuming X made the first move.
+        Returns:
+            FieldState: X or O.
+        """
+        return self.bit_board.get_player_to_move()
+
     def get_flat_index_of_radom_free_field(self) -> int | None:
         """
         Get the index of a random free field in the flattened board.
         Returns:
             int: The index of a random free field, or None if no free fields are available.
         """
-        free_fields = [
-            self.get_flat_index(row, col)
-            for row in range(self.BOARD_SIZE)
-            for col in range(self.BOARD_SIZE)
-            if self.fields[row][col].state == FieldState.EMPTY
-        ]
+        free_fields = self.bit_board.empty_indices()
         if not free_fields:
             return None
         return random.choice(free_fields)
@@ -49,25 +120,29 @@ class Board:
         """
         Get the index of a field if the board is flattened into a 1D array.
         Args:
-            row (int): The row index (0, 1, or 2).
-            col (int): The column index (0, 1, or 2).
+            row (int): The row index (0 to BOARD_SIZE - 1).
+            col (int): The column index (0 to BOARD_SIZE - 1).
         Returns:
             int: The index in the flattened array.
         """
         if not (0 <= row < self.BOARD_SIZE) or not (0 <= col < self.BOARD_SIZE):
-            raise ValueError("Row and column indices must be between 0 and 2.")
+            raise ValueError(
+                f"Row and column indices must be between 0 and {self.BOARD_SIZE - 1}."
+            )
         return row * self.BOARD_SIZE + col
 
     def get_field_by_flat_index(self, index: int) -> Field:
         """
-        Get the field from the board using a flattened index (0-8).
+        Get the field from the board using a flattened index (0 to BOARD_SIZE * BOARD_SIZE - 1).
         Args:
             index (int): The index in the flattened array.
         Returns:
             Field: The field at the specified index.
         """
         if not (0 <= index < self.BOARD_SIZE * self.BOARD_SIZE):
-            raise ValueError("Index must be between 0 and 8.")
+            raise ValueError(
+                f"Index must be between 0 and {self.BOARD_SIZE * self.BOARD_SIZE - 1}."
+            )
         row = index // self.BOARD_SIZE
         col = index % self.BOARD_SIZE
         return self.fields[row][col]
@@ -76,24 +151,26 @@ class Board:
         """
         Get a specific row from the board.
         Args:
-            row (int): The row index (0, 1, or 2).
+            row (int): The row index (0 to BOARD_SIZE - 1).
         Returns:
             list[Field]: The specified row of fields.
         """
-        if not (0 <= row < 3):
-            raise ValueError("Row index must be between 0 and 2.")
+        if not (0 <= row < self.BOARD_SIZE):
+            raise ValueError(f"Row index must be between 0 and {self.BOARD_SIZE - 1}.")
         return self.fields[row]
 
     def get_column(self, col: int):
         """
         Get a specific column from the board.
         Args:
-            col (int): The column index (0, 1, or 2).
+            col (int): The column index (0 to BOARD_SIZE - 1).
         Returns:
             list[Field]: The specified column of fields.
         """
         if not (0 <= col < self.BOARD_SIZE):
-            raise ValueError("Column index must be between 0 and 2.")
+            raise ValueError(
+                f"Column index must be between 0 and {self.BOARD_SIZE - 1}."
+            )
         return [self.fields[row][col] for row in range(self.BOARD_SIZE)]
 
     def get_diagonal(self, diagonal: int):
@@ -107,7 +184,9 @@ class Board:
         if diagonal == 0:
             return [self.fields[i][i] for i in range(self.BOARD_SIZE)]
         elif diagonal == 1:
-            return [self.fields[i][2 - i] for i in range(self.BOARD_SIZE)]
+            return [
+                self.fields[i][self.BOARD_SIZE - 1 - i] for i in range(self.BOARD_SIZE)
+            ]
         else:
             raise ValueError(
                 "Diagonal index must be 0 (main diagonal) or 1 (anti-diagonal)."
@@ -119,9 +198,7 @@ class Board:
         Returns:
             bool: True if the board is empty, False otherwise.
         """
-        return all(
-            field.state == FieldState.EMPTY for row in self.fields for field in row
-        )
+        return self.bit_board.is_empty()
 
     def is_board_full(self) -> bool:
         """
@@ -129,9 +206,7 @@ class Board:
         Returns:
             bool: True if the board is full, False otherwise.
         """
-        return all(
-            field.state != FieldState.EMPTY for row in self.fields for field in row
-        )
+        return self.bit_board.is_full()
 
     def is_game_over(self) -> bool:
         """
@@ -139,11 +214,7 @@ class Board:
         Returns:
             bool: True if the game is over, False otherwise.
         """
-        return (
-            self.is_board_full()
-            or self.is_winner(FieldState.X)
-            or self.is_winner(FieldState.O)
-        )
+        return self.bit_board.is_game_over()
 
     def is_winner(self, player: FieldState) -> bool:
         """
@@ -155,36 +226,18 @@ class Board:
         """
         if not isinstance(player, FieldState):
             raise TypeError("player must be an instance of FieldState.")
-        # Check rows, columns, and diagonals
-        for i in range(self.BOARD_SIZE):
-            row = self.get_row(i)
-            col = self.get_column(i)
-            for field in row + col:
-                if not isinstance(field.state, FieldState):
-                    raise TypeError("All field states must be instances of FieldState.")
-            if all(field.state == player for field in row):
-                return True
-            if all(field.state == player for field in col):
-                return True
-        diag_main = self.get_diagonal(0)
-        diag_anti = self.get_diagonal(1)
-        for field in diag_main + diag_anti:
-            if not isinstance(field.state, FieldState):
-                raise TypeError("All field states must be instances of FieldState.")
-        if all(field.state == player for field in diag_main):
-            return True
-        if all(field.state == player for field in diag_anti):
-            return True
-        return False
+        # Rows, columns and diagonals are checked against the precomputed win masks
+        return self.bit_board.is_winner(player)
 
     def print_board(self):
         """
         Print the board in a readable format.
         """
-        print("-" * 9)
+        separator = "-" * (4 * self.BOARD_SIZE - 3)
+        print(separator)
         for row in self.fields:
             print(" | ".join(field.state.value for field in row))
-            print("-" * 9)
+            print(separator)
 
     def flatten(self):
         """
@@ -192,5 +245,4 @@ class Board:
         Returns:
             list[FieldState]: A flattened list of field states.
         """
-        state_map = {"-": -1, "X": 0, "O": 1}
-        return [state_map[field.state.value] for row in self.fields for field in row]
+        return self.bit_board.flatten()
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import StrEnum
 
 from pyautogui import Point
@@ -14,3 +14,28 @@ class FieldState(StrEnum):
 class Field:
     location: Point = None
     state: FieldState = FieldState.EMPTY
+    _board: object = field(default=None, init=False, repr=False, compare=False)
+    _index: int = field(default=-1, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        # Keep the owning board engine in sync with every state change
+        if name == "state":
+            board = getattr(self, "_board", None)
+            if board is not None:
+                board._on_field_state_change(self._index, value)
+        object.__setattr__(self, name, value)
+
+    def bind(self, board, index: int):
+        """
+        Bind the field to a board so that state changes are propagated to it.
+        Args:
+            board: The board owning this field.
+            index (int): The flat index of the field on the board.
+        """
+        object.__setattr__(self, "_board", board)
+        object.__setattr__(self, "_index", index)
+
+    def unbind(self):
+        """Detach the field from its board, later state changes no longer reach the board."""
+        object.__setattr__(self, "_board", None)
+        object.__setattr__(self, "_index", -1)
@@ -337,7 +337,7 @@ class GameInfo:
                     for idx, location in enumerate(list_of_field_locations):
                         if idx > 0 and idx % 3 == 0:
                             row += 1
-                        self.board.fields[row][idx % 3] = Field(location)
+                        self.board[row, idx % 3] = Field(location)
 
                     print("Field locations reset successfully.")
                     return True
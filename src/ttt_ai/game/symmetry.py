@@ -0,0 +1,263 @@
+from functools import lru_cache
+
+import numpy as np
+
+from ttt_ai.game.bit_board import BOARD_SIZE
+
+N_TRANSFORMS = 8
+
+# The 8 symmetries of the square (D4) as mapping of a field (row, col) to its new position
+_TRANSFORMS = (
+    lambda row, col, n: (row, col),  # identity
+    lambda row, col, n: (col, n - 1 - row),  # rotate 90 degrees clockwise
+    lambda row, col, n: (n - 1 - row, n - 1 - col),  # rotate 180 degrees
+    lambda row, col, n: (n - 1 - col, row),  # rotate 270 degrees clockwise
+    lambda row, col, n: (row, n - 1 - col),  # mirror left/right
+    lambda row, col, n: (n - 1 - row, col),  # mirror top/bottom
+    lambda row, col, n: (col, row),  # mirror on the main diagonal
+    lambda row, col, n: (n - 1 - col, n - 1 - row),  # mirror on the anti-diagonal
+)
+
+# Transform that undoes transform t: the rotations by 90 and 270 degrees undo each other
+INVERSE_TRANSFORM = (0, 3, 2, 1, 4, 5, 6, 7)
+
+
+@lru_cache(maxsize=None)
+def get_move_tables(size: int = BOARD_SIZE) -> tuple[tuple[int, ...], ...]:
+    """
+    Get the forward permutation tables: table[t][i] is the new flat index of field i under transform t.
+    Args:
+        size (int): The number of rows and columns of the board.
+    Returns:
+        tuple[tuple[int, ...], ...]: One table per transform.
+    """
+    return tuple(
+        tuple(
+            new_row * size + new_col
+            for new_row, new_col in (
+                transform(index // size, index % size, size)
+                for index in range(size * size)
+            )
+        )
+        for transform in _TRANSFORMS
+    )
+
+
+@lru_cache(maxsize=None)
+def get_permutation_tables(size: int = BOARD_SIZE) -> tuple[tuple[int, ...], ...]:
+    """
+    Get the gather permutation tables: the transformed board is [board[i] for i in table[t]].
+    Args:
+        size (int): The number of rows and columns of the board.
+    Returns:
+        tuple[tuple[int, ...], ...]: One table per transform.
+    """
+    tables = []
+    for move_table in get_move_tables(size):
+        gather = [0] * (size * size)
+        for index, new_index in enumerate(move_table):
+            gather[new_index] = index
+        tables.append(tuple(gather))
+    return tuple(tables)
+
+
+@lru_cache(maxsize=None)
+def _get_bit_tables(size: int) -> tuple[tuple[int, ...], ...]:
+    """Get tables mapping every bitmask of a small board to its transformed bitmask."""
+    move_tables = get_move_tables(size)
+    n_fields = size * size
+    return tuple(
+        tuple(
+            sum(1 << move_table[i] for i in range(n_fields) if bits >> i & 1)
+            for bits in range(1 << n_fields)
+        )
+        for move_table in move_tables
+    )
+
+
+def transform_board(flat_board, transform: int, size: int = BOARD_SIZE) -> list:
+    """
+    Apply a symmetry transform to a flattened board (see Board.flatten()).
+    Args:
+        flat_board: The field values in flat index order.
+        transform (int): The transform id (0-7).
+        size (int): The number of rows and columns of the board.
+    Returns:
+        list: The transformed field values.
+    """
+    return [flat_board[i] for i in get_permutation_tables(size)[transform]]
+
+
+def transform_bits(bits: int, transform: int, size: int = BOARD_SIZE) -> int:
+    """
+    Apply a symmetry transform to a bitmask of fields (e.g. BitBoard.x_bits).
+    Args:
+        bits (int): The bitmask, bit i corresponds to flat index i.
+        transform (int): The transform id (0-7).
+        size (int): The number of rows and columns of the board.
+    Returns:
+        int: The transformed bitmask.
+    """
+    if size == BOARD_SIZE:
+        # 3x3 boards have only 512 bitmasks, so each transform is a single lookup
+        return _get_bit_tables(size)[transform][bits]
+    move_table = get_move_tables(size)[transform]
+    result = 0
+    while bits:
+        lowest_bit = bits & -bits
+        result |= 1 << move_table[lowest_bit.bit_length() - 1]
+        bits ^= lowest_bit
+    return result
+
+
+def canonicalize(flat_board, size: int = BOARD_SIZE) -> tuple[tuple, int]:
+    """
+    Map a flattened board to the canonical (lexicographically smallest) board of its symmetry group.
+    Args:
+        flat_board: The field values in flat index order, e.g. from Board.flatten().
+        size (int): The number of rows and columns of the board.
+    Returns:
+        tuple[tuple, int]: The canonical board and the transform mapping the board onto it.
+    """
+    best_board = None
+    best_transform = 0
+    for transform, table in enumerate(get_permutation_tables(size)):
+        candidate = tuple(flat_board[i] for i in table)
+        if best_board is None or candidate < best_board:
+            best_board = candidate
+            best_transform = transform
+    return best_board, best_transform
+
+
+def canonicalize_bits(
+    x_bits: int, o_bits: int, size: int = BOARD_SIZE
+) -> tuple[int, int, int]:
+    """
+    Map a bitboard to the canonical (smallest (x_bits, o_bits)) bitboard of its symmetry group.
+    Args:
+        x_bits (int): The fields occupied by X.
+        o_bits (int): The fields occupied by O.
+        size (int): The number of rows and columns of the board.
+    Returns:
+        tuple[int, int, int]: The canonical x_bits, o_bits and the transform mapping the board onto it.
+    """
+    best = (x_bits, o_bits)
+    best_transform = 0
+    for transform in range(1, N_TRANSFORMS):
+        candidate = (
+            transform_bits(x_bits, transform, size),
+            transform_bits(o_bits, transform, size),
+        )
+        if candidate < best:
+            best = candidate
+            best_transform = transform
+    return best[0], best[1], best_transform
+
+
+def to_canonical_move(move: int, transform: int, size: int = BOARD_SIZE) -> int:
+    """
+    Map a move on the original board to the canonical board.
+    Args:
+        move (int): The flat index on the original board.
+        transform (int): The transform returned by canonicalize / canonicalize_bits.
+        size (int): The number of rows and columns of the board.
+    Returns:
+        int: The flat index on the canonical board.
+    """
+    return get_move_tables(size)[transform][move]
+
+
+def from_canonical_move(move: int, transform: int, size: int = BOARD_SIZE) -> int:
+    """
+    Map a move on the canonical board back to the original board.
+    Args:
+        move (int): The flat index on the canonical board.
+        transform (int): The transform returned by canonicalize / canonicalize_bits.
+        size (int): The number of rows and columns of the board.
+    Returns:
+        int: The flat index on the original board.
+    """
+    return get_permutation_tables(size)[transform][move]
+
+
+@lru_cache(maxsize=None)
+def get_transform_arrays(size: int = BOARD_SIZE) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the permutation and move tables as arrays, for transforming whole batches with fancy indexing.
+    Args:
+        size (int): The number of rows and columns of the board.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The (8, size * size) gather tables (see get_permutation_tables)
+        and move tables (see get_move_tables).
+    """
+    return (
+        np.array(get_permutation_tables(size), dtype=np.intp),
+        np.array(get_move_tables(size), dtype=np.intp),
+    )
+
+
+def transform_transitions(
+    states: np.ndarray,
+    actions: np.ndarray,
+    next_states: np.ndarray,
+    transforms: np.ndarray,
+    size: int = BOARD_SIZE,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Apply a symmetry transform to every transition of a batch, boards and moves together.
+    Rewards and game over flags don't change under symmetry.
+    Args:
+        states (np.ndarray): (N, size * size) boards before the moves.
+        actions (np.ndarray): (N,) flat indices of the moves, negative for no move.
+        next_states (np.ndarray): (N, size * size) boards after the moves.
+        transforms (np.ndarray): (N,) transform ids (0-7), one per transition.
+        size (int): The number of rows and columns of the board.
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The transformed states, actions and next_states.
+    """
+    gather_tables, move_tables = get_transform_arrays(size)
+    gather = gather_tables[transforms]
+    actions = np.asarray(actions)
+    played = actions >= 0
+    new_actions = np.where(
+        played, move_tables[transforms, np.where(played, actions, 0)], actions
+    ).astype(actions.dtype)
+    return (
+        np.take_along_axis(np.asarray(states), gather, axis=1),
+        new_actions,
+        np.take_along_axis(np.asarray(next_states), gather, axis=1),
+    )
+
+
+def expand_symmetries(
+    states, actions, rewards, next_states, dones, size: int = BOARD_SIZE
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get all 8 symmetric variants of a batch of transitions, e.g. to insert them into a replay buffer.
+    Equal variants of symmetric boards are kept, they keep the weight of the board in the batch.
+    Args:
+        states: (N, size * size) boards before the moves.
+        actions: (N,) flat indices of the moves.
+        rewards: (N,) rewards for the moves.
+        next_states: (N, size * size) boards after the moves.
+        dones: (N,) True where a move ended the game.
+        size (int): The number of rows and columns of the board.
+    Returns:
+        tuple: states, actions, rewards, next_states and dones with 8 * N rows, transform by transform.
+    """
+    n = len(actions)
+    transforms = np.repeat(np.arange(N_TRANSFORMS), n)
+    new_states, new_actions, new_next_states = transform_transitions(
+        np.tile(np.asarray(states), (N_TRANSFORMS, 1)),
+        np.tile(np.asarray(actions), N_TRANSFORMS),
+        np.tile(np.asarray(next_states), (N_TRANSFORMS, 1)),
+        transforms,
+        size,
+    )
+    return (
+        new_states,
+        new_actions,
+        np.tile(np.asarray(rewards), N_TRANSFORMS),
+        new_next_states,
+        np.tile(np.asarray(dones), N_TRANSFORMS),
+    )
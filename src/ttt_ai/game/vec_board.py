@@ -0,0 +1,198 @@
+from functools import lru_cache
+
+import numpy as np
+
+from ttt_ai.game.bit_board import BOARD_SIZE, get_win_masks
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+
+EMPTY = 0
+X = 1
+O = -1
+
+
+@lru_cache(maxsize=None)
+def get_line_incidence(size: int, win_length: int) -> np.ndarray:
+    """
+    Get the line-incidence matrix (lines x fields) of a board.
+    Entry [l, i] is 1 if field i is part of line l.
+    Args:
+        size (int): The number of rows and columns.
+        win_length (int): The number of fields in a row needed to win.
+    Returns:
+        np.ndarray: The int8 incidence matrix.
+    """
+    return np.array(
+        [
+            [(mask >> i) & 1 for i in range(size * size)]
+            for mask in get_win_masks(size, win_length)
+        ],
+        dtype=np.int8,
+    )
+
+
+LINE_INCIDENCE = get_line_incidence(BOARD_SIZE, BOARD_SIZE)
+
+# Maps the cell codes (0 empty, 1 X, -1 O) to the agent encoding of Board.flatten()
+_FLATTEN_LOOKUP = np.array([-1, 0, 1], dtype=np.int8)
+
+_STATE_TO_CODE = {FieldState.EMPTY: EMPTY, FieldState.X: X, FieldState.O: O}
+_CODE_TO_STATE = {code: state for state, code in _STATE_TO_CODE.items()}
+
+
+def player_code(player: FieldState) -> int:
+    """
+    Get the cell code used by VecBoard for a field state.
+    Args:
+        player (FieldState): The field state.
+    Returns:
+        int: 1 for X, -1 for O and 0 for empty.
+    """
+    return _STATE_TO_CODE[player]
+
+
+class VecBoard:
+    """
+    A batch of B Tic Tac Toe boards stored as a (B, size * size) int8 array, (B, 9) by default.
+    Cells hold 0 for empty, 1 for X and -1 for O. X always starts a game.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        auto_reset: bool = True,
+        seed: int | None = None,
+        size: int = BOARD_SIZE,
+        win_length: int | None = None,
+    ):
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1.")
+        if win_length is None:
+            win_length = size
+        self.batch_size = batch_size
+        self.auto_reset = auto_reset
+        self.size = size
+        self.win_length = win_length
+        self.n_fields = size * size
+        # Transposed once, so the line sums are a single matrix product per step
+        self.line_incidence_t = np.ascontiguousarray(
+            get_line_incidence(size, win_length).T
+        )
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((batch_size, self.n_fields), dtype=np.int8)
+        self.current_player = np.full(batch_size, X, dtype=np.int8)
+        self.games_finished = 0
+
+    def reset(self, rows: np.ndarray | None = None):
+        """
+        Reset all boards, or only the selected ones, to the initial state.
+        Args:
+            rows (np.ndarray | None): Boolean mask or indices of the boards to reset.
+        """
+        if rows is None:
+            self.boards.fill(EMPTY)
+            self.current_player.fill(X)
+        else:
+            self.boards[rows] = EMPTY
+            self.current_player[rows] = X
+
+    def legal_move_mask(self) -> np.ndarray:
+        """
+        Get the legal moves of all boards.
+        Returns:
+            np.ndarray: (B, n_fields) boolean mask, True where the field is empty.
+        """
+        return self.boards == EMPTY
+
+    def line_sums(self) -> np.ndarray:
+        """
+        Get the sum of the cell codes on every line of every board.
+        Returns:
+            np.ndarray: (B, n_lines) array, win_length for a line of X and -win_length for O.
+        """
+        return self.boards @ self.line_incidence_t
+
+    def get_winners(self) -> np.ndarray:
+        """
+        Get the winner of every board.
+        Returns:
+            np.ndarray: (B,) int8 array with 1 for X, -1 for O and 0 for no winner.
+        """
+        sums = self.line_sums()
+        x_won = (sums == self.win_length * X).any(axis=1)
+        o_won = (sums == self.win_length * O).any(axis=1)
+        return (x_won.astype(np.int8) * X) + (o_won.astype(np.int8) * O)
+
+    def is_terminal(self, winners: np.ndarray | None = None) -> np.ndarray:
+        """
+        Check which boards are finished (won or full).
+        Args:
+            winners (np.ndarray | None): Precomputed winners, computed if not given.
+        Returns:
+            np.ndarray: (B,) boolean array.
+        """
+        if winners is None:
+            winners = self.get_winners()
+        return (winners != 0) | ~self.legal_move_mask().any(axis=1)
+
+    def flatten(self) -> np.ndarray:
+        """
+        Get all boards in the numeric representation used by the agents (see Board.flatten()).
+        Returns:
+            np.ndarray: (B, n_fields) int8 array with -1 for empty, 0 for X and 1 for O fields.
+        """
+        return _FLATTEN_LOOKUP[self.boards]
+
+    def random_legal_moves(self, rows: np.ndarray | None = None) -> np.ndarray:
+        """
+        Pick a uniformly random legal move for every (selected) board.
+        Args:
+            rows (np.ndarray | None): Boolean mask or indices of the boards.
+        Returns:
+            np.ndarray: The chosen flat indices.
+        """
+        legal = self.legal_move_mask() if rows is None else self.legal_move_mask()[rows]
+        noise = self.rng.random(legal.shape)
+        return np.argmax(np.where(legal, noise, -1.0), axis=1)
+
+    def step(self, moves: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Apply one move on every board for the player to move.
+        Finished boards are reset afterwards if auto_reset is enabled.
+        Args:
+            moves (np.ndarray): (B,) flat indices of the moves.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The winners (see get_winners) and the
+            terminal flags of the boards after the move, before any reset.
+        """
+        moves = np.asarray(moves, dtype=np.intp)
+        if moves.shape != (self.batch_size,):
+            raise ValueError(f"Expected {self.batch_size} moves, got shape {moves.shape}.")
+        batch_index = np.arange(self.batch_size)
+        if ((moves < 0) | (moves >= self.n_fields)).any() or (
+            self.boards[batch_index, moves] != EMPTY
+        ).any():
+            raise ValueError("All moves must be legal moves on empty fields.")
+
+        self.boards[batch_index, moves] = self.current_player
+        self.current_player = -self.current_player
+
+        winners = self.get_winners()
+        dones = self.is_terminal(winners)
+        self.games_finished += int(dones.sum())
+        if self.auto_reset and dones.any():
+            self.reset(dones)
+        return winners, dones
+
+    def get_board(self, index: int) -> Board:
+        """
+        Build a Board for a single game of the batch, e.g. for agents without a batched path.
+        Args:
+            index (int): The index of the game in the batch.
+        Returns:
+            Board: A new board with the same field states.
+        """
+        board = Board(self.size, self.win_length)
+        for flat_index, code in enumerate(self.boards[index]):
+            board.get_field_by_flat_index(flat_index).state = _CODE_TO_STATE[int(code)]
+        return board
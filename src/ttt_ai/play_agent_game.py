@@ -1,42 +1,86 @@
 from pathlib import Path
 
+import numpy as np
+
+from ttt_ai.game.agent.mcts_agent import MCTSAgent
 from ttt_ai.game.agent.minimax_agent import MiniMaxAgent
 from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
 from ttt_ai.game.agent.model.NNModel_V2 import NNModel_V2
+from ttt_ai.game.agent.neural_mcts_agent import NeuralMCTSAgent
 from ttt_ai.game.agent.nn_agent import NNAgent
 from ttt_ai.game.board import Board
 from ttt_ai.game.field import FieldState
+from ttt_ai.game.vec_board import VecBoard, player_code
+from ttt_ai.tools.checkpoint_writer import CheckpointWriter, restore_checkpoint
 from ttt_ai.tools.plotter import plot
 
 
 class PlayAgentGame:
-    def __init__(self, agents, maximum_games: int = 10):
+    def __init__(
+        self,
+        agents,
+        maximum_games: int = 10,
+        board_size: int = 3,
+        win_length: int | None = None,
+    ):
         project_root = Path(__file__).parent.parent.parent
         resources_models_dir = project_root / "assets" / "resources" / "models"
         resources_models_dir.mkdir(parents=True, exist_ok=True)
-        self.resource_model_file_v1 = resources_models_dir / "nn_agent_v1_weights.pt"
-        self.resource_model_file_v2 = resources_models_dir / "nn_agent_v2_weights.pt"
+        resources_checkpoints_dir = project_root / "assets" / "resources" / "checkpoints"
+        # Weights of other board sizes are kept apart, their layers have other shapes
+        size_suffix = "" if board_size == 3 else f"_{board_size}x{board_size}"
+        self.resource_model_file_v1 = (
+            resources_models_dir / f"nn_agent_v1_weights{size_suffix}.pt"
+        )
+        self.resource_model_file_v2 = (
+            resources_models_dir / f"nn_agent_v2_weights{size_suffix}.pt"
+        )
         self.maximum_games = maximum_games
         self.agents = agents
-        self.board = Board()
+        self.board = Board(board_size, win_length)
+        self.checkpoint_writers = {}  # NN agent -> CheckpointWriter
 
         for agent in self.agents:
             if isinstance(agent, NNAgent):
+                model_file = None
                 if isinstance(agent.model, NNModel_V1):
-                    if not self.resource_model_file_v1.exists():
-                        agent.save_weights(str(self.resource_model_file_v1))
-                    agent.load_weights(str(self.resource_model_file_v1))
+                    model_file = self.resource_model_file_v1
                 elif isinstance(agent.model, NNModel_V2):
-                    if not self.resource_model_file_v2.exists():
-                        agent.save_weights(str(self.resource_model_file_v2))
-                    agent.load_weights(str(self.resource_model_file_v2))
+                    model_file = self.resource_model_file_v2
+                if model_file is None:
+                    continue
+                if not model_file.exists():
+                    agent.save_weights(str(model_file))
+                agent.load_weights(str(model_file))
+
+                # Continue from the newest checkpoint with its optimizer state and replay memory,
+                # the model file the other players load is updated with every checkpoint
+                writer = CheckpointWriter(
+                    resources_checkpoints_dir,
+                    prefix=f"{model_file.stem}_{agent.FIELD_STATE_TYPE.name.lower()}",
+                    model_file=model_file,
+                )
+                if writer.last_path is not None:
+                    restore_checkpoint(
+                        writer.last_path, agent.model, agent.trainer.optimizer, agent.memory
+                    )
+                    print(f"Restored checkpoint {writer.last_path.name}.")
+                self.checkpoint_writers[agent] = writer
 
     def start(self):
+        """Run the game loop for the specified number of games."""
+        try:
+            self._run_games()
+        finally:
+            # Deferred and pending checkpoints are written before the program ends
+            for writer in self.checkpoint_writers.values():
+                writer.close()
+
+    def _run_games(self):
         plot_x_scores = []
         plot_o_scores = []
 
         n_turn = 0
-        """Run the game loop for the specified number of games."""
         for game_number in range(self.maximum_games):
             self.board.reset()
             current_agent = None
@@ -66,22 +110,55 @@ class PlayAgentGame:
 
             print(f"Game {game_number + 1}/{self.maximum_games} completed.")
             print(
-                f"Winner is {FieldState.X if self.board.is_winner(FieldState.X) else FieldState.O if self.board.is_winner(FieldState.X) else 'None'}. "
+                f"Winner is {self.board.get_winner()}. "
             )
             self.board.print_board()
 
             for agent in self.agents:
                 agent.update_stats(self.board)
+                # NN agents mask illegal moves, they never fall back to an invalid move
+                invalid_move_stats = (
+                    ""
+                    if isinstance(agent, NNAgent)
+                    else f", im: {agent.n_invalid_move}, bm/im: {(agent.n_best_move / agent.n_invalid_move) if agent.n_invalid_move > 0 else 1:.0%}"
+                )
                 print(
-                    f"Game stats: {agent.FIELD_STATE_TYPE} won: {agent.games_won}, lost: {agent.games_lost}, draw: {agent.games_draw}, reward: {agent.total_reward:.2f}, wl_ratio: {agent.get_wl_ratio():.2f}, win_rate: {agent.get_win_rate():.2f}, bm: {agent.n_best_move}, im: {agent.n_invalid_move}, bm/im: {(agent.n_best_move / agent.n_invalid_move) if agent.n_invalid_move > 0 else 1:.0%}"
+                    f"Game stats: {agent.FIELD_STATE_TYPE} won: {agent.games_won}, lost: {agent.games_lost}, draw: {agent.games_draw}, reward: {agent.total_reward:.2f}, wl_ratio: {agent.get_wl_ratio():.2f}, win_rate: {agent.get_win_rate():.2f}, bm: {agent.n_best_move}{invalid_move_stats}"
                 )
 
+                if isinstance(agent, MiniMaxAgent):
+                    print(
+                        f"Search stats: {agent.FIELD_STATE_TYPE} {agent.transposition_table.get_stats()}, last depth: {agent.last_search_depth}, nodes/s: {agent.last_nodes_per_second:,.0f}"
+                    )
+
+                if isinstance(agent, MCTSAgent):
+                    print(
+                        f"Search stats: {agent.FIELD_STATE_TYPE} playouts: {agent.last_playouts}, reused visits: {agent.last_reused_visits}, playouts/s: {agent.last_playouts_per_second:,.0f}"
+                    )
+
+                if isinstance(agent, NeuralMCTSAgent):
+                    print(
+                        f"Search stats: {agent.FIELD_STATE_TYPE} simulations: {agent.last_simulations}, forward passes: {agent.last_forward_passes}, simulations/s: {agent.last_simulations_per_second:,.0f}"
+                    )
+
                 if isinstance(agent, NNAgent):
-                    if agent.total_reward > 0 and agent.total_reward > agent.record:
-                        if isinstance(agent.model, NNModel_V1):
-                            agent.save_weights(str(self.resource_model_file_v1))
-                        elif isinstance(agent.model, NNModel_V2):
-                            agent.save_weights(str(self.resource_model_file_v2))
+                    latency = agent.get_latency_stats()
+                    print(
+                        f"Move latency: {agent.FIELD_STATE_TYPE} mean: {latency['mean']:.2f} ms, p95: {latency['p95']:.2f} ms, max: {latency['max']:.2f} ms"
+                    )
+                    if (
+                        agent.total_reward > 0
+                        and agent.total_reward > agent.record
+                        and agent in self.checkpoint_writers
+                    ):
+                        # Written in the background, the loop doesn't wait for the disk
+                        self.checkpoint_writers[agent].save(
+                            agent.model,
+                            agent.trainer.optimizer,
+                            agent.memory,
+                            metadata={"game": game_number + 1, "reward": agent.total_reward},
+                            training_step=agent.trainer.steps,
+                        )
 
             plot_x_scores.append(self.agents[0].total_reward)
             plot_o_scores.append(self.agents[1].total_reward)
@@ -95,20 +172,55 @@ class PlayAgentGame:
             elif isinstance(current_agent, NNAgent_V2):
                 current_agent.save_weights(str(self.resource_model_file_v2))"""
 
+    def start_batched(self, batch_size: int = 1024):
+        """
+        Run at least the specified number of games on a VecBoard, stepping batch_size games at once.
+        Finished games are restarted automatically, agents act on all their games in one call.
+        Args:
+            batch_size (int): The number of games played at the same time.
+        """
+        vec_board = VecBoard(
+            batch_size, size=self.board.BOARD_SIZE, win_length=self.board.WIN_LENGTH
+        )
+        agent_codes = [player_code(agent.FIELD_STATE_TYPE) for agent in self.agents]
+        moves = np.zeros(batch_size, dtype=np.intp)
+
+        while vec_board.games_finished < self.maximum_games:
+            for agent, code in zip(self.agents, agent_codes):
+                rows = vec_board.current_player == code
+                if rows.any():
+                    moves[rows] = agent.get_best_moves(vec_board, rows)
+
+            winners, dones = vec_board.step(moves)
+            if dones.any():
+                for agent in self.agents:
+                    agent.update_stats_batch(winners[dones])
+
+        print(f"{vec_board.games_finished} games completed.")
+        for agent in self.agents:
+            print(
+                f"Game stats: {agent.FIELD_STATE_TYPE} won: {agent.games_won}, lost: {agent.games_lost}, draw: {agent.games_draw}, reward: {agent.total_reward:.2f}, wl_ratio: {agent.get_wl_ratio():.2f}, win_rate: {agent.get_win_rate():.2f}"
+            )
+
 
 def main():
     """Main entry point for the application."""
     randomness = 0  # Set the randomness for the agents
+    board_size = 3  # e.g. 5 with win_length 4, or 15 with win_length 5 for gomoku
+    win_length = 3
 
     # agent_x = MiniMaxAgent(FieldState.X, randomness)
-    agent_x = NNAgent(NNModel_V1(), FieldState.X, randomness)
+    # agent_x = MCTSAgent(FieldState.X, randomness, n_playouts=2000)
+    agent_x = NNAgent(NNModel_V1(board_size), FieldState.X, randomness)
     # agent_x = NNAgent(NNModel_V2(), FieldState.X, randomness)
 
     # agent_o = MiniMaxAgent(FieldState.O, randomness)
+    # agent_o = MCTSAgent(FieldState.O, randomness, time_budget_ms=100)
+    # agent_o = NeuralMCTSAgent(NNModel_V2(board_size=board_size), FieldState.O, randomness)
     # agent_o = NNAgent(NNModel_V1(), FieldState.O, randomness)
-    agent_o = NNAgent(NNModel_V2(), FieldState.O, randomness)
+    agent_o = NNAgent(NNModel_V2(board_size=board_size), FieldState.O, randomness)
 
-    play_loop = PlayAgentGame([agent_x, agent_o], 1000000)
+    play_loop = PlayAgentGame([agent_x, agent_o], 1000000, board_size, win_length)
     play_loop.start()
 
 
@@ -6,6 +6,8 @@ from time import sleep
 from pynput import keyboard
 
 from ttt_ai.game.agent.agent import Agent
+from ttt_ai.game.agent.mcts_agent import MCTSAgent
+from ttt_ai.game.agent.minimax_agent import MiniMaxAgent, SearchMode
 from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
 from ttt_ai.game.agent.model.NNModel_V2 import NNModel_V2
 from ttt_ai.game.agent.nn_agent import NNAgent
@@ -42,6 +44,8 @@ class PlayRealGame:
                 if not self.resource_model_file_v2.exists():
                     agent.save_weights(str(self.resource_model_file_v2))
                 agent.load_weights(str(self.resource_model_file_v2), False)
+            # The live game only plays, so moves come from a traced snapshot of the weights
+            agent.enable_fast_inference()
 
     def start(self):
         """Start the hotkey listener and the screenshot loop."""
@@ -145,15 +149,23 @@ class PlayRealGame:
             f"Game ({self.game_info.get_previous_game_state()} --> {self.game_info.actual_game_state}) - ({self.game_count}/{self.maximum_games})\nW: {self.agent.games_won} | L: {self.agent.games_lost} | D: {self.agent.games_draw}"
         )
         if self.game_count > 0:
+            # NN agents mask illegal moves, they never fall back to an invalid move
+            invalid_move_stats = (
+                ""
+                if isinstance(self.agent, NNAgent)
+                else f", im: {self.agent.n_invalid_move}, bm/im: {(self.agent.n_best_move / self.agent.n_invalid_move) if self.agent.n_invalid_move > 0 else 0:.0%}"
+            )
             print(
-                f"Game stats: {self.agent.FIELD_STATE_TYPE} won: {self.agent.games_won}, lost: {self.agent.games_lost}, draw: {self.agent.games_draw}, reward: {self.agent.total_reward}, wl_ratio: {self.agent.get_wl_ratio():.2f}, win_rate: {self.agent.get_win_rate():.2f}, bm: {self.agent.n_best_move}, im: {self.agent.n_invalid_move}, bm/im: {(self.agent.n_best_move / self.agent.n_invalid_move) if self.agent.n_invalid_move > 0 else 0:.0%}"
+                f"Game stats: {self.agent.FIELD_STATE_TYPE} won: {self.agent.games_won}, lost: {self.agent.games_lost}, draw: {self.agent.games_draw}, reward: {self.agent.total_reward}, wl_ratio: {self.agent.get_wl_ratio():.2f}, win_rate: {self.agent.get_win_rate():.2f}, bm: {self.agent.n_best_move}{invalid_move_stats}"
             )
 
 
 def main():
     """Main entry point for the application."""
 
-    # play_loop = PlayRealGame(MiniMaxAgent(FieldState.X, 0), 100)
+    # play_loop = PlayRealGame(MCTSAgent(FieldState.X, 0, time_budget_ms=200), 100)
+    # Iterative deepening is limited by its time budget, not by max_depth
+    # play_loop = PlayRealGame(MiniMaxAgent(FieldState.X, 0, search_mode=SearchMode.ITERATIVE_DEEPENING, time_budget_ms=50), 100)
     play_loop = PlayRealGame(NNAgent(NNModel_V2(), FieldState.X, 0), 100)
     play_loop.start()
     # play_loop.stop()
@@ -0,0 +1,139 @@
+import copy
+import queue
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ttt_ai.game.agent.trainer.QTrainer import mask_illegal_moves
+from ttt_ai.game.vec_board import VecBoard
+
+# Same rewards as Agent._calculate_reward for the player who made the move
+WIN_REWARD = 2.0
+DRAW_REWARD = 1.0
+GET_TIMEOUT_S = 0.1  # how often a waiting actor checks the stop event
+
+
+class SelfPlayActor:
+    """
+    Plays a batch of games against itself on a VecBoard with its own copy of the weights.
+    Every move becomes a transition from the view of the player who made it, as NNAgent.remember
+    stores them: (board before, move, reward, board after, game over).
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        batch_size: int = 64,
+        epsilon: float = 0.1,
+        size: int | None = None,
+        win_length: int | None = None,
+        seed: int | None = None,
+    ):
+        """
+        Args:
+            model (nn.Module): The network the actor plays with, used in evaluation mode.
+            batch_size (int): The number of games played at the same time.
+            epsilon (float): The chance of a random legal move instead of the best one.
+            size (int | None): The number of rows and columns, by default the board size of the model.
+            win_length (int | None): The number of fields in a row needed to win, by default size.
+        """
+        if size is None:
+            size = getattr(model, "board_size", 3)
+        self.model = model.eval()
+        self.epsilon = epsilon
+        self.vec_board = VecBoard(
+            batch_size, auto_reset=False, seed=seed, size=size, win_length=win_length
+        )
+        self.games_played = 0
+
+    def step(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Play one move in every game, finished games start again.
+        Returns:
+            tuple: states, actions, rewards, next_states and dones, one row per game.
+        """
+        vec_board = self.vec_board
+        states = vec_board.flatten()
+        movers = vec_board.current_player.copy()
+        board_tensor = torch.from_numpy(states).float()
+        with torch.inference_mode():
+            scores = mask_illegal_moves(self.model(board_tensor), board_tensor)
+        moves = scores.argmax(dim=1).numpy()
+
+        # Randomness condition to explore the boards
+        explore = vec_board.rng.random(len(moves)) < self.epsilon
+        if explore.any():
+            moves[explore] = vec_board.random_legal_moves(np.flatnonzero(explore))
+
+        winners, dones = vec_board.step(moves)
+        next_states = vec_board.flatten()
+        rewards = np.where(
+            winners == movers, WIN_REWARD, np.where(dones & (winners == 0), DRAW_REWARD, 0.0)
+        ).astype(np.float32)
+        if dones.any():
+            vec_board.reset(dones)
+            self.games_played += int(dones.sum())
+        return states, moves.astype(np.int16), rewards, next_states, dones
+
+    def collect(self, n_steps: int) -> tuple[torch.Tensor, ...]:
+        """
+        Play n_steps moves in every game.
+        Args:
+            n_steps (int): The number of moves per game.
+        Returns:
+            tuple[torch.Tensor, ...]: states, actions, rewards, next_states and dones of all moves.
+        """
+        steps = [self.step() for _ in range(n_steps)]
+        return tuple(torch.from_numpy(np.concatenate(arrays)) for arrays in zip(*steps))
+
+
+def run_actor(
+    actor_id: int,
+    shared_model: nn.Module,
+    weights_lock,
+    weights_version,
+    slots: tuple[torch.Tensor, ...],
+    free_slots,
+    filled_slots,
+    stop_event,
+    batch_size: int,
+    steps_per_batch: int,
+    epsilon: float,
+    win_length: int | None,
+    seed: int | None,
+):
+    """
+    The loop of an actor process: refresh the weights when the learner published new ones,
+    play steps_per_batch moves in all games and write the transitions into a free shared-memory slot.
+    Only the slot index is sent to the learner, which hands the slot back after reading it.
+    """
+    torch.set_num_threads(1)  # the actors scale over processes, not threads
+    model = copy.deepcopy(shared_model)
+    actor = SelfPlayActor(
+        model,
+        batch_size,
+        epsilon,
+        win_length=win_length,
+        seed=None if seed is None else seed + actor_id,
+    )
+    version = -1
+    while not stop_event.is_set():
+        if weights_version.value != version:
+            with weights_lock:
+                version = weights_version.value
+                model.load_state_dict(shared_model.state_dict())
+
+        games_before = actor.games_played
+        batch = actor.collect(steps_per_batch)
+        slot = None
+        while slot is None and not stop_event.is_set():
+            try:
+                slot = free_slots.get(timeout=GET_TIMEOUT_S)
+            except queue.Empty:
+                continue  # the learner falls behind, wait for a slot
+        if slot is None:
+            return
+        for buffer, tensor in zip(slots, batch):
+            buffer[slot].copy_(tensor)
+        filled_slots.put((actor_id, slot, actor.games_played - games_before))
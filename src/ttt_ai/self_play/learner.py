@@ -0,0 +1,349 @@
+import copy
+import queue
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+
+from ttt_ai.game.agent.model.NNModel_V2 import NNModel_V2
+from ttt_ai.game.agent.model.model_file import save_model
+from ttt_ai.game.agent.nn_agent import BATCH_SIZE, LR, MAX_MEMORY, NNAgent
+from ttt_ai.game.agent.replay_buffer import ReplayBuffer
+from ttt_ai.game.agent.trainer.QTrainer import QTrainer
+from ttt_ai.self_play.actor import run_actor
+
+SLOTS_PER_ACTOR = 8  # batches in flight per actor, the actors wait when the learner falls behind
+WAIT_TIMEOUT_S = 0.1  # how long the learner waits for transitions while the memory is empty
+JOIN_TIMEOUT_S = 5.0
+LOG_INTERVAL_S = 5.0
+
+
+class Learner(ABC):
+    """
+    Trains a model on the transitions of self-play actors.
+    The learner owns the QTrainer and the replay buffer. Subclasses connect it to the actors:
+    start and stop them, ingest their transitions and publish the weights they play with.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        batch_size: int = BATCH_SIZE,
+        publish_every: int = 10,
+        replay_capacity: int = MAX_MEMORY,
+        gamma: float = 0.9,
+        seed: int | None = None,
+        augment: bool = False,
+    ):
+        """
+        Args:
+            model (nn.Module): The network to train, e.g. the model of an NNAgent.
+            batch_size (int): The number of transitions per training step.
+            publish_every (int): The training steps between weight updates of the actors.
+            replay_capacity (int): The maximum number of transitions in the replay buffer.
+            gamma (float): The discount rate.
+            seed (int | None): The seed of the sampling.
+            augment (bool): Train on random symmetry transforms of the sampled transitions.
+        """
+        if publish_every < 1:
+            raise ValueError("The publish interval must be at least 1 training step.")
+        self.model = model
+        self.batch_size = batch_size
+        self.publish_every = publish_every
+        board_size = getattr(model, "board_size", 3)
+        self.n_fields = board_size * board_size
+        self.memory = ReplayBuffer(replay_capacity, self.n_fields, seed, augment)
+        self.trainer = QTrainer(model, lr=LR, gamma=gamma)
+        self.train_steps = 0
+        self.transitions_received = 0
+        self.games_received = 0
+        self._start_time = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    @abstractmethod
+    def weights_version(self) -> int:
+        """The number of weight updates published to the actors."""
+
+    @abstractmethod
+    def start(self):
+        """Start accepting transitions from the actors."""
+
+    @abstractmethod
+    def stop(self):
+        """Stop accepting transitions from the actors."""
+
+    @abstractmethod
+    def publish_weights(self):
+        """Make the current weights available to the actors."""
+
+    @abstractmethod
+    def ingest(self, timeout: float = 0.0) -> int:
+        """
+        Move the transitions received from the actors into the replay buffer.
+        Args:
+            timeout (float): The time to wait for the first batch if none is waiting.
+        Returns:
+            int: The number of transitions received.
+        """
+
+    def train_step(self):
+        """Train on a batch from the replay buffer and publish the weights when it is their turn."""
+        states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
+        self.trainer.train_step(states, actions, rewards, next_states, dones)
+        self.train_steps += 1
+        if self.train_steps % self.publish_every == 0:
+            self.publish_weights()
+
+    def run(
+        self, max_train_steps: int | None = None, max_games: int | None = None
+    ) -> dict[str, float]:
+        """
+        Train until max_train_steps training steps are done or max_games games were received.
+        Args:
+            max_train_steps (int | None): The training steps of this run, None for no limit.
+            max_games (int | None): The games received in this run, None for no limit.
+        Returns:
+            dict[str, float]: The stats of get_stats.
+        """
+        if max_train_steps is None and max_games is None:
+            raise ValueError("The run needs a limit of training steps or games.")
+        self.start()
+        last_steps = self.train_steps
+        last_games = self.games_received
+        next_log = time.perf_counter() + LOG_INTERVAL_S
+        while (max_train_steps is None or self.train_steps - last_steps < max_train_steps) and (
+            max_games is None or self.games_received - last_games < max_games
+        ):
+            self.ingest(WAIT_TIMEOUT_S if len(self.memory) == 0 else 0.0)
+            if len(self.memory) > 0:
+                self.train_step()
+            if time.perf_counter() >= next_log:
+                self._print_stats()
+                next_log += LOG_INTERVAL_S
+        self._print_stats()
+        return self.get_stats()
+
+    def get_stats(self) -> dict[str, float]:
+        """
+        Get the throughput since the learner was started.
+        Returns:
+            dict[str, float]: Games, transitions and training steps in total and per second.
+        """
+        elapsed = time.perf_counter() - self._start_time if self._start_time else float(0)
+        per_second = (lambda count: count / elapsed) if elapsed > 0 else (lambda count: float(0))
+        return {
+            "games": float(self.games_received),
+            "transitions": float(self.transitions_received),
+            "train_steps": float(self.train_steps),
+            "games_per_second": per_second(self.games_received),
+            "transitions_per_second": per_second(self.transitions_received),
+            "train_steps_per_second": per_second(self.train_steps),
+        }
+
+    def _print_stats(self):
+        stats = self.get_stats()
+        print(
+            f"Self-play stats: games: {self.games_received}, games/s: {stats['games_per_second']:,.0f}, transitions/s: {stats['transitions_per_second']:,.0f}, train steps: {self.train_steps}, weights version: {self.weights_version}"
+        )
+
+
+class SelfPlayLearner(Learner):
+    """
+    A learner fed by several self-play actor processes on the same machine.
+    The actors play with a copy of the weights, which the learner publishes to shared memory every
+    publish_every training steps. Each actor writes its transitions into preallocated shared-memory
+    slots, the queues only carry slot indices. Acting never waits for a backprop step.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        n_actors: int = 2,
+        games_per_actor: int = 64,
+        steps_per_batch: int = 4,
+        epsilon: float = 0.1,
+        batch_size: int = BATCH_SIZE,
+        publish_every: int = 10,
+        replay_capacity: int = MAX_MEMORY,
+        win_length: int | None = None,
+        gamma: float = 0.9,
+        seed: int | None = None,
+        augment: bool = False,
+    ):
+        """
+        Args:
+            model (nn.Module): The network to train, e.g. the model of an NNAgent.
+            n_actors (int): The number of actor processes.
+            games_per_actor (int): The games each actor plays at the same time on a VecBoard.
+            steps_per_batch (int): The moves per game an actor plays before sending its transitions.
+            epsilon (float): The chance of a random legal move in the actors.
+            batch_size (int): The number of transitions per training step.
+            publish_every (int): The training steps between weight updates of the actors.
+            replay_capacity (int): The maximum number of transitions in the replay buffer.
+            win_length (int | None): The number of fields in a row needed to win, by default the board size.
+            gamma (float): The discount rate.
+            seed (int | None): The seed of the actors and the sampling.
+            augment (bool): Train on random symmetry transforms of the sampled transitions.
+        """
+        if n_actors < 1:
+            raise ValueError("The learner needs at least 1 actor.")
+        super().__init__(
+            model, batch_size, publish_every, replay_capacity, gamma, seed, augment
+        )
+        self.n_actors = n_actors
+        self.games_per_actor = games_per_actor
+        self.steps_per_batch = steps_per_batch
+        self.epsilon = epsilon
+        self.win_length = win_length
+        self.seed = seed
+
+        self._context = mp.get_context()
+        self._shared_model = None
+        self._weights_lock = None
+        self._weights_version = None
+        self._slots = []
+        self._free_slots = []
+        self._filled_slots = None
+        self._stop_event = None
+        self._processes = []
+
+    @property
+    def weights_version(self) -> int:
+        return self._weights_version.value if self._weights_version is not None else 0
+
+    def start(self):
+        """Publish the current weights and start the actor processes."""
+        if self._processes:
+            return
+        context = self._context
+        self._shared_model = copy.deepcopy(self.model).share_memory()
+        self._weights_lock = context.Lock()
+        self._weights_version = context.Value("i", 0)
+        rows = self.games_per_actor * self.steps_per_batch
+        self._slots = [self._allocate_slots(rows) for _ in range(self.n_actors)]
+        self._free_slots = [context.Queue() for _ in range(self.n_actors)]
+        for free_slots in self._free_slots:
+            for slot in range(SLOTS_PER_ACTOR):
+                free_slots.put(slot)
+        self._filled_slots = context.Queue()
+        self._stop_event = context.Event()
+        self._processes = [
+            context.Process(
+                target=run_actor,
+                args=(
+                    actor_id,
+                    self._shared_model,
+                    self._weights_lock,
+                    self._weights_version,
+                    self._slots[actor_id],
+                    self._free_slots[actor_id],
+                    self._filled_slots,
+                    self._stop_event,
+                    self.games_per_actor,
+                    self.steps_per_batch,
+                    self.epsilon,
+                    self.win_length,
+                    self.seed,
+                ),
+                daemon=True,
+            )
+            for actor_id in range(self.n_actors)
+        ]
+        for process in self._processes:
+            process.start()
+        self._start_time = time.perf_counter()
+
+    def stop(self):
+        """Stop the actors, the transitions not yet ingested are dropped."""
+        if not self._processes:
+            return
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(JOIN_TIMEOUT_S)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for actor_queue in self._free_slots + [self._filled_slots]:
+            actor_queue.close()
+        self._processes = []
+        self._slots = []
+        self._free_slots = []
+
+    def _allocate_slots(self, rows: int) -> tuple[torch.Tensor, ...]:
+        """Allocate the shared-memory slots of one actor, laid out like the replay buffer arrays."""
+        return tuple(
+            tensor.share_memory_()
+            for tensor in (
+                torch.zeros((SLOTS_PER_ACTOR, rows, self.n_fields), dtype=torch.int8),
+                torch.zeros((SLOTS_PER_ACTOR, rows), dtype=torch.int16),
+                torch.zeros((SLOTS_PER_ACTOR, rows), dtype=torch.float32),
+                torch.zeros((SLOTS_PER_ACTOR, rows, self.n_fields), dtype=torch.int8),
+                torch.zeros((SLOTS_PER_ACTOR, rows), dtype=torch.bool),
+            )
+        )
+
+    def publish_weights(self):
+        """Copy the weights of the learner to the shared model the actors load from."""
+        with self._weights_lock:
+            with torch.no_grad():
+                for shared, own in zip(
+                    self._shared_model.state_dict().values(), self.model.state_dict().values()
+                ):
+                    shared.copy_(own)
+            self._weights_version.value += 1
+
+    def ingest(self, timeout: float = 0.0) -> int:
+        """
+        Copy the filled slots of the actors into the replay buffer and hand the slots back.
+        Args:
+            timeout (float): The time to wait for the first batch if the queue is empty.
+        Returns:
+            int: The number of transitions received.
+        """
+        received = 0
+        while True:
+            try:
+                if received == 0 and timeout > 0:
+                    actor_id, slot, games = self._filled_slots.get(timeout=timeout)
+                else:
+                    actor_id, slot, games = self._filled_slots.get_nowait()
+            except queue.Empty:
+                break
+            batch = [buffer[slot].numpy() for buffer in self._slots[actor_id]]
+            self.memory.add_batch(*batch)
+            self._free_slots[actor_id].put(slot)
+            received += len(batch[1])
+            self.games_received += games
+        self.transitions_received += received
+        return received
+
+
+def main():
+    """Train the NN agent with self-play actors, start with the weights of play_agent_game."""
+    n_actors = 4
+    project_root = Path(__file__).parent.parent.parent.parent
+    weights_file = project_root / "assets" / "resources" / "models" / "nn_agent_v2_weights.pt"
+
+    agent = NNAgent(NNModel_V2())
+    if weights_file.exists():
+        agent.load_weights(str(weights_file))
+
+    with SelfPlayLearner(agent.model, n_actors=n_actors) as learner:
+        learner.trainer.steps = agent.trainer.steps  # continue the count of the loaded weights
+        learner.run(max_train_steps=10_000)
+    # The learner trained with its own QTrainer, its step count goes into the file
+    save_model(learner.model, weights_file, training_step=learner.trainer.steps)
+
+
+if __name__ == "__main__":
+    main()
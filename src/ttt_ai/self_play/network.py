@@ -0,0 +1,534 @@
+import io
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ttt_ai.game.agent.model.NNModel_V2 import NNModel_V2
+from ttt_ai.game.agent.nn_agent import BATCH_SIZE, MAX_MEMORY
+from ttt_ai.self_play.actor import SelfPlayActor
+from ttt_ai.self_play.learner import Learner
+
+# Every message is a header (payload length, message type) followed by the payload
+HEADER = struct.Struct(">IB")
+TRANSITIONS_HEADER = struct.Struct(">III")  # transitions, fields per board, finished games
+VERSION = struct.Struct(">i")  # -1 for an actor without weights from the learner
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024  # also the limit of a decompressed payload
+
+MSG_TRANSITIONS = 1  # actor -> learner: compressed transitions, answered with MSG_ACK
+MSG_ACK = 2  # learner -> actor: the current weights version
+MSG_GET_WEIGHTS = 3  # actor -> learner: the weights version of the actor
+MSG_WEIGHTS = 4  # learner -> actor: the weights version and the state dict if it is newer
+
+DEFAULT_HOST = "127.0.0.1"
+COMPRESSION_LEVEL = 6
+CONNECT_TIMEOUT_S = 5.0
+RECEIVED_BATCHES = 16  # batches waiting for the training thread, the actors wait when it falls behind
+PUT_TIMEOUT_S = 0.1  # how often a waiting connection thread checks if the learner stopped
+
+
+def _receive_exactly(sock: socket.socket, n_bytes: int) -> bytes:
+    """Read n_bytes from the socket, a closed connection raises ConnectionError."""
+    data = bytearray(n_bytes)
+    view = memoryview(data)
+    received = 0
+    while received < n_bytes:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("The connection was closed.")
+        received += n
+    return bytes(data)
+
+
+def send_message(sock: socket.socket, message_type: int, payload: bytes = b"") -> int:
+    """
+    Send a length-prefixed message.
+    Args:
+        sock (socket.socket): The connected socket.
+        message_type (int): One of the MSG_ constants.
+        payload (bytes): The body of the message.
+    Returns:
+        int: The number of bytes sent, header included.
+    """
+    sock.sendall(HEADER.pack(len(payload), message_type) + payload)
+    return HEADER.size + len(payload)
+
+
+def receive_message(sock: socket.socket) -> tuple[int, bytes]:
+    """
+    Receive a length-prefixed message.
+    Args:
+        sock (socket.socket): The connected socket.
+    Returns:
+        tuple[int, bytes]: The message type and the payload.
+    """
+    length, message_type = HEADER.unpack(_receive_exactly(sock, HEADER.size))
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message of {length} bytes exceeds the limit of {MAX_MESSAGE_SIZE}.")
+    return message_type, _receive_exactly(sock, length)
+
+
+def encode_transitions(states, actions, rewards, dones, games: int = 0) -> bytes:
+    """
+    Pack and compress a batch of transitions.
+    The boards after the moves are not sent, decode_transitions rebuilds them from the boards
+    before the moves and the actions.
+    Args:
+        states: (N, n_fields) boards before the moves in the encoding of Board.flatten().
+        actions: (N,) flat indices of the moves.
+        rewards: (N,) rewards for the moves.
+        dones: (N,) True where a move ended the game.
+        games (int): The games finished in this batch.
+    Returns:
+        bytes: The compressed payload.
+    """
+    states = np.asarray(states, dtype=np.int8)
+    n, n_fields = states.shape
+    payload = b"".join(
+        [
+            TRANSITIONS_HEADER.pack(n, n_fields, games),
+            states.tobytes(),
+            np.asarray(actions, dtype="<i2").tobytes(),
+            np.asarray(rewards, dtype="<f4").tobytes(),
+            np.asarray(dones, dtype=np.bool_).tobytes(),
+        ]
+    )
+    return zlib.compress(payload, COMPRESSION_LEVEL)
+
+
+def decode_transitions(
+    payload: bytes, expected_fields: int | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Unpack a batch of transitions made by encode_transitions.
+    The payload comes from the network, a malformed one raises ValueError.
+    Args:
+        payload (bytes): The compressed payload.
+        expected_fields (int | None): The fields per board of the receiver, None to accept any.
+    Returns:
+        tuple: states, actions, rewards, next_states, dones and the number of finished games.
+    """
+    decompressor = zlib.decompressobj()
+    try:
+        data = decompressor.decompress(payload, MAX_MESSAGE_SIZE)
+    except zlib.error as e:
+        raise ValueError(f"The transitions are not valid zlib data: {e}") from e
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"The decompressed transitions exceed the limit of {MAX_MESSAGE_SIZE} bytes.")
+    if not decompressor.eof or len(data) < TRANSITIONS_HEADER.size:
+        raise ValueError("The transitions are truncated.")
+    n, n_fields, games = TRANSITIONS_HEADER.unpack_from(data)
+    if expected_fields is not None and n_fields != expected_fields:
+        raise ValueError(f"Boards with {n_fields} fields, expected {expected_fields}.")
+    # int8 boards, int16 actions, float32 rewards and bool dones
+    if len(data) != TRANSITIONS_HEADER.size + n * (n_fields + 7):
+        raise ValueError(
+            f"{len(data)} bytes do not hold {n} transitions of boards with {n_fields} fields."
+        )
+    offset = TRANSITIONS_HEADER.size
+    states = np.frombuffer(data, np.int8, n * n_fields, offset).reshape(n, n_fields)
+    offset += n * n_fields
+    actions = np.frombuffer(data, "<i2", n, offset)
+    offset += 2 * n
+    rewards = np.frombuffer(data, "<f4", n, offset)
+    offset += 4 * n
+    dones = np.frombuffer(data, np.bool_, n, offset)
+    if n > 0 and (actions.min() < 0 or actions.max() >= n_fields):
+        raise ValueError(f"The actions must be fields between 0 and {n_fields - 1}.")
+    if n > 0 and (states.min() < -1 or states.max() > 1):
+        raise ValueError("The fields must be -1 (empty), 0 (X) or 1 (O).")
+    if n > 0 and (states[np.arange(n), actions] != -1).any():
+        raise ValueError("The actions must be empty fields.")
+
+    # X (0) moves when both players have the same number of marks, O (1) otherwise
+    n_x = (states == 0).sum(axis=1)
+    n_o = (states == 1).sum(axis=1)
+    next_states = states.copy()
+    next_states[np.arange(n), actions] = (n_x != n_o).astype(np.int8)
+    return states, actions, rewards, next_states, dones, games
+
+
+def encode_weights(model: nn.Module) -> bytes:
+    """Serialize and compress the state dict of a model."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return zlib.compress(buffer.getvalue(), COMPRESSION_LEVEL)
+
+
+def decode_weights(payload: bytes) -> dict:
+    """Load a state dict made by encode_weights, only tensors are unpickled."""
+    return torch.load(io.BytesIO(zlib.decompress(payload)), weights_only=True)
+
+
+def _shutdown_connection(sock: socket.socket):
+    """Close both directions of a connection, its blocked reads and writes fail at once."""
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass  # already closed by the other side
+
+
+class _LearnerRequestHandler(socketserver.BaseRequestHandler):
+    """Serves one actor connection until the actor disconnects or the learner stops."""
+
+    def setup(self):
+        self.server.learner.add_connection(self.request)
+
+    def finish(self):
+        self.server.learner.remove_connection(self.request)
+
+    def handle(self):
+        learner = self.server.learner
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                message_type, payload = receive_message(sock)
+            except (ConnectionError, OSError):
+                return
+            except ValueError as e:
+                print(f"Closing the connection to {self.client_address}: {e}")
+                return
+            learner.count_bytes(HEADER.size + len(payload))
+            if message_type == MSG_TRANSITIONS:
+                # Decompressed here, the training thread only copies into the replay buffer
+                try:
+                    transitions = decode_transitions(payload, learner.n_fields)
+                except ValueError as e:
+                    print(f"Closing the connection to {self.client_address}: {e}")
+                    return
+                # Not acknowledged before there is room, the actor waits for the learner
+                if not learner.put_received(transitions):
+                    return
+                try:
+                    send_message(sock, MSG_ACK, VERSION.pack(learner.weights_version))
+                except OSError:
+                    return
+            elif message_type == MSG_GET_WEIGHTS:
+                if len(payload) != VERSION.size:
+                    print(
+                        f"Closing the connection to {self.client_address}: malformed weights request."
+                    )
+                    return
+                (actor_version,) = VERSION.unpack(payload)
+                version, weights = learner.get_published_weights()
+                body = weights if version != actor_version else b""
+                try:
+                    send_message(sock, MSG_WEIGHTS, VERSION.pack(version) + body)
+                except OSError:
+                    return
+            else:
+                print(f"Unknown message type {message_type} from {self.client_address}.")
+                return
+
+
+class _LearnerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class TcpLearner(Learner):
+    """
+    A learner fed by self-play actors on other hosts over TCP.
+    Actors send compressed transition batches and pull the weights with a simple length-prefixed
+    protocol (see send_message). Every connection is served by its own thread, the transitions are
+    decompressed there and trained on by the thread calling run. At most RECEIVED_BATCHES batches
+    wait for training, a connection thread only acknowledges its batch once there is room for it.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        host: str = DEFAULT_HOST,
+        port: int = 0,
+        batch_size: int = BATCH_SIZE,
+        publish_every: int = 10,
+        replay_capacity: int = MAX_MEMORY,
+        gamma: float = 0.9,
+        seed: int | None = None,
+        augment: bool = False,
+    ):
+        """
+        Args:
+            model (nn.Module): The network to train, e.g. the model of an NNAgent.
+            host (str): The address to listen on, "0.0.0.0" to accept actors from other hosts.
+            port (int): The port to listen on, 0 picks a free port (see address).
+            batch_size (int): The number of transitions per training step.
+            publish_every (int): The training steps between weight updates of the actors.
+            replay_capacity (int): The maximum number of transitions in the replay buffer.
+            gamma (float): The discount rate.
+            seed (int | None): The seed of the sampling.
+            augment (bool): Train on random symmetry transforms of the sampled transitions.
+        """
+        super().__init__(
+            model, batch_size, publish_every, replay_capacity, gamma, seed, augment
+        )
+        self.host = host
+        self.port = port
+        self.received = queue.Queue(maxsize=RECEIVED_BATCHES)
+        self.bytes_received = 0
+        self._bytes_lock = threading.Lock()
+        self._weights_lock = threading.Lock()
+        self._weights = (0, b"")
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._server = None
+        self._thread = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The address the learner listens on, with the actual port once started."""
+        return self._server.server_address if self._server is not None else (self.host, self.port)
+
+    @property
+    def weights_version(self) -> int:
+        return self._weights[0]
+
+    def start(self):
+        """Publish the current weights and start listening for actors."""
+        if self._server is not None:
+            return
+        self._weights = (0, encode_weights(self.model))
+        self._stopping.clear()
+        self._server = _LearnerServer((self.host, self.port), _LearnerRequestHandler)
+        self._server.learner = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self._start_time = time.perf_counter()
+
+    def stop(self):
+        """Stop listening and close the connections, connected actors see their connection closed."""
+        if self._server is None:
+            return
+        self._stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        with self._connections_lock:
+            connections = list(self._connections)
+        for sock in connections:
+            _shutdown_connection(sock)
+        self._server = None
+        self._thread = None
+
+    def add_connection(self, sock: socket.socket):
+        """Track an accepted connection so stop can close it, called by the connection threads."""
+        with self._connections_lock:
+            self._connections.add(sock)
+        if self._stopping.is_set():
+            _shutdown_connection(sock)  # accepted while stopping
+
+    def remove_connection(self, sock: socket.socket):
+        """Forget a connection whose thread ends, called by the connection threads."""
+        with self._connections_lock:
+            self._connections.discard(sock)
+
+    def put_received(self, transitions: tuple) -> bool:
+        """
+        Queue decoded transitions for the training thread, wait while the queue is full.
+        Args:
+            transitions (tuple): The result of decode_transitions.
+        Returns:
+            bool: True if they were queued, False if the learner stopped while waiting.
+        """
+        while not self._stopping.is_set():
+            try:
+                self.received.put(transitions, timeout=PUT_TIMEOUT_S)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def publish_weights(self):
+        """Serialize the weights once, every actor pulling them gets the same bytes."""
+        weights = encode_weights(self.model)
+        with self._weights_lock:
+            self._weights = (self._weights[0] + 1, weights)
+
+    def count_bytes(self, n_bytes: int):
+        """Add to the bytes received, called by the connection threads."""
+        with self._bytes_lock:
+            self.bytes_received += n_bytes
+
+    def get_published_weights(self) -> tuple[int, bytes]:
+        """Get the latest published weights version and its compressed state dict."""
+        with self._weights_lock:
+            return self._weights
+
+    def ingest(self, timeout: float = 0.0) -> int:
+        received = 0
+        while True:
+            try:
+                if received == 0 and timeout > 0:
+                    item = self.received.get(timeout=timeout)
+                else:
+                    item = self.received.get_nowait()
+            except queue.Empty:
+                break
+            states, actions, rewards, next_states, dones, games = item
+            self.memory.add_batch(states, actions, rewards, next_states, dones)
+            received += len(actions)
+            self.games_received += games
+        self.transitions_received += received
+        return received
+
+    def get_stats(self) -> dict[str, float]:
+        stats = super().get_stats()
+        stats["bytes_received"] = float(self.bytes_received)
+        stats["bytes_per_transition"] = (
+            self.bytes_received / self.transitions_received
+            if self.transitions_received > 0
+            else float(0)
+        )
+        return stats
+
+    def _print_stats(self):
+        super()._print_stats()
+        stats = self.get_stats()
+        print(
+            f"Network stats: received: {self.bytes_received / 1024:,.0f} KiB, bytes/transition: {stats['bytes_per_transition']:.2f}, ingest: {stats['transitions_per_second']:,.0f} transitions/s"
+        )
+
+
+class TcpActor:
+    """
+    A self-play actor that sends its transitions to a TcpLearner, possibly on another host,
+    and pulls new weights whenever the learner acknowledges a batch with a newer version.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        host: str = DEFAULT_HOST,
+        port: int = 0,
+        games_per_batch: int = 64,
+        steps_per_batch: int = 4,
+        epsilon: float = 0.1,
+        win_length: int | None = None,
+        seed: int | None = None,
+    ):
+        """
+        Args:
+            model (nn.Module): The network the actor plays with, of the same architecture as the learner's.
+            host (str): The address of the learner.
+            port (int): The port of the learner.
+            games_per_batch (int): The games played at the same time on a VecBoard.
+            steps_per_batch (int): The moves per game played before the transitions are sent.
+            epsilon (float): The chance of a random legal move.
+            win_length (int | None): The number of fields in a row needed to win, by default the board size.
+            seed (int | None): The seed of the games.
+        """
+        self.host = host
+        self.port = port
+        self.steps_per_batch = steps_per_batch
+        self.actor = SelfPlayActor(
+            model, games_per_batch, epsilon, win_length=win_length, seed=seed
+        )
+        self.weights_version = -1  # nothing loaded from the learner yet
+        self.bytes_sent = 0
+        self.transitions_sent = 0
+        self.batches_sent = 0
+
+    def get_bytes_per_transition(self) -> float:
+        """Calculate the average bytes sent per transition, headers included."""
+        return self.bytes_sent / self.transitions_sent if self.transitions_sent > 0 else float(0)
+
+    def _pull_weights(self, sock: socket.socket):
+        send_message(sock, MSG_GET_WEIGHTS, VERSION.pack(self.weights_version))
+        message_type, payload = receive_message(sock)
+        if message_type != MSG_WEIGHTS:
+            raise ValueError(f"Expected weights, got message type {message_type}.")
+        (version,) = VERSION.unpack_from(payload)
+        weights = payload[VERSION.size :]
+        if weights:
+            self.actor.model.load_state_dict(decode_weights(weights))
+        self.weights_version = version
+
+    def send_batch(self, sock: socket.socket) -> int:
+        """
+        Play one batch of moves and send its transitions.
+        Args:
+            sock (socket.socket): The connection to the learner.
+        Returns:
+            int: The weights version of the learner.
+        """
+        games_before = self.actor.games_played
+        states, actions, rewards, _, dones = self.actor.collect(self.steps_per_batch)
+        payload = encode_transitions(
+            states.numpy(),
+            actions.numpy(),
+            rewards.numpy(),
+            dones.numpy(),
+            self.actor.games_played - games_before,
+        )
+        self.bytes_sent += send_message(sock, MSG_TRANSITIONS, payload)
+        self.transitions_sent += len(actions)
+        self.batches_sent += 1
+        message_type, payload = receive_message(sock)
+        if message_type != MSG_ACK:
+            raise ValueError(f"Expected an acknowledgement, got message type {message_type}.")
+        return VERSION.unpack(payload)[0]
+
+    def run(self, max_batches: int | None = None, stop_event: threading.Event | None = None):
+        """
+        Connect to the learner and send batches until max_batches are sent, the stop event is set
+        or the learner closes the connection.
+        Args:
+            max_batches (int | None): The batches to send, None for no limit.
+            stop_event (threading.Event | None): Set it to stop the actor from another thread.
+        """
+        with socket.create_connection((self.host, self.port), CONNECT_TIMEOUT_S) as sock:
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                self._pull_weights(sock)
+                batches = 0
+                while (max_batches is None or batches < max_batches) and not (
+                    stop_event is not None and stop_event.is_set()
+                ):
+                    learner_version = self.send_batch(sock)
+                    batches += 1
+                    if learner_version != self.weights_version:
+                        self._pull_weights(sock)
+            except ConnectionError:
+                print("The learner closed the connection.")
+
+
+def main():
+    """Run the learner and two actors on localhost, as a stand-in for actors on other hosts."""
+    n_actors = 2
+    learner = TcpLearner(NNModel_V2())
+    with learner:
+        host, port = learner.address
+        stop_event = threading.Event()
+        actors = [
+            TcpActor(NNModel_V2(), host, port, seed=actor_id) for actor_id in range(n_actors)
+        ]
+        threads = [
+            threading.Thread(target=actor.run, kwargs={"stop_event": stop_event})
+            for actor in actors
+        ]
+        for thread in threads:
+            thread.start()
+        learner.run(max_train_steps=1000)
+        stop_event.set()
+    # Actors waiting for room in the full queue are released by stop
+    for thread in threads:
+        thread.join()
+
+    for actor_id, actor in enumerate(actors):
+        print(
+            f"Actor {actor_id}: {actor.transitions_sent} transitions, {actor.get_bytes_per_transition():.2f} bytes/transition, weights version {actor.weights_version}"
+        )
+
+
+if __name__ == "__main__":
+    main()
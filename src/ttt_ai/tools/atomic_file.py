@@ -0,0 +1,40 @@
+import os
+import tempfile
+from pathlib import Path
+
+import torch
+
+
+def _fsync_directory(directory: Path):
+    """Persist a rename in the directory, only possible on POSIX systems."""
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomically(payload: dict, path: Path):
+    """
+    Save a payload with torch.save to a temporary file next to path and rename it onto path.
+    Readers see either the old or the new file, never a partially written one.
+    Args:
+        payload (dict): The checkpoint.
+        path (Path): The target file.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+    )
+    try:
+        with os.fdopen(fd, "wb") as file:
+            torch.save(payload, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    _fsync_directory(path.parent)
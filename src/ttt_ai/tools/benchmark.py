@@ -0,0 +1,445 @@
+import random
+import tempfile
+import threading
+import time
+import timeit
+
+import numpy as np
+import torch
+
+from ttt_ai.game.agent.inference_server import InferenceClientAgent, InferenceServer
+from ttt_ai.game.agent.mcts_agent import MCTSAgent
+from ttt_ai.game.agent.minimax_agent import MiniMaxAgent, SearchMode
+from ttt_ai.game.agent.model.model_file import load_model, save_model
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.game.agent.model.NNModel_V2 import NNModel_V2
+from ttt_ai.game.agent.nn_agent import NNAgent, TrainingSchedule
+from ttt_ai.game.agent.replay_buffer import ReplayBuffer
+from ttt_ai.game.agent.trainer.QTrainer import QTrainer
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+from ttt_ai.game.vec_board import VecBoard
+from ttt_ai.self_play.learner import SelfPlayLearner
+from ttt_ai.self_play.network import TcpActor, TcpLearner
+
+
+def benchmark_board_checks(number: int = 100_000) -> dict[str, float]:
+    """
+    Measure the time of the board status checks used at every search node.
+    Args:
+        number (int): The number of calls per check.
+    Returns:
+        dict[str, float]: Microseconds per call for each check.
+    """
+    board = Board()
+    board[0, 0].state = FieldState.X
+    board[1, 1].state = FieldState.O
+    board[2, 2].state = FieldState.X
+
+    checks = {
+        "is_game_over": board.is_game_over,
+        "is_winner": lambda: board.is_winner(FieldState.X),
+        "is_board_full": board.is_board_full,
+        "flatten": board.flatten,
+        "random_free_field": board.get_flat_index_of_radom_free_field,
+    }
+    results = {}
+    for name, check in checks.items():
+        results[name] = timeit.timeit(check, number=number) / number * 1e6
+        print(f"{name}: {results[name]:.3f} us/call")
+    return results
+
+
+def benchmark_vec_board(batch_size: int = 4096, steps: int = 1000) -> float:
+    """
+    Measure the throughput of a VecBoard stepping random legal moves.
+    Args:
+        batch_size (int): The number of games played at the same time.
+        steps (int): The number of batched steps.
+    Returns:
+        float: Moves per second.
+    """
+    vec_board = VecBoard(batch_size, seed=0)
+    start = time.perf_counter()
+    for _ in range(steps):
+        vec_board.step(vec_board.random_legal_moves())
+    elapsed = time.perf_counter() - start
+    moves_per_second = batch_size * steps / elapsed
+    print(
+        f"VecBoard: {moves_per_second:,.0f} moves/s, {vec_board.games_finished / elapsed:,.0f} games/s"
+    )
+    return moves_per_second
+
+
+def benchmark_minimax_search() -> dict[str, tuple[int, float]]:
+    """
+    Compare the search modes of MiniMaxAgent on the replies to every first move.
+    Each mode starts with an empty transposition table.
+    Returns:
+        dict[str, tuple[int, float]]: Nodes visited and seconds per search mode.
+    """
+    results = {}
+    for search_mode in SearchMode:
+        agent = MiniMaxAgent(FieldState.O, 0, search_mode=search_mode)
+        nodes = 0
+        start = time.perf_counter()
+        for first_move in range(9):
+            board = Board()
+            board.push(first_move, FieldState.X)
+            agent.get_best_move(board)
+            nodes += agent.last_nodes_visited
+        results[search_mode] = (nodes, time.perf_counter() - start)
+        agent.close()
+        print(f"{search_mode}: {nodes} nodes in {results[search_mode][1]:.3f}s")
+    return results
+
+
+def benchmark_parallel_search(
+    size: int = 4, win_length: int = 4, max_depth: int = 8, n_workers: int | None = None
+) -> float:
+    """
+    Compare the parallel root search with the single-core alpha-beta search on a generalized board.
+    Both agents answer the same first moves, the worker pool is started before the clock runs.
+    Args:
+        size (int): The number of rows and columns.
+        win_length (int): The number of fields in a row needed to win.
+        max_depth (int): The search depth limit.
+        n_workers (int | None): The worker processes, None for one per core.
+    Returns:
+        float: The speedup of the parallel search.
+    """
+    times = {}
+    for search_mode in [SearchMode.ALPHA_BETA, SearchMode.PARALLEL]:
+        agent = MiniMaxAgent(
+            FieldState.O, 0, max_depth, search_mode=search_mode, n_workers=n_workers
+        )
+        warm_up_board = Board(size, win_length)
+        warm_up_board.push(0, FieldState.X)
+        warm_up_board.push(size * size - 1, FieldState.O)
+        warm_up_board.push(1, FieldState.X)
+        agent.get_best_move(warm_up_board)
+
+        nodes = 0
+        start = time.perf_counter()
+        for first_move in range(size * size):
+            board = Board(size, win_length)
+            board.push(first_move, FieldState.X)
+            agent.get_best_move(board)
+            nodes += agent.last_nodes_visited
+        times[search_mode] = time.perf_counter() - start
+        print(f"{search_mode}: {nodes} nodes in {times[search_mode]:.3f}s")
+        n_workers = agent.n_workers
+        agent.close()
+    speedup = times[SearchMode.ALPHA_BETA] / times[SearchMode.PARALLEL]
+    print(f"Parallel speedup with {n_workers} workers: {speedup:.2f}x")
+    return speedup
+
+
+def benchmark_mcts(
+    size: int = 3, win_length: int | None = None, n_playouts: int = 20_000
+) -> float:
+    """
+    Measure the playouts per second of MCTSAgent from the empty board.
+    Args:
+        size (int): The number of rows and columns.
+        win_length (int | None): The number of fields in a row needed to win, None for size.
+        n_playouts (int): The playouts of the search.
+    Returns:
+        float: Playouts per second.
+    """
+    agent = MCTSAgent(FieldState.X, 0, n_playouts=n_playouts, seed=0)
+    agent.get_best_move(Board(size, win_length))
+    print(f"MCTS {size}x{size}: {agent.last_playouts_per_second:,.0f} playouts/s")
+    return agent.last_playouts_per_second
+
+
+def benchmark_train_step(batch_size: int = 1000, steps: int = 20) -> float:
+    """
+    Measure QTrainer.train_step on long-memory sized batches of random transitions.
+    Args:
+        batch_size (int): The transitions per step, BATCH_SIZE of NNAgent by default.
+        steps (int): The number of measured steps.
+    Returns:
+        float: Training steps per second.
+    """
+    rng = random.Random(0)
+    states = tuple([rng.choice([-1, 0, 1]) for _ in range(9)] for _ in range(batch_size))
+    next_states = tuple(
+        [rng.choice([-1, 0, 1]) for _ in range(9)] for _ in range(batch_size)
+    )
+    actions = tuple(rng.randrange(9) for _ in range(batch_size))
+    rewards = tuple(float(rng.choice([-1, 1, 2])) for _ in range(batch_size))
+    dones = tuple(rng.random() < 0.2 for _ in range(batch_size))
+    trainer = QTrainer(NNModel_V2(), lr=0.001, gamma=0.9)
+    trainer.train_step(states, actions, rewards, next_states, dones)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        trainer.train_step(states, actions, rewards, next_states, dones)
+    steps_per_second = steps / (time.perf_counter() - start)
+    print(f"QTrainer: {steps_per_second:.1f} steps/s with batch size {batch_size}")
+    return steps_per_second
+
+
+def benchmark_training_schedules(games: int = 50) -> dict[str, dict[str, float]]:
+    """
+    Measure the per-move latency of NNAgent, including its training, for several schedules.
+    The agent plays X against the perfect solved-table agent.
+    Args:
+        games (int): The games per schedule.
+    Returns:
+        dict[str, dict[str, float]]: The latency stats in ms per schedule.
+    """
+    schedules = {
+        "every move": TrainingSchedule(),
+        "micro-batch 4, long every 10 games": TrainingSchedule(
+            short_memory_every=4, long_memory_every=10
+        ),
+        "long memory only": TrainingSchedule(short_memory_every=0),
+        "inference only": TrainingSchedule.inference_only(),
+    }
+    results = {}
+    for name, schedule in schedules.items():
+        torch.manual_seed(0)
+        agent = NNAgent(NNModel_V2(), FieldState.X, 0, schedule=schedule)
+        opponent = MiniMaxAgent(FieldState.O, 0, search_mode=SearchMode.SOLVED_TABLE)
+        board = Board()
+        for _ in range(games):
+            board.reset()
+            while not board.is_game_over():
+                if board.get_player_to_move() == FieldState.X:
+                    agent.perform_action(board)
+                else:
+                    opponent.perform_action(board)
+        results[name] = agent.get_latency_stats()
+        print(
+            f"{name}: mean {results[name]['mean']:.2f} ms, p50 {results[name]['p50']:.2f} ms, p95 {results[name]['p95']:.2f} ms, max {results[name]['max']:.2f} ms per move"
+        )
+    return results
+
+
+def benchmark_nn_inference(moves: int = 5000) -> dict[str, tuple[float, float]]:
+    """
+    Measure the per-move latency of NNAgent.get_best_move with and without the fast inference path.
+    Args:
+        moves (int): The measured calls per mode, after 500 warm-up calls.
+    Returns:
+        dict[str, tuple[float, float]]: p50 and p99 latency in microseconds per mode.
+    """
+    board = Board()
+    board.push(4, FieldState.X)
+    board.push(0, FieldState.O)
+    modes = {
+        "model with oracle": {},
+        "traced": {"trace": True},
+        "traced int8": {"trace": True, "quantize": True},
+    }
+    results = {}
+    for model_type in [NNModel_V1, NNModel_V2]:
+        for name, options in modes.items():
+            torch.manual_seed(0)
+            agent = NNAgent(model_type(), FieldState.X, 0)
+            if options:
+                agent.enable_fast_inference(**options)
+            latencies = []
+            for _ in range(500 + moves):
+                start = time.perf_counter()
+                agent.get_best_move(board)
+                latencies.append(time.perf_counter() - start)
+            latencies = np.array(latencies[500:]) * 1e6
+            key = f"{model_type.__name__} {name}"
+            results[key] = (
+                float(np.percentile(latencies, 50)),
+                float(np.percentile(latencies, 99)),
+            )
+            print(f"{key}: p50 {results[key][0]:.1f} us, p99 {results[key][1]:.1f} us")
+    return results
+
+
+def benchmark_inference_server(n_games: int = 32, games_per_thread: int = 20) -> float:
+    """
+    Compare concurrent games using their own batch-of-1 forward passes with games sharing an InferenceServer.
+    Args:
+        n_games (int): The games played at the same time, one thread each.
+        games_per_thread (int): The games each thread plays one after another.
+    Returns:
+        float: The speedup in moves per second with the server.
+    """
+    torch.manual_seed(0)
+    model = NNModel_V2().eval()
+
+    def run_threads(make_agent) -> float:
+        moves = [0] * n_games
+
+        def play(thread_index):
+            agents = {player: make_agent(player) for player in [FieldState.X, FieldState.O]}
+            board = Board()
+            for _ in range(games_per_thread):
+                board.reset()
+                while not board.is_game_over():
+                    agents[board.get_player_to_move()].perform_action(board)
+                    moves[thread_index] += 1
+
+        threads = [threading.Thread(target=play, args=(i,)) for i in range(n_games)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(moves) / (time.perf_counter() - start)
+
+    def make_nn_agent(player):
+        agent = NNAgent(model, player, 0, schedule=TrainingSchedule.inference_only())
+        agent.use_oracle = False
+        return agent
+
+    own_moves_per_second = run_threads(make_nn_agent)
+    with InferenceServer(model, max_batch_size=n_games) as server:
+        server_moves_per_second = run_threads(
+            lambda player: InferenceClientAgent(server, player)
+        )
+    speedup = server_moves_per_second / own_moves_per_second
+    print(
+        f"Inference server: {own_moves_per_second:,.0f} moves/s with own forward passes, {server_moves_per_second:,.0f} moves/s shared (batch {server.get_mean_batch_size():.1f}), {speedup:.2f}x"
+    )
+    return speedup
+
+
+def benchmark_self_play(
+    actor_counts: tuple[int, ...] = (1, 2, 4), train_steps: int = 200
+) -> dict[int, float]:
+    """
+    Measure the self-play games per second of the actor/learner mode for different numbers of actors.
+    Args:
+        actor_counts (tuple[int, ...]): The numbers of actor processes to compare.
+        train_steps (int): The training steps of the learner per run.
+    Returns:
+        dict[int, float]: Games per second by number of actors.
+    """
+    results = {}
+    for n_actors in actor_counts:
+        torch.manual_seed(0)
+        with SelfPlayLearner(NNModel_V2(), n_actors=n_actors, seed=0) as learner:
+            stats = learner.run(max_train_steps=train_steps)
+        results[n_actors] = stats["games_per_second"]
+        print(
+            f"Self-play with {n_actors} actors: {stats['games_per_second']:,.0f} games/s, {stats['train_steps_per_second']:,.1f} train steps/s"
+        )
+    return results
+
+
+def benchmark_tcp_self_play(n_actors: int = 2, train_steps: int = 200) -> dict[str, float]:
+    """
+    Measure the TCP self-play mode with the learner and the actors on localhost.
+    Args:
+        n_actors (int): The actors, one thread each.
+        train_steps (int): The training steps of the learner.
+    Returns:
+        dict[str, float]: The learner stats, with bytes per transition and the ingest rate.
+    """
+    torch.manual_seed(0)
+    with TcpLearner(NNModel_V2(), seed=0) as learner:
+        stop_event = threading.Event()
+        actors = [
+            TcpActor(NNModel_V2(), *learner.address, seed=actor_id)
+            for actor_id in range(n_actors)
+        ]
+        threads = [
+            threading.Thread(target=actor.run, kwargs={"stop_event": stop_event})
+            for actor in actors
+        ]
+        for thread in threads:
+            thread.start()
+        stats = learner.run(max_train_steps=train_steps)
+        stop_event.set()
+    for thread in threads:
+        thread.join()
+    raw_bytes = 2 * learner.n_fields + 2 + 4 + 1  # two int8 boards, int16 action, float32 reward, bool
+    print(
+        f"TCP self-play with {n_actors} actors: {stats['bytes_per_transition']:.2f} bytes/transition (raw {raw_bytes}), ingest {stats['transitions_per_second']:,.0f} transitions/s"
+    )
+    return stats
+
+
+def benchmark_model_loading(
+    board_sizes: tuple[int, ...] = (3, 15), number: int = 5
+) -> dict[int, tuple[float, float]]:
+    """
+    Compare loading a pickled module with loading a versioned state dict file memory-mapped.
+    Args:
+        board_sizes (tuple[int, ...]): The board sizes of the NNModel_V2 networks.
+        number (int): The loads per measurement.
+    Returns:
+        dict[int, tuple[float, float]]: Milliseconds per load (pickled module, mmap state dict) by board size.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for board_size in board_sizes:
+            model = NNModel_V2(board_size=board_size)
+            legacy_path = f"{directory}/legacy_{board_size}.pt"
+            path = f"{directory}/model_{board_size}.pt"
+            torch.save(model, legacy_path)
+            save_model(model, path)
+            load_model(path)  # warm up the weights_only unpickler
+            legacy_ms = (
+                timeit.timeit(lambda: torch.load(legacy_path, weights_only=False), number=number)
+                / number
+                * 1000
+            )
+            mmap_ms = timeit.timeit(lambda: load_model(path), number=number) / number * 1000
+            results[board_size] = (legacy_ms, mmap_ms)
+            print(
+                f"Model loading {board_size}x{board_size}: pickled module {legacy_ms:.2f} ms, mmap state dict {mmap_ms:.2f} ms"
+            )
+    return results
+
+
+def benchmark_symmetry_augmentation(
+    transitions: int = 100_000, batch_size: int = 1000, number: int = 200
+) -> tuple[float, float]:
+    """
+    Compare sampling a training batch from the replay buffer with and without symmetry augmentation.
+    Args:
+        transitions (int): The transitions in the buffer.
+        batch_size (int): The transitions per batch.
+        number (int): The batches per measurement.
+    Returns:
+        tuple[float, float]: Milliseconds per batch without and with augmentation.
+    """
+    vec_board = VecBoard(transitions, seed=0)
+    for _ in range(4):
+        vec_board.step(vec_board.random_legal_moves())
+    states = vec_board.flatten()
+    actions = vec_board.random_legal_moves()
+    results = []
+    for augment in (False, True):
+        buffer = ReplayBuffer(transitions, seed=0, augment=augment)
+        buffer.add_batch(states, actions, np.zeros(transitions), states, np.zeros(transitions))
+        results.append(
+            timeit.timeit(lambda: buffer.sample(batch_size), number=number) / number * 1000
+        )
+    print(
+        f"Replay sampling of {batch_size} transitions: {results[0]:.3f} ms, with symmetry augmentation {results[1]:.3f} ms"
+    )
+    return results[0], results[1]
+
+
+def main():
+    """Run all benchmarks."""
+    benchmark_board_checks()
+    benchmark_vec_board()
+    benchmark_minimax_search()
+    benchmark_parallel_search()
+    benchmark_mcts()
+    benchmark_train_step()
+    benchmark_training_schedules()
+    benchmark_nn_inference()
+    benchmark_inference_server()
+    benchmark_self_play()
+    benchmark_tcp_self_play()
+    benchmark_model_loading()
+    benchmark_symmetry_augmentation()
+
+
+if __name__ == "__main__":
+    main()
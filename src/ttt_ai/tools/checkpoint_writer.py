@@ -0,0 +1,238 @@
+import copy
+import threading
+import time
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+from ttt_ai.game.agent.model.model_file import get_architecture_id, make_model_payload
+from ttt_ai.tools.atomic_file import write_atomically
+
+DEFAULT_KEEP_LAST = 3
+DEFAULT_MIN_INTERVAL_S = 30.0
+CHECKPOINT_SUFFIX = ".pt"
+
+
+class CheckpointWriter:
+    """
+    Writes checkpoints of a model, its optimizer and its replay buffer on a background thread.
+    save takes a snapshot of the states in the calling thread (a memory copy), the disk I/O happens
+    on the writer thread. If a snapshot is still waiting when the next one arrives, only the newer one
+    is written. Checkpoints are written atomically and only the newest keep_last are kept.
+    A save within min_interval_s of the last one is deferred: only the latest deferred save is kept,
+    and close writes it with the states its objects have by then.
+    With a model_file the weights of every checkpoint are also written to that versioned model file
+    (see model_file.save_model), the file the players load.
+    """
+
+    def __init__(
+        self,
+        directory,
+        prefix: str = "checkpoint",
+        keep_last: int = DEFAULT_KEEP_LAST,
+        min_interval_s: float = DEFAULT_MIN_INTERVAL_S,
+        model_file=None,
+    ):
+        """
+        Args:
+            directory: The directory of the checkpoints, created if missing.
+            prefix (str): The start of the file names, followed by the sequence number.
+            keep_last (int): The number of checkpoints kept, older ones are deleted.
+            min_interval_s (float): The minimum time between two checkpoints, saves in between are deferred.
+            model_file: The model file updated with the weights of every checkpoint, None for none.
+        """
+        if keep_last < 1:
+            raise ValueError("At least 1 checkpoint must be kept.")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.keep_last = keep_last
+        self.min_interval_s = min_interval_s
+        self.model_file = Path(model_file) if model_file is not None else None
+        existing = self.list_checkpoints()
+        self.sequence = self._get_sequence(existing[-1]) + 1 if existing else 0
+        self.last_path = existing[-1] if existing else None
+        self.last_error = None
+        self.n_written = 0
+        self.n_skipped = 0  # saves within min_interval_s
+        self._deferred = None  # the arguments of the latest skipped save, written by close
+        self.n_replaced = 0  # snapshots overwritten before they were written
+        self._last_save_time = None
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_sequence(self, path: Path) -> int:
+        return int(path.stem[len(self.prefix) + 1 :])
+
+    def list_checkpoints(self) -> list[Path]:
+        """
+        Get the checkpoints of this writer in the directory.
+        Returns:
+            list[Path]: The files, oldest first.
+        """
+        paths = []
+        for path in self.directory.glob(f"{self.prefix}_*{CHECKPOINT_SUFFIX}"):
+            if path.stem[len(self.prefix) + 1 :].isdigit():
+                paths.append(path)
+        return sorted(paths, key=self._get_sequence)
+
+    def save(
+        self,
+        model: nn.Module,
+        optimizer: torch.optim.Optimizer | None = None,
+        replay_buffer=None,
+        metadata: dict | None = None,
+        training_step: int = 0,
+        force: bool = False,
+    ) -> bool:
+        """
+        Snapshot the states and queue them for writing.
+        Args:
+            model (nn.Module): The network.
+            optimizer (torch.optim.Optimizer | None): The optimizer, e.g. QTrainer.optimizer.
+            replay_buffer: A ReplayBuffer, its transitions are part of the checkpoint.
+            metadata (dict | None): Extra values stored with the checkpoint, e.g. the game number.
+            training_step (int): The training steps of the weights, stored in the model file.
+            force (bool): Save even if the last save is less than min_interval_s ago.
+        Returns:
+            bool: True if the snapshot was queued, False if it was deferred.
+        """
+        if self._closed:
+            raise RuntimeError("The checkpoint writer is closed.")
+        now = time.monotonic()
+        if (
+            not force
+            and self._last_save_time is not None
+            and now - self._last_save_time < self.min_interval_s
+        ):
+            self.n_skipped += 1
+            self._deferred = (model, optimizer, replay_buffer, metadata, training_step)
+            return False
+        self._deferred = None
+
+        snapshot = {
+            "model": {name: tensor.detach().clone() for name, tensor in model.state_dict().items()},
+            "optimizer": copy.deepcopy(optimizer.state_dict()) if optimizer is not None else None,
+            "replay_buffer": replay_buffer.state_dict() if replay_buffer is not None else None,
+            "metadata": {
+                "architecture": get_architecture_id(model),
+                "time": time.time(),
+                **(metadata or {}),
+            },
+        }
+        model_payload = (
+            make_model_payload(model, snapshot["model"], training_step, metadata)
+            if self.model_file is not None
+            else None
+        )
+        path = self.directory / f"{self.prefix}_{self.sequence:08d}{CHECKPOINT_SUFFIX}"
+        self.sequence += 1
+        self._last_save_time = now
+        with self._condition:
+            if self._pending is not None:
+                self.n_replaced += 1
+            self._pending = (snapshot, path, model_payload)
+            self._condition.notify_all()
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Wait until the queued snapshot is written.
+        Args:
+            timeout (float | None): The longest time to wait, None to wait until it is written.
+        Returns:
+            bool: True if nothing is left to write.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._pending is None and not self._busy, timeout
+            )
+
+    def close(self):
+        """
+        Write the latest deferred save and the queued snapshot, then stop the writer thread.
+        The deferred save is snapshotted here, call close from the thread that changes the states.
+        """
+        if self._deferred is not None and not self._closed:
+            self.save(*self._deferred, force=True)
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return  # closed and nothing left to write
+                snapshot, path, model_payload = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                write_atomically(snapshot, path)
+                self.last_path = path
+                self.n_written += 1
+                self._remove_old_checkpoints()
+                if model_payload is not None:
+                    write_atomically(model_payload, self.model_file)
+            except Exception as e:
+                self.last_error = e
+                print(f"Writing checkpoint {path} failed: {e}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _remove_old_checkpoints(self):
+        for path in self.list_checkpoints()[: -self.keep_last]:
+            path.unlink(missing_ok=True)
+
+
+def load_checkpoint(path) -> dict:
+    """
+    Load a checkpoint written by CheckpointWriter, only tensors and plain values are unpickled.
+    Args:
+        path: The checkpoint file.
+    Returns:
+        dict: The model, optimizer and replay_buffer states and the metadata.
+    """
+    return torch.load(path, weights_only=True)
+
+
+def restore_checkpoint(
+    path,
+    model: nn.Module,
+    optimizer: torch.optim.Optimizer | None = None,
+    replay_buffer=None,
+) -> dict:
+    """
+    Load a checkpoint into a model and optionally its optimizer and replay buffer.
+    Args:
+        path: The checkpoint file.
+        model (nn.Module): The network, of the architecture stored in the checkpoint.
+        optimizer (torch.optim.Optimizer | None): The optimizer of the model.
+        replay_buffer: The ReplayBuffer to fill with the stored transitions.
+    Returns:
+        dict: The metadata of the checkpoint.
+    """
+    checkpoint = load_checkpoint(path)
+    model.load_state_dict(checkpoint["model"])
+    if optimizer is not None and checkpoint["optimizer"] is not None:
+        optimizer.load_state_dict(checkpoint["optimizer"])
+    if replay_buffer is not None and checkpoint["replay_buffer"] is not None:
+        replay_buffer.load_state_dict(checkpoint["replay_buffer"])
+    return checkpoint["metadata"]
@@ -1,8 +1,12 @@
+import random
+import time
 import unittest
 
 from pyautogui import Point
 
-from ttt_ai.game.agent.minimax_agent import MiniMaxAgent
+from ttt_ai.game.agent.minimax_agent import MiniMaxAgent, SearchMode
+from ttt_ai.game.agent.solved_table import load_solved_table
+from ttt_ai.game.agent.transposition_table import TranspositionTable
 from ttt_ai.game.board import Board
 from ttt_ai.game.field import FieldState
 
@@ -249,3 +253,220 @@ class TestPlayWinLossRatio(unittest.TestCase):
         self.agent.games_lost = -2
         print("Testing win/loss ratio with -2 wins and -2 losses.")
         self.assertEqual(self.agent.get_wl_ratio(), 0.0)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_lru_eviction(self):
+        table = TranspositionTable(2)
+        table.put("a", 1)
+        table.put("b", 2)
+        self.assertEqual(table.get("a"), 1)
+        table.put("c", 3)
+        print("Testing that the least recently used entry is evicted.")
+        self.assertIsNone(table.get("b"))
+        self.assertEqual(table.get("a"), 1)
+        self.assertEqual(table.get("c"), 3)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.evictions, 1)
+        self.assertEqual(table.hits, 3)
+        self.assertEqual(table.misses, 1)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            TranspositionTable(0)
+
+    def test_table_persists_across_moves(self):
+        agent = MiniMaxAgent(FieldState.O, 0)
+        board = Board()
+        board[0, 0].state = FieldState.X
+        first_move = agent.get_best_move(board)
+        misses = agent.transposition_table.misses
+        self.assertGreater(misses, 0)
+        self.assertEqual(agent.get_best_move(board), first_move)
+        print("Testing that a repeated search is answered from the table.")
+        self.assertEqual(agent.transposition_table.misses, misses)
+        self.assertGreater(agent.transposition_table.hits, 0)
+
+    def test_small_table_gives_same_moves(self):
+        agent = MiniMaxAgent(FieldState.X, 0)
+        bounded_agent = MiniMaxAgent(FieldState.X, 0, transposition_table=TranspositionTable(10))
+        board = Board()
+        for index in [4, 0, 8]:
+            board.push(index, FieldState.O if index == 4 else FieldState.X)
+            self.assertEqual(
+                bounded_agent.get_best_move(board), agent.get_best_move(board)
+            )
+        self.assertGreater(bounded_agent.transposition_table.evictions, 0)
+
+    def test_shared_table_separates_win_lengths(self):
+        cases = {
+            SearchMode.MINIMAX: [12, 15, 6, 0, 4, 8, 7, 13],
+            SearchMode.ALPHA_BETA: [8, 11, 5, 12, 14, 10, 15, 0],
+            SearchMode.ITERATIVE_DEEPENING: [14, 13, 8, 12, 7, 11, 15, 3],
+        }
+        for search_mode, moves in cases.items():
+            short_board, long_board = Board(4, 3), Board(4, 4)
+            for board in (short_board, long_board):
+                for index in moves:
+                    board.push(index)
+            player = long_board.get_player_to_move()
+            shared_agent = MiniMaxAgent(
+                player, 0, search_mode=search_mode, transposition_table=TranspositionTable()
+            )
+            shared_agent.get_best_move(short_board)
+            fresh_agent = MiniMaxAgent(player, 0, search_mode=search_mode)
+            self.assertEqual(
+                shared_agent.get_best_move(long_board), fresh_agent.get_best_move(long_board)
+            )
+
+
+class TestMiniMaxAlphaBeta(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+
+    def _push_all(self, x_indices, o_indices):
+        for index in x_indices:
+            self.board.push(index, FieldState.X)
+        for index in o_indices:
+            self.board.push(index, FieldState.O)
+
+    def test_prefers_faster_win(self):
+        # X can win at once on 8, playing 3 wins two moves later
+        self._push_all([0, 4], [1, 2])
+        plain_agent = MiniMaxAgent(FieldState.X, 0)
+        alpha_beta_agent = MiniMaxAgent(FieldState.X, 0, search_mode=SearchMode.ALPHA_BETA)
+        print("Testing that depth-aware scores prefer the immediate win.")
+        self.assertEqual(plain_agent.get_best_move(self.board), 3)
+        self.assertEqual(alpha_beta_agent.get_best_move(self.board), 8)
+
+    def test_blocks_opponent(self):
+        self._push_all([0, 8], [4, 1])
+        agent = MiniMaxAgent(FieldState.X, 0, search_mode=SearchMode.ALPHA_BETA)
+        self.assertEqual(agent.get_best_move(self.board), 7)
+
+    def test_same_value_as_minimax(self):
+        random.seed(7)
+        for _ in range(50):
+            self.board.reset()
+            for _ in range(random.randint(1, 6)):
+                if self.board.is_game_over():
+                    break
+                self.board.push(self.board.get_flat_index_of_radom_free_field())
+            if self.board.is_game_over():
+                continue
+            player = self.board.get_player_to_move()
+            plain_agent = MiniMaxAgent(player, 0)
+            alpha_beta_agent = MiniMaxAgent(player, 0, search_mode=SearchMode.ALPHA_BETA)
+            values = []
+            for agent in [plain_agent, alpha_beta_agent]:
+                move = agent.get_best_move(self.board)
+                self.board.push(move, player)
+                values.append(MiniMaxAgent(player, 0)._minimax(self.board.bit_board, 0, False))
+                self.board.pop()
+            self.assertEqual(values[0], values[1])
+
+    def test_visits_fewer_nodes(self):
+        self.board.push(0, FieldState.X)
+        plain_agent = MiniMaxAgent(FieldState.O, 0)
+        alpha_beta_agent = MiniMaxAgent(FieldState.O, 0, search_mode=SearchMode.ALPHA_BETA)
+        plain_agent.get_best_move(self.board)
+        alpha_beta_agent.get_best_move(self.board)
+        print(
+            f"Testing nodes visited: minimax {plain_agent.last_nodes_visited}, alpha-beta {alpha_beta_agent.last_nodes_visited}."
+        )
+        self.assertLess(
+            alpha_beta_agent.last_nodes_visited, plain_agent.last_nodes_visited
+        )
+
+
+class TestMiniMaxIterativeDeepening(unittest.TestCase):
+    def test_optimal_on_small_board(self):
+        table = load_solved_table()
+        random.seed(11)
+        board = Board()
+        for _ in range(30):
+            board.reset()
+            for _ in range(random.randint(0, 6)):
+                if board.is_game_over():
+                    break
+                board.push(board.get_flat_index_of_radom_free_field())
+            if board.is_game_over():
+                continue
+            player = board.get_player_to_move()
+            agent = MiniMaxAgent(
+                player, 0, search_mode=SearchMode.ITERATIVE_DEEPENING, time_budget_ms=10_000
+            )
+            move = agent.get_best_move(board)
+            _, _, move_mask = table.lookup(
+                board.bit_board.x_bits, board.bit_board.o_bits, player
+            )
+            self.assertTrue(move_mask >> move & 1)
+            self.assertGreater(agent.last_search_depth, 0)
+
+    def test_respects_time_budget(self):
+        board = Board(size=5, win_length=4)
+        board.push(12, FieldState.X)
+        agent = MiniMaxAgent(
+            FieldState.O, 0, search_mode=SearchMode.ITERATIVE_DEEPENING, time_budget_ms=50
+        )
+        start = time.perf_counter()
+        move = agent.get_best_move(board)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"Testing time budget: {elapsed_ms:.0f} ms, depth {agent.last_search_depth}, {agent.last_nodes_per_second:,.0f} nodes/s."
+        )
+        self.assertFalse(board.bit_board.occupied_mask() >> move & 1)
+        self.assertGreaterEqual(agent.last_search_depth, 1)
+        self.assertLess(agent.last_search_depth, 24)
+        self.assertLess(elapsed_ms, 500)
+        self.assertGreater(agent.last_nodes_per_second, 0)
+        # The aborted iteration must leave the board as it was
+        self.assertEqual(board.bit_board.empty_count, 24)
+
+    def test_invalid_time_budget(self):
+        with self.assertRaises(ValueError):
+            MiniMaxAgent(search_mode=SearchMode.ITERATIVE_DEEPENING, time_budget_ms=0)
+
+
+class TestMiniMaxParallel(unittest.TestCase):
+    def test_same_value_as_alpha_beta(self):
+        board = Board(size=4, win_length=3)
+        for index in [5, 6, 9]:
+            board.push(index)
+        player = board.get_player_to_move()
+        parallel_agent = MiniMaxAgent(
+            player, 0, 5, search_mode=SearchMode.PARALLEL, n_workers=2
+        )
+        try:
+            values = []
+            for agent in [
+                MiniMaxAgent(player, 0, 5, search_mode=SearchMode.ALPHA_BETA),
+                parallel_agent,
+            ]:
+                move = agent.get_best_move(board)
+                board.push(move, player)
+                values.append(
+                    MiniMaxAgent(player, 0, 4, search_mode=SearchMode.ALPHA_BETA)._alpha_beta(
+                        board.bit_board, 0, False, float("-inf"), float("inf")
+                    )
+                )
+                board.pop()
+            print(f"Testing parallel search values {values}.")
+            self.assertEqual(values[0], values[1])
+            self.assertGreater(parallel_agent.last_nodes_visited, 0)
+        finally:
+            parallel_agent.close()
+
+    def test_optimal_on_small_board(self):
+        table = load_solved_table()
+        board = Board()
+        board.push(0, FieldState.X)
+        board.push(4, FieldState.O)
+        board.push(8, FieldState.X)
+        agent = MiniMaxAgent(FieldState.O, 0, search_mode=SearchMode.PARALLEL, n_workers=2)
+        try:
+            move = agent.get_best_move(board)
+        finally:
+            agent.close()
+        _, _, move_mask = table.lookup(board.bit_board.x_bits, board.bit_board.o_bits, FieldState.O)
+        self.assertTrue(move_mask >> move & 1)
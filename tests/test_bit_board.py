@@ -0,0 +1,81 @@
+import random
+import unittest
+
+from ttt_ai.game.bit_board import BitBoard, WIN_MASKS
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import Field, FieldState
+
+
+class TestBitBoardWinMasks(unittest.TestCase):
+    def test_win_masks_are_lines(self):
+        board = Board()
+        lines = [board.get_row(i) for i in range(3)]
+        lines += [board.get_column(i) for i in range(3)]
+        lines += [board.get_diagonal(i) for i in range(2)]
+        for mask, line in zip(WIN_MASKS, lines):
+            for field in line:
+                field.state = FieldState.X
+            print(f"Testing win mask {mask:09b}.")
+            self.assertEqual(board.bit_board.x_bits, mask)
+            board.reset()
+
+    def test_is_winner(self):
+        for mask in WIN_MASKS:
+            bit_board = BitBoard(mask, 0)
+            self.assertTrue(bit_board.is_winner(FieldState.X))
+            self.assertFalse(bit_board.is_winner(FieldState.O))
+            self.assertTrue(bit_board.is_game_over())
+        self.assertFalse(BitBoard(0b000000011, 0b000000100).is_winner(FieldState.X))
+        self.assertFalse(BitBoard().is_winner(FieldState.EMPTY))
+
+
+class TestBitBoardFields(unittest.TestCase):
+    def test_set_and_get_state(self):
+        bit_board = BitBoard()
+        bit_board.set_state(4, FieldState.X)
+        bit_board.set_state(0, FieldState.O)
+        self.assertEqual(bit_board.get_state(4), FieldState.X)
+        self.assertEqual(bit_board.get_state(0), FieldState.O)
+        self.assertEqual(bit_board.get_state(8), FieldState.EMPTY)
+        bit_board.set_state(4, FieldState.O)
+        self.assertEqual(bit_board.x_bits, 0)
+        bit_board.set_state(4, FieldState.EMPTY)
+        self.assertEqual(bit_board.o_bits, 1)
+        with self.assertRaises(TypeError):
+            bit_board.set_state(1, None)
+
+    def test_empty_indices(self):
+        bit_board = BitBoard(0b100000001, 0b000010000)
+        self.assertEqual(bit_board.empty_indices(), [1, 2, 3, 5, 6, 7])
+        self.assertFalse(bit_board.is_empty())
+        self.assertFalse(bit_board.is_full())
+        self.assertTrue(BitBoard().is_empty())
+        self.assertTrue(BitBoard(0b101010101, 0b010101010).is_full())
+
+
+class TestBitBoardSync(unittest.TestCase):
+    def test_board_matches_fields(self):
+        board = Board()
+        state_map = {FieldState.EMPTY: -1, FieldState.X: 0, FieldState.O: 1}
+        for _ in range(100):
+            for row in range(board.BOARD_SIZE):
+                for col in range(board.BOARD_SIZE):
+                    board[row, col].state = random.choice(list(FieldState))
+            expected = [state_map[field.state] for row in board.fields for field in row]
+            self.assertEqual(board.flatten(), expected)
+
+    def test_replaced_field_is_bound(self):
+        board = Board()
+        board[1, 1].state = FieldState.X
+        board[1, 1] = Field()
+        self.assertTrue(board.is_empty())
+        board[1, 1].state = FieldState.O
+        self.assertEqual(board.bit_board.o_bits, 1 << 4)
+
+    def test_replaced_field_is_unbound(self):
+        board = Board()
+        stale = board[1, 1]
+        board[1, 1] = Field()
+        stale.state = FieldState.X
+        self.assertTrue(board.is_empty())
+        self.assertEqual(board[1, 1].state, FieldState.EMPTY)
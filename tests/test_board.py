@@ -360,3 +360,148 @@ class TestBoardGetFlatIndexOfRandomFreeField(unittest.TestCase):
         self.assertIsInstance(idx, int)
         self.assertGreaterEqual(idx, 0)
         self.assertLess(idx, board.BOARD_SIZE * board.BOARD_SIZE)
+
+
+class TestBoardPushPop(unittest.TestCase):
+    def test_push_pop_restores_board(self):
+        board = Board()
+        board.push(4)
+        board.push(0)
+        self.assertEqual(board[1, 1].state, FieldState.X)
+        self.assertEqual(board[0, 0].state, FieldState.O)
+        self.assertEqual(board.get_player_to_move(), FieldState.X)
+        self.assertEqual(board.pop(), 0)
+        self.assertEqual(board[0, 0].state, FieldState.EMPTY)
+        self.assertEqual(board.get_player_to_move(), FieldState.O)
+        self.assertEqual(board.pop(), 4)
+        self.assertTrue(board.is_empty())
+
+    def test_push_occupied_field(self):
+        board = Board()
+        board.push(4)
+        with self.assertRaises(ValueError):
+            board.push(4)
+
+    def test_push_winning_move(self):
+        board = Board()
+        for index in [0, 3, 1, 4]:
+            board.push(index)
+        self.assertIsNone(board.get_winner())
+        board.push(2)
+        print("Testing cached winner after a winning push.")
+        self.assertEqual(board.get_winner(), FieldState.X)
+        self.assertTrue(board.is_game_over())
+        board.pop()
+        self.assertIsNone(board.get_winner())
+        self.assertFalse(board.is_game_over())
+
+    def test_cached_status_matches_scan(self):
+        board = Board()
+        for _ in range(200):
+            board.reset()
+            moves = random.sample(range(9), random.randint(0, 9))
+            for index in moves:
+                if board.is_game_over():
+                    break
+                board.push(index)
+            for _ in range(random.randint(0, 3)):
+                row, col = random.randrange(3), random.randrange(3)
+                board[row, col].state = random.choice(list(FieldState))
+            expected_winner = None
+            if board.is_winner(FieldState.X):
+                expected_winner = FieldState.X
+            elif board.is_winner(FieldState.O):
+                expected_winner = FieldState.O
+            if expected_winner is None:
+                self.assertIsNone(board.get_winner())
+            else:
+                self.assertIn(board.get_winner(), [FieldState.X, FieldState.O])
+                self.assertTrue(board.is_winner(board.get_winner()))
+            self.assertEqual(
+                board.is_board_full(),
+                all(field.state != FieldState.EMPTY for row in board.fields for field in row),
+            )
+
+
+class TestGeneralizedBoard(unittest.TestCase):
+    def test_five_by_five_four_in_a_row(self):
+        board = Board(5, 4)
+        self.assertEqual(board.BOARD_SIZE, 5)
+        self.assertEqual(board.WIN_LENGTH, 4)
+        self.assertEqual(len(board.flatten()), 25)
+        for col in range(3):
+            board[2, col + 1].state = FieldState.X
+        self.assertIsNone(board.get_winner())
+        board[2, 4].state = FieldState.X
+        print("Testing four in a row on a 5x5 board.")
+        self.assertEqual(board.get_winner(), FieldState.X)
+
+    def test_anti_diagonal(self):
+        board = Board(5, 4)
+        for i in range(4):
+            board.push(board.get_flat_index(i, 3 - i), FieldState.O)
+        self.assertTrue(board.is_winner(FieldState.O))
+        self.assertEqual(board.get_winner(), FieldState.O)
+        self.assertEqual(
+            [f.state for f in board.get_diagonal(1)],
+            [board[i, 4 - i].state for i in range(5)],
+        )
+
+    def test_gomoku_cached_status_matches_scan(self):
+        board = Board(15, 5)
+        for _ in range(20):
+            board.reset()
+            while not board.is_game_over():
+                board.push(board.get_flat_index_of_radom_free_field())
+            winner = board.get_winner()
+            if winner is None:
+                self.assertTrue(board.is_board_full())
+            else:
+                self.assertTrue(board.is_winner(winner))
+            other = FieldState.O if winner == FieldState.X else FieldState.X
+            self.assertFalse(winner is not None and board.is_winner(other))
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            Board(3, 4)
+        with self.assertRaises(ValueError):
+            Board(5, 0)
+        board = Board(4)
+        with self.assertRaises(ValueError):
+            board.get_row(4)
+        with self.assertRaises(ValueError):
+            board.get_field_by_flat_index(16)
+
+
+class TestBoardZobristHash(unittest.TestCase):
+    def test_hash_matches_recomputed_hash(self):
+        board = Board()
+        self.assertEqual(board.get_hash(), 0)
+        for _ in range(200):
+            action = random.random()
+            if action < 0.4 and not board.is_board_full():
+                board.push(board.get_flat_index_of_radom_free_field())
+            elif action < 0.6 and board.bit_board.move_stack:
+                board.pop()
+            elif action < 0.95:
+                row, col = random.randrange(3), random.randrange(3)
+                board[row, col].state = random.choice(list(FieldState))
+                board.bit_board.move_stack.clear()
+            else:
+                board.reset()
+            self.assertEqual(board.get_hash(), board.bit_board._compute_hash())
+
+    def test_equal_positions_equal_hash(self):
+        board_a = Board()
+        board_b = Board()
+        for index in [0, 4, 8]:
+            board_a.push(index)
+        board_b[2, 2].state = FieldState.X
+        board_b[1, 1].state = FieldState.O
+        board_b[0, 0].state = FieldState.X
+        print("Testing equal hashes for positions reached in different order.")
+        self.assertEqual(board_a.get_hash(), board_b.get_hash())
+        board_b[1, 1].state = FieldState.X
+        self.assertNotEqual(board_a.get_hash(), board_b.get_hash())
+        board_a.reset()
+        self.assertEqual(board_a.get_hash(), 0)
@@ -0,0 +1,138 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import torch
+
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.game.agent.nn_agent import NNAgent
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+from ttt_ai.tools import checkpoint_writer
+from ttt_ai.tools.checkpoint_writer import CheckpointWriter, load_checkpoint, restore_checkpoint
+
+
+def play_game(agent):
+    board = Board()
+    while not board.is_game_over():
+        if board.get_player_to_move() == agent.FIELD_STATE_TYPE:
+            agent.perform_action(board)
+        else:
+            board.push(board.get_flat_index_of_radom_free_field())
+
+
+class TestCheckpointWriter(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.directory = tempfile.TemporaryDirectory()
+        self.agent = NNAgent(NNModel_V1(), FieldState.X, 0)
+        play_game(self.agent)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_restores_model_optimizer_and_memory(self):
+        with CheckpointWriter(self.directory.name, min_interval_s=0) as writer:
+            self.assertTrue(
+                writer.save(
+                    self.agent.model,
+                    self.agent.trainer.optimizer,
+                    self.agent.memory,
+                    metadata={"game": 1},
+                )
+            )
+        self.assertEqual(writer.n_written, 1)
+        self.assertIsNone(writer.last_error)
+
+        restored = NNAgent(NNModel_V1(), FieldState.X, 0)
+        metadata = restore_checkpoint(
+            writer.last_path, restored.model, restored.trainer.optimizer, restored.memory
+        )
+        print(f"Testing checkpoint restore: {writer.last_path.name}, metadata {metadata}.")
+        self.assertEqual(metadata["game"], 1)
+        self.assertEqual(metadata["architecture"], "nn_v1")
+        for name, tensor in self.agent.model.state_dict().items():
+            self.assertTrue(torch.equal(tensor, restored.model.state_dict()[name]))
+        self.assertEqual(
+            restored.trainer.optimizer.state_dict()["state"].keys(),
+            self.agent.trainer.optimizer.state_dict()["state"].keys(),
+        )
+        self.assertEqual(len(restored.memory), len(self.agent.memory))
+
+    def test_snapshot_ignores_later_training(self):
+        release = threading.Event()
+        original = checkpoint_writer.write_atomically
+
+        def slow_write(payload, path):
+            release.wait(5)
+            original(payload, path)
+
+        with mock.patch.object(checkpoint_writer, "write_atomically", slow_write):
+            writer = CheckpointWriter(self.directory.name, min_interval_s=0)
+            expected = {k: v.clone() for k, v in self.agent.model.state_dict().items()}
+            writer.save(self.agent.model)
+            # The game loop goes on training while the checkpoint waits for the disk
+            with torch.no_grad():
+                for param in self.agent.model.parameters():
+                    param.add_(1.0)
+            release.set()
+            writer.close()
+        stored = load_checkpoint(writer.last_path)["model"]
+        for name, tensor in expected.items():
+            self.assertTrue(torch.equal(tensor, stored[name]))
+
+    def test_interval_and_keep_last(self):
+        writer = CheckpointWriter(self.directory.name, keep_last=2, min_interval_s=3600)
+        self.assertTrue(writer.save(self.agent.model))
+        self.assertFalse(writer.save(self.agent.model))
+        self.assertEqual(writer.n_skipped, 1)
+        for _ in range(3):
+            writer.save(self.agent.model, force=True)
+            writer.flush()
+        writer.close()
+        names = [path.name for path in writer.list_checkpoints()]
+        self.assertEqual(names, ["checkpoint_00000002.pt", "checkpoint_00000003.pt"])
+        self.assertEqual(list(Path(self.directory.name).glob("*.tmp")), [])
+
+        # A new writer continues the numbering and finds the newest checkpoint
+        writer = CheckpointWriter(self.directory.name)
+        self.assertEqual(writer.last_path.name, "checkpoint_00000003.pt")
+        self.assertEqual(writer.sequence, 4)
+        writer.close()
+
+    def test_failed_write_keeps_old_checkpoint(self):
+        writer = CheckpointWriter(self.directory.name, min_interval_s=0)
+        writer.save(self.agent.model)
+        writer.flush()
+        first = writer.last_path
+        with mock.patch.object(torch, "save", side_effect=OSError("disk full")):
+            writer.save(self.agent.model)
+            writer.flush()
+        writer.close()
+        self.assertIsInstance(writer.last_error, OSError)
+        self.assertEqual(writer.list_checkpoints(), [first])
+        self.assertEqual(list(Path(self.directory.name).glob("*.tmp")), [])
+
+    def test_updates_model_file(self):
+        model_file = Path(self.directory.name) / "nn_agent_v1_weights.pt"
+        with CheckpointWriter(
+            Path(self.directory.name) / "checkpoints", min_interval_s=0, model_file=model_file
+        ) as writer:
+            writer.save(self.agent.model, training_step=self.agent.trainer.steps)
+        loaded = NNAgent(NNModel_V1(), FieldState.X, 0)
+        loaded.load_weights(str(model_file))
+        self.assertEqual(loaded.trainer.steps, self.agent.trainer.steps)
+        for name, tensor in self.agent.model.state_dict().items():
+            self.assertTrue(torch.equal(tensor, loaded.model.state_dict()[name]))
+
+    def test_close_writes_deferred_save(self):
+        writer = CheckpointWriter(self.directory.name, min_interval_s=3600)
+        writer.save(self.agent.model, metadata={"game": 1})
+        writer.flush()
+        self.assertFalse(writer.save(self.agent.model, metadata={"game": 2}))
+        self.assertFalse(writer.save(self.agent.model, metadata={"game": 3}))
+        writer.close()
+        self.assertEqual(writer.n_written, 2)
+        self.assertEqual(load_checkpoint(writer.last_path)["metadata"]["game"], 3)
@@ -0,0 +1,103 @@
+import threading
+import unittest
+
+import numpy as np
+import torch
+
+from ttt_ai.game.agent.inference_server import InferenceClientAgent, InferenceServer
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+from ttt_ai.game.vec_board import X, VecBoard
+
+
+class TestInferenceServer(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.model = NNModel_V1().eval()
+
+    def test_results_match_model(self):
+        boards = np.random.default_rng(0).integers(-1, 2, size=(20, 9)).astype(np.float32)
+        with InferenceServer(self.model, max_batch_size=8, max_wait_ms=50) as server:
+            futures = [server.submit(board) for board in boards]
+            scores = np.stack([future.result(timeout=5) for future in futures])
+        with torch.no_grad():
+            expected = self.model(torch.from_numpy(boards)).numpy()
+        self.assertTrue(np.allclose(scores, expected, atol=1e-5))
+        print(f"Testing batching: {server.n_requests} requests in {server.n_batches} batches.")
+        self.assertEqual(server.n_requests, 20)
+        self.assertLessEqual(server.n_batches, 5)
+
+    def test_timeout_flushes_single_request(self):
+        with InferenceServer(self.model, max_batch_size=64, max_wait_ms=1) as server:
+            scores = server.submit([-1] * 9).result(timeout=5)
+        self.assertEqual(scores.shape, (9,))
+        self.assertEqual(server.n_batches, 1)
+
+    def test_submit_requires_running_server(self):
+        server = InferenceServer(self.model)
+        with self.assertRaises(RuntimeError):
+            server.submit([-1] * 9)
+        server.stop()  # stopping a stopped server does nothing
+
+    def test_malformed_board_fails_only_its_batch(self):
+        with InferenceServer(self.model, max_batch_size=1, max_wait_ms=1) as server:
+            with self.assertRaises(ValueError):
+                server.submit([-1] * 5).result(timeout=5)
+            scores = server.submit([-1] * 9).result(timeout=5)
+        self.assertEqual(scores.shape, (9,))
+
+    def test_requests_racing_stop_are_resolved(self):
+        server = InferenceServer(self.model, max_batch_size=4, max_wait_ms=1)
+        server.start()
+        futures = []
+
+        def submit_until_stopped():
+            while True:
+                try:
+                    futures.append(server.submit([-1] * 9))
+                except RuntimeError:
+                    return
+
+        thread = threading.Thread(target=submit_until_stopped)
+        thread.start()
+        server.stop()
+        thread.join()
+        print(f"Testing shutdown: {len(futures)} requests resolved while stopping.")
+        for future in futures:
+            self.assertEqual(future.result(timeout=5).shape, (9,))
+
+    def test_concurrent_games_share_batches(self):
+        with InferenceServer(self.model, max_batch_size=16, max_wait_ms=20) as server:
+            errors = []
+
+            def play_game():
+                try:
+                    board = Board()
+                    agents = {
+                        FieldState.X: InferenceClientAgent(server, FieldState.X),
+                        FieldState.O: InferenceClientAgent(server, FieldState.O),
+                    }
+                    while not board.is_game_over():
+                        agents[board.get_player_to_move()].perform_action(board)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=play_game) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertGreater(server.get_mean_batch_size(), 1)
+
+    def test_client_get_best_moves(self):
+        vec_board = VecBoard(32, seed=0)
+        vec_board.step(vec_board.random_legal_moves())
+        vec_board.step(vec_board.random_legal_moves())
+        with InferenceServer(self.model, max_batch_size=32) as server:
+            agent = InferenceClientAgent(server, FieldState.X)
+            rows = vec_board.current_player == X
+            moves = agent.get_best_moves(vec_board, rows)
+        legal = vec_board.legal_move_mask()[rows]
+        self.assertTrue(legal[np.arange(len(moves)), moves].all())
@@ -0,0 +1,95 @@
+import unittest
+
+from ttt_ai.game.agent.mcts_agent import MCTSAgent
+from ttt_ai.game.agent.minimax_agent import MiniMaxAgent, SearchMode
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+
+
+class TestMCTSAgent(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+
+    def _push_all(self, moves):
+        for index in moves:
+            self.board.push(index)
+
+    def test_takes_win(self):
+        # X: 0, 1 and O: 3, 4, X wins on 2
+        self._push_all([0, 3, 1, 4])
+        agent = MCTSAgent(FieldState.X, 0, n_playouts=500, seed=1)
+        self.assertEqual(agent.get_best_move(self.board), 2)
+
+    def test_blocks_opponent(self):
+        # X: 0, 1 and O: 4, O must block on 2
+        self._push_all([0, 4, 1])
+        agent = MCTSAgent(FieldState.O, 0, n_playouts=1000, seed=2)
+        self.assertEqual(agent.get_best_move(self.board), 2)
+
+    def test_does_not_change_board(self):
+        self._push_all([4])
+        agent = MCTSAgent(FieldState.O, 0, n_playouts=200, seed=3)
+        agent.get_best_move(self.board)
+        self.assertEqual(self.board.bit_board.x_bits, 1 << 4)
+        self.assertEqual(self.board.bit_board.o_bits, 0)
+        self.assertEqual(len(self.board.bit_board.move_stack), 1)
+
+    def test_tree_reuse(self):
+        agent = MCTSAgent(FieldState.X, 0, n_playouts=500, seed=4)
+        move = agent.get_best_move(self.board)
+        self.assertEqual(agent.last_reused_visits, 0)
+        self.board.push(move, FieldState.X)
+        self.board.push(self.board.get_flat_index_of_radom_free_field(), FieldState.O)
+        agent.get_best_move(self.board)
+        print(f"Testing tree reuse: {agent.last_reused_visits} visits kept.")
+        self.assertGreater(agent.last_reused_visits, 0)
+        self.assertGreater(agent.last_playouts_per_second, 0)
+
+    def test_draws_against_perfect_play(self):
+        for mcts_player in [FieldState.X, FieldState.O]:
+            minimax_player = FieldState.O if mcts_player == FieldState.X else FieldState.X
+            agents = {
+                mcts_player: MCTSAgent(mcts_player, 0, n_playouts=3000, seed=5),
+                minimax_player: MiniMaxAgent(
+                    minimax_player, 0, search_mode=SearchMode.SOLVED_TABLE
+                ),
+            }
+            self.board.reset()
+            while not self.board.is_game_over():
+                agents[self.board.get_player_to_move()].perform_action(self.board)
+            print(f"Testing MCTS as {mcts_player} against perfect play.")
+            self.assertIsNone(self.board.get_winner())
+
+    def test_time_budget_on_large_board(self):
+        board = Board(size=5, win_length=4)
+        board.push(12, FieldState.X)
+        agent = MCTSAgent(FieldState.O, 0, time_budget_ms=50, seed=6)
+        move = agent.get_best_move(board)
+        self.assertFalse(board.bit_board.occupied_mask() >> move & 1)
+        self.assertGreater(agent.last_playouts, 0)
+
+    def test_seed_reproduces_exploring_games(self):
+        def play(seed):
+            agents = {
+                player: MCTSAgent(player, 0.5, n_playouts=50, seed=seed + i)
+                for i, player in enumerate((FieldState.X, FieldState.O))
+            }
+            board = Board()
+            moves = []
+            while not board.is_game_over():
+                move = agents[board.get_player_to_move()].get_best_move(board)
+                board.push(move)
+                moves.append(move)
+            return moves, sum(agent.n_invalid_move for agent in agents.values())
+
+        moves, n_random = play(7)
+        print(f"Testing seeded exploration: {moves} with {n_random} random moves.")
+        self.assertGreater(n_random, 0)
+        for _ in range(3):
+            self.assertEqual(play(7), (moves, n_random))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            MCTSAgent(n_playouts=0)
+        with self.assertRaises(ValueError):
+            MCTSAgent(time_budget_ms=0)
@@ -0,0 +1,102 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import torch
+
+from ttt_ai.game.agent.model.model_file import (
+    FORMAT_VERSION,
+    is_legacy_model_file,
+    load_model,
+    migrate_model_file,
+    save_model,
+)
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.game.agent.model.NNModel_V2 import NNModel_V2
+from ttt_ai.game.agent.nn_agent import NNAgent
+from ttt_ai.game.field import FieldState
+
+
+class TestModelFile(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "model.pt"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_same_weights(self, expected, actual):
+        for name, tensor in expected.state_dict().items():
+            self.assertTrue(torch.equal(tensor, actual.state_dict()[name]))
+
+    def test_round_trip(self):
+        model = NNModel_V2(board_size=4)
+        save_model(model, self.path, training_step=12, metadata={"games": 3})
+        for mmap in (False, True):
+            loaded, header = load_model(self.path, mmap=mmap)
+            self.assertIsInstance(loaded, NNModel_V2)
+            self.assertEqual(loaded.board_size, 4)
+            self.assert_same_weights(model, loaded)
+        print(f"Testing model file header: {header}.")
+        self.assertEqual(header["format_version"], FORMAT_VERSION)
+        self.assertEqual(header["architecture"], "nn_v2")
+        self.assertEqual(header["training_step"], 12)
+        self.assertEqual(header["metadata"], {"games": 3})
+
+    def test_loaded_model_trains(self):
+        save_model(NNModel_V1(), self.path)
+        model, _ = load_model(self.path, mmap=True)
+        self.assertTrue(all(param.requires_grad for param in model.parameters()))
+        model(torch.zeros(1, 9)).sum().backward()
+        self.assertIsNotNone(model.fc1.weight.grad)
+
+    def test_legacy_file_is_migrated(self):
+        model = NNModel_V1()
+        torch.save(model, self.path)
+        self.assertTrue(is_legacy_model_file(self.path))
+        with self.assertRaises(ValueError):
+            load_model(self.path)
+
+        self.assertTrue(migrate_model_file(self.path))
+        self.assertFalse(is_legacy_model_file(self.path))
+        self.assertFalse(migrate_model_file(self.path))
+        loaded, header = load_model(self.path)
+        self.assert_same_weights(model, loaded)
+        self.assertEqual(header["metadata"], {"migrated_from": "module"})
+
+    def test_newer_format_is_rejected(self):
+        save_model(NNModel_V1(), self.path)
+        payload = torch.load(self.path, weights_only=True)
+        payload["format_version"] = FORMAT_VERSION + 1
+        torch.save(payload, self.path)
+        with self.assertRaises(ValueError):
+            load_model(self.path)
+
+    def test_plain_state_dict_is_rejected(self):
+        torch.save(NNModel_V1().state_dict(), self.path)
+        with self.assertRaises(ValueError):
+            load_model(self.path)
+
+    def test_unknown_architecture(self):
+        with self.assertRaises(TypeError):
+            save_model(torch.nn.Linear(9, 9), self.path)
+
+    def test_nn_agent_weights(self):
+        agent = NNAgent(NNModel_V1(), FieldState.X, 0)
+        agent.trainer.train_step([-1] * 9, 4, 1.0, [-1] * 9, True)
+        agent.save_weights(str(self.path))
+
+        # A legacy module file is only unpickled when migrating is asked for
+        legacy_path = self.path.with_name("legacy.pt")
+        torch.save(agent.model, legacy_path)
+        with self.assertRaises(ValueError):
+            NNAgent(NNModel_V2(), FieldState.X, 0).load_weights(str(legacy_path))
+        for path, migrate in ((self.path, False), (legacy_path, True)):
+            loaded = NNAgent(NNModel_V2(), FieldState.X, 0)
+            loaded.load_weights(str(path), training=False, migrate=migrate)
+            self.assertIsInstance(loaded.model, NNModel_V1)
+            self.assert_same_weights(agent.model, loaded.model)
+        loaded.load_weights(str(self.path))
+        self.assertEqual(loaded.trainer.steps, 1)
+        self.assertTrue(loaded.model.training)
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.game.agent.model.NNModel_V2 import NNModel_V2
+from ttt_ai.game.agent.neural_mcts_agent import NeuralMCTSAgent
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+from ttt_ai.game.vec_board import O, VecBoard
+
+
+class UniformPolicyValueModel(nn.Module):
+    """A policy/value model without knowledge: equal logits and a value of 0."""
+
+    def forward(self, x):
+        return torch.zeros_like(x), torch.zeros(x.shape[0])
+
+
+class TestNeuralMCTSAgent(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.board = Board()
+
+    def test_takes_win(self):
+        # X: 0, 1 and O: 3, 4, X wins on 2
+        for index in [0, 3, 1, 4]:
+            self.board.push(index)
+        agent = NeuralMCTSAgent(NNModel_V2(), FieldState.X, 0, n_simulations=300)
+        self.assertEqual(agent.get_best_move(self.board), 2)
+
+    def test_blocks_with_policy_value_model(self):
+        # X: 0, 1 and O: 4, O must block on 2
+        for index in [0, 4, 1]:
+            self.board.push(index)
+        agent = NeuralMCTSAgent(
+            UniformPolicyValueModel(), FieldState.O, 0, n_simulations=600, size=3
+        )
+        self.assertEqual(agent.get_best_move(self.board), 2)
+
+    def test_leaves_are_batched(self):
+        agent = NeuralMCTSAgent(
+            NNModel_V1(), FieldState.X, 0, n_simulations=256, leaf_batch_size=16
+        )
+        agent.get_best_move(self.board)
+        print(
+            f"Testing batching: {agent.last_simulations} simulations in {agent.last_forward_passes} forward passes."
+        )
+        self.assertEqual(agent.last_simulations, 256)
+        self.assertLess(agent.last_forward_passes, 256 // 4)
+        self.assertTrue(agent.model.training)  # the training mode is restored after the search
+
+    def test_get_best_moves_shares_forward_passes(self):
+        vec_board = VecBoard(32, seed=0)
+        vec_board.step(vec_board.random_legal_moves())
+        agent = NeuralMCTSAgent(NNModel_V2(), FieldState.O, 0, n_simulations=64)
+        rows = vec_board.current_player == O
+        moves = agent.get_best_moves(vec_board, rows)
+        legal = vec_board.legal_move_mask()[rows]
+        self.assertTrue(legal[np.arange(len(moves)), moves].all())
+        self.assertEqual(agent.last_simulations, 32 * 64)
+        self.assertLess(agent.last_forward_passes, 64)
+
+    def test_wrong_board_size(self):
+        agent = NeuralMCTSAgent(NNModel_V1(), FieldState.X, 0)
+        with self.assertRaises(ValueError):
+            agent.get_best_move(Board(size=4))
@@ -0,0 +1,144 @@
+import unittest
+from unittest import mock
+
+import torch
+
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.game.agent.nn_agent import NNAgent, TrainingSchedule
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+
+
+class TestTrainingSchedule(unittest.TestCase):
+    def _run_agent_games(self, schedule, games=3):
+        torch.manual_seed(0)
+        agent = NNAgent(NNModel_V1(), FieldState.X, 0, schedule=schedule)
+        with mock.patch.object(
+            agent.trainer, "train_step", wraps=agent.trainer.train_step
+        ) as train_step:
+            board = Board()
+            for _ in range(games):
+                board.reset()
+                while not board.is_game_over():
+                    if board.get_player_to_move() == FieldState.X:
+                        agent.perform_action(board)
+                    else:
+                        board.push(board.get_flat_index_of_radom_free_field(), FieldState.O)
+        return agent, train_step
+
+    def test_default_trains_every_move(self):
+        agent, train_step = self._run_agent_games(TrainingSchedule())
+        moves = len(agent.move_latencies)
+        # One short-memory step per move, plus the long-memory steps of games X finished
+        self.assertGreaterEqual(train_step.call_count, moves)
+        self.assertEqual(len(agent.memory), moves)
+
+    def test_micro_batches(self):
+        agent, train_step = self._run_agent_games(
+            TrainingSchedule(short_memory_every=4, long_memory_every=0), games=5
+        )
+        moves = len(agent.move_latencies)
+        print(f"Testing micro-batches: {train_step.call_count} steps for {moves} moves.")
+        self.assertLess(train_step.call_count, moves)
+        self.assertLess(len(agent.pending_transitions), 4)
+
+    def test_inference_only(self):
+        agent, train_step = self._run_agent_games(TrainingSchedule.inference_only())
+        self.assertEqual(train_step.call_count, 0)
+        self.assertEqual(len(agent.memory), 0)
+        stats = agent.get_latency_stats()
+        self.assertGreater(stats["max"], 0)
+        self.assertLessEqual(stats["p50"], stats["max"])
+
+    def test_invalid_schedule(self):
+        with self.assertRaises(ValueError):
+            TrainingSchedule(short_memory_every=-1)
+
+
+class TestFastInference(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.agent = NNAgent(NNModel_V1(), FieldState.X, 0)
+
+    def test_input_buffer_matches_flatten(self):
+        self.agent.enable_fast_inference()
+        board = Board()
+        for index in [4, 0, 8, 2]:
+            board.push(index)
+        fast_inference = self.agent.fast_inference
+        fast_inference.scores(board.bit_board.x_bits, board.bit_board.o_bits)
+        self.assertEqual(fast_inference.input[0].tolist(), board.flatten())
+
+    def test_same_scores_as_model(self):
+        board = Board(size=5, win_length=4)
+        board.push(12)
+        board.push(3)
+        agent = NNAgent(NNModel_V1(board_size=5), FieldState.X, 0)
+        agent.enable_fast_inference()
+        expected = agent.model.eval()(torch.tensor([board.flatten()], dtype=torch.float))
+        scores = agent.fast_inference.scores(board.bit_board.x_bits, board.bit_board.o_bits)
+        self.assertTrue(torch.allclose(scores, expected, atol=1e-5))
+
+    def test_quantized_moves(self):
+        board = Board()
+        board.push(4)
+        board.push(0)
+        expected = self.agent.get_best_move(board)
+        self.agent.enable_fast_inference(quantize=True)
+        move = self.agent.get_best_move(board)
+        print(f"Testing int8 inference: move {move}, float model move {expected}.")
+        self.assertFalse(board.bit_board.occupied_mask() >> move & 1)
+        self.assertFalse(self.agent.use_oracle)
+
+    def test_disable(self):
+        self.agent.enable_fast_inference()
+        self.agent.disable_fast_inference()
+        self.assertIsNone(self.agent.fast_inference)
+        self.assertTrue(self.agent.use_oracle)
+
+
+class FixedScoresModel(torch.nn.Module):
+    """Scores the fields in a fixed order, field 0 highest, whatever the board."""
+
+    def __init__(self):
+        super().__init__()
+        self.scores = torch.nn.Parameter(torch.arange(9, 0, -1, dtype=torch.float))
+
+    def forward(self, x):
+        return x * 0 + self.scores
+
+
+class TestLegalMoveMasking(unittest.TestCase):
+    def setUp(self):
+        self.agent = NNAgent(FixedScoresModel(), FieldState.X, 0)
+        self.board = Board()
+        for index in [0, 4, 1]:
+            self.board.push(index)
+
+    def test_occupied_best_field_is_skipped(self):
+        print("Testing that the NN agent never picks an occupied field.")
+        self.assertEqual(self.agent.get_best_move(self.board), 2)
+
+    def test_fast_inference_is_masked(self):
+        self.agent.enable_fast_inference()
+        self.assertEqual(self.agent.get_best_move(self.board), 2)
+
+
+class TestPerfectHitReward(unittest.TestCase):
+    def test_every_optimal_move_is_rewarded(self):
+        # After X takes the center every corner is optimal for O, not only the lowest one
+        agent = NNAgent(FixedScoresModel(), FieldState.O, 0)
+        board = Board()
+        board.push(4)
+        for corner in (0, 2, 6, 8):
+            with torch.no_grad():
+                agent.model.scores.copy_(torch.zeros(9))
+                agent.model.scores[corner] = 1.0
+            self.assertEqual(agent.get_best_move(board), corner)
+            self.assertEqual(agent.perfect_hit_reward, 0.5)
+
+        with torch.no_grad():
+            agent.model.scores.copy_(torch.zeros(9))
+            agent.model.scores[1] = 1.0
+        self.assertEqual(agent.get_best_move(board), 1)
+        self.assertEqual(agent.perfect_hit_reward, 0)
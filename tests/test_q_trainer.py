@@ -0,0 +1,116 @@
+import copy
+import random
+import unittest
+
+import torch
+
+from ttt_ai.game.agent.model.NNModel_V2 import NNModel_V2
+from ttt_ai.game.agent.trainer.QTrainer import QTrainer
+
+
+def looped_train_step(trainer, states, actions, rewards, next_states, dones):
+    """The per-sample target computation, the max only over the empty fields of the next state."""
+    states = torch.tensor(states, dtype=torch.float)
+    next_states = torch.tensor(next_states, dtype=torch.float)
+    actions = torch.tensor(actions, dtype=torch.long)
+    rewards = torch.tensor(rewards, dtype=torch.float)
+    pred = trainer.model(states)
+    target = pred.clone()
+    for idx in range(len(dones)):
+        q_new = rewards[idx]
+        legal = next_states[idx] == -1
+        if not dones[idx] and legal.any():
+            q_new = rewards[idx] + trainer.gamma * torch.max(
+                trainer.model(next_states[idx])[legal]
+            )
+        target[idx][torch.argmax(actions[idx]).item()] = q_new
+    trainer.optimizer.zero_grad()
+    loss = trainer.criterion(target, pred)
+    loss.backward()
+    trainer.optimizer.step()
+
+
+class TestQTrainer(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        random.seed(0)
+        n = 64
+        self.states = [[random.choice([-1, 0, 1]) for _ in range(9)] for _ in range(n)]
+        self.next_states = [
+            [random.choice([-1, 0, 1]) for _ in range(9)] for _ in range(n)
+        ]
+        self.moves = [random.randrange(9) for _ in range(n)]
+        self.rewards = [float(random.choice([-1, 0, 1, 2])) for _ in range(n)]
+        self.dones = [random.random() < 0.3 for _ in range(n)]
+
+    def test_matches_looped_target(self):
+        one_hot_actions = [[int(i == move) for i in range(9)] for move in self.moves]
+        batched = QTrainer(NNModel_V2(), lr=0.001, gamma=0.9)
+        looped = QTrainer(copy.deepcopy(batched.model), lr=0.001, gamma=0.9)
+
+        batched.train_step(
+            self.states, one_hot_actions, self.rewards, self.next_states, self.dones
+        )
+        looped_train_step(
+            looped, self.states, one_hot_actions, self.rewards, self.next_states, self.dones
+        )
+        print("Testing that the batched target gives the same update as the loop.")
+        for batched_param, looped_param in zip(
+            batched.model.parameters(), looped.model.parameters()
+        ):
+            self.assertTrue(torch.allclose(batched_param, looped_param, atol=1e-6))
+
+    def test_index_actions_update_chosen_field(self):
+        trainer = QTrainer(NNModel_V2(), lr=0.01, gamma=0.9)
+        state = [-1] * 9
+        with torch.no_grad():
+            before = trainer.model(torch.tensor(state, dtype=torch.float))
+        for _ in range(20):
+            trainer.train_step(state, 4, 5.0, state, True)
+        with torch.no_grad():
+            after = trainer.model(torch.tensor(state, dtype=torch.float))
+        self.assertLess(abs(after[4] - 5.0), abs(before[4] - 5.0))
+        self.assertEqual(int(torch.argmax(after)), 4)
+
+    def test_invalid_action_is_ignored(self):
+        trainer = QTrainer(NNModel_V2(), lr=0.01, gamma=0.9)
+        before = copy.deepcopy(trainer.model.state_dict())
+        trainer.train_step(self.states[0], -1, 2.0, self.next_states[0], True)
+        for name, param in trainer.model.state_dict().items():
+            self.assertTrue(torch.equal(param, before[name]))
+
+    def test_target_ignores_illegal_next_moves(self):
+        trainer = QTrainer(NNModel_V2(), lr=0.001, gamma=0.9)
+        state = [-1] * 9
+        next_state = [0, 1, 0, 1, -1, 1, 0, 1, 0]  # only the center is empty
+        with torch.no_grad():
+            next_scores = trainer.model(torch.tensor(next_state, dtype=torch.float))
+            pred = trainer.model(torch.tensor(state, dtype=torch.float))
+        expected = abs(1.0 + 0.9 * next_scores[4] - pred[2])
+        print("Testing that the target uses the best legal move of the next state.")
+        td_error = trainer.train_step(state, 2, 1.0, next_state, False)
+        self.assertAlmostEqual(float(td_error[0]), float(expected), places=5)
+
+    def test_full_next_board_has_no_future_value(self):
+        trainer = QTrainer(NNModel_V2(), lr=0.001, gamma=0.9)
+        state = [-1] * 9
+        with torch.no_grad():
+            pred = trainer.model(torch.tensor(state, dtype=torch.float))
+        td_error = trainer.train_step(state, 3, 1.0, [0, 1, 0, 0, 1, 1, 1, 0, 0], False)
+        self.assertAlmostEqual(float(td_error[0]), abs(1.0 - float(pred[3])), places=5)
+
+    def test_unit_weights_match_unweighted_step(self):
+        weighted = QTrainer(NNModel_V2(), lr=0.001, gamma=0.9)
+        unweighted = QTrainer(copy.deepcopy(weighted.model), lr=0.001, gamma=0.9)
+        td_errors = weighted.train_step(
+            self.states, self.moves, self.rewards, self.next_states, self.dones,
+            weights=torch.ones(len(self.moves)),
+        )
+        unweighted.train_step(
+            self.states, self.moves, self.rewards, self.next_states, self.dones
+        )
+        self.assertEqual(td_errors.shape, (len(self.moves),))
+        for weighted_param, unweighted_param in zip(
+            weighted.model.parameters(), unweighted.model.parameters()
+        ):
+            self.assertTrue(torch.allclose(weighted_param, unweighted_param, atol=1e-6))
@@ -0,0 +1,169 @@
+import unittest
+
+import numpy as np
+import torch
+
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.game.agent.nn_agent import NNAgent
+from ttt_ai.game.agent.replay_buffer import (
+    PrioritizedReplayBuffer,
+    ReplayBuffer,
+    SumTree,
+)
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+
+
+class TestReplayBuffer(unittest.TestCase):
+    def test_add_and_sample(self):
+        buffer = ReplayBuffer(100, seed=0)
+        for index in range(10):
+            board = [-1] * 9
+            board[index % 9] = 0
+            buffer.add(board, index % 9, float(index), board, index == 9)
+        states, actions, rewards, next_states, dones = buffer.sample(4)
+        self.assertEqual(states.shape, (4, 9))
+        self.assertEqual(states.dtype, torch.int8)
+        self.assertEqual(actions.dtype, torch.int16)
+        self.assertEqual(rewards.dtype, torch.float32)
+        self.assertEqual(dones.dtype, torch.bool)
+        # Every sampled transition is consistent with what was added
+        for state, action, reward in zip(states, actions, rewards):
+            self.assertEqual(int(action), int(reward) % 9)
+            self.assertEqual(int(state[int(action)]), 0)
+        self.assertEqual(len(set(rewards.tolist())), 4)  # without replacement
+
+    def test_sample_all_while_small(self):
+        buffer = ReplayBuffer(100)
+        buffer.add([-1] * 9, 4, 1.0, [-1] * 9, False)
+        buffer.add([-1] * 9, 5, 2.0, [-1] * 9, True)
+        _, actions, _, _, dones = buffer.sample(1000)
+        self.assertEqual(actions.tolist(), [4, 5])
+        self.assertEqual(dones.tolist(), [False, True])
+
+    def test_ring_overwrites_oldest(self):
+        buffer = ReplayBuffer(3)
+        for index in range(5):
+            buffer.add([-1] * 9, index, float(index), [-1] * 9, False)
+        self.assertEqual(len(buffer), 3)
+        _, actions, _, _, _ = buffer.sample(3)
+        print(f"Testing ring buffer content {sorted(actions.tolist())}.")
+        self.assertEqual(sorted(actions.tolist()), [2, 3, 4])
+
+    def test_add_batch(self):
+        buffer = ReplayBuffer(8)
+        states = np.full((10, 9), -1, dtype=np.int8)
+        actions = np.arange(10)
+        buffer.add_batch(states, actions, actions.astype(np.float32), states, actions == 9)
+        self.assertEqual(len(buffer), 8)
+        self.assertEqual(sorted(buffer.sample(8)[1].tolist()), list(range(2, 10)))
+
+    def test_memory_size(self):
+        buffer = ReplayBuffer(100_000)
+        print(f"Testing replay buffer size: {buffer.nbytes / 1e6:.1f} MB.")
+        self.assertLess(buffer.nbytes, 3_000_000)
+
+    def test_augmented_samples_are_symmetric(self):
+        buffer = ReplayBuffer(16, seed=0, augment=True)
+        state = [0, -1, -1, -1, 1, -1, -1, -1, -1]  # X top left, O center
+        next_state = [0, 0, -1, -1, 1, -1, -1, -1, -1]
+        buffer.add(state, 1, 0.5, next_state, False)
+        seen = set()
+        for _ in range(50):
+            states, actions, rewards, next_states, dones = buffer.sample(1)
+            states, next_states = states[0].numpy(), next_states[0].numpy()
+            action = int(actions[0])
+            seen.add(tuple(states.tolist()))
+            self.assertEqual(states[action], -1)
+            self.assertEqual(next_states[action], 0)
+            changed = np.flatnonzero(states != next_states)
+            self.assertEqual(changed.tolist(), [action])
+            self.assertEqual(float(rewards[0]), 0.5)
+        print(f"Testing augmentation: {len(seen)} distinct boards from one transition.")
+        self.assertEqual(len(seen), 4)  # the 4 corners, the diagonal mirror keeps the board
+
+    def test_augment_needs_square_board(self):
+        with self.assertRaises(ValueError):
+            ReplayBuffer(16, n_fields=10, augment=True)
+
+    def test_nn_agent_trains_on_symmetries(self):
+        agent = NNAgent(NNModel_V1(), FieldState.X, 0, augment_symmetries=True)
+        board = Board()
+        agent.perform_action(board)
+        self.assertTrue(agent.memory.augment)
+        agent.train_long_memory()
+
+    def test_state_dict_round_trip(self):
+        buffer = ReplayBuffer(4)
+        for index in range(6):
+            buffer.add([index % 2] * 9, index, float(index), [-1] * 9, index == 5)
+        restored = ReplayBuffer(4)
+        restored.load_state_dict(buffer.state_dict())
+        self.assertEqual(len(restored), 4)
+        self.assertEqual(restored.position, buffer.position)
+        for expected, actual in zip(buffer.get(np.arange(4)), restored.get(np.arange(4))):
+            self.assertTrue(torch.equal(expected, actual))
+        with self.assertRaises(ValueError):
+            ReplayBuffer(2).load_state_dict(buffer.state_dict())
+
+    def test_nn_agent_trains_from_buffer(self):
+        agent = NNAgent(NNModel_V1(), FieldState.X, 0)
+        board = Board()
+        agent.perform_action(board)
+        self.assertEqual(len(agent.memory), 1)
+        agent.train_long_memory()
+
+
+class TestSumTree(unittest.TestCase):
+    def test_sums_and_find(self):
+        tree = SumTree(5)
+        tree.update(np.arange(5), np.array([1.0, 2.0, 3.0, 4.0, 0.0]))
+        self.assertEqual(tree.total(), 10.0)
+        # Prefix ranges: 0 -> [0, 1], 1 -> (1, 3], 2 -> (3, 6], 3 -> (6, 10]
+        self.assertEqual(tree.find(np.array([0.5, 1.5, 3.5, 9.9])).tolist(), [0, 1, 2, 3])
+        tree.update_one(3, 0.0)
+        self.assertEqual(tree.total(), 6.0)
+        self.assertEqual(tree.find(np.array([5.9])).tolist(), [2])
+
+
+class TestPrioritizedReplayBuffer(unittest.TestCase):
+    def test_samples_by_priority(self):
+        buffer = PrioritizedReplayBuffer(16, seed=0)
+        for index in range(8):
+            buffer.add([-1] * 9, index, float(index), [-1] * 9, False)
+        batch, weights, indices = buffer.sample_prioritized(8)
+        # All new transitions start with the same priority
+        self.assertTrue(torch.allclose(weights, torch.ones(8)))
+        td_errors = np.zeros(8)
+        td_errors[indices == 5] = 10.0
+        buffer.update_priorities(indices, td_errors)
+
+        batch, weights, indices = buffer.sample_prioritized(64)
+        share = float(np.mean(indices == 5))
+        print(f"Testing that the high TD error transition is drawn in {share:.0%} of the samples.")
+        self.assertGreater(share, 0.5)
+        # Frequently drawn transitions get the smallest importance-sampling weights
+        self.assertAlmostEqual(float(weights.max()), 1.0)
+        self.assertLess(float(weights[indices == 5].max()), float(weights[indices != 5].min()))
+        self.assertTrue((batch[1][indices == 5] == 5).all())
+
+    def test_state_dict_keeps_priorities(self):
+        buffer = PrioritizedReplayBuffer(8, seed=0)
+        for index in range(4):
+            buffer.add([-1] * 9, index, 0.0, [-1] * 9, False)
+        buffer.update_priorities(np.arange(4), np.array([0.0, 1.0, 2.0, 3.0]))
+        restored = PrioritizedReplayBuffer(8)
+        restored.load_state_dict(buffer.state_dict())
+        self.assertTrue(np.allclose(restored.tree.get(np.arange(4)), buffer.tree.get(np.arange(4))))
+        self.assertAlmostEqual(restored.tree.total(), buffer.tree.total())
+        self.assertEqual(restored.max_priority, buffer.max_priority)
+
+    def test_nn_agent_prioritized_training(self):
+        agent = NNAgent(NNModel_V1(), FieldState.X, 0, prioritized_replay=True)
+        board = Board()
+        while not board.is_game_over():
+            agent.perform_action(board)
+            if not board.is_game_over():
+                board.push(board.get_flat_index_of_radom_free_field(), FieldState.O)
+        self.assertIsInstance(agent.memory, PrioritizedReplayBuffer)
+        self.assertGreater(agent.memory.max_priority, 0)
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+import torch
+
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.self_play.actor import WIN_REWARD, SelfPlayActor
+from ttt_ai.self_play.learner import Learner, SelfPlayLearner
+
+
+class TestSelfPlayActor(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.actor = SelfPlayActor(NNModel_V1(), batch_size=16, epsilon=0.3, seed=0)
+
+    def test_transitions_are_legal_moves(self):
+        print("Testing that the actor transitions are legal moves of the player to move.")
+        for _ in range(20):
+            movers = self.actor.vec_board.current_player.copy()
+            states, actions, rewards, next_states, dones = self.actor.step()
+            rows = np.arange(len(actions))
+            self.assertTrue((states[rows, actions] == -1).all())
+            expected = states.copy()
+            expected[rows, actions] = np.where(movers == 1, 0, 1)  # X is 0, O is 1
+            self.assertTrue((next_states == expected).all())
+            self.assertTrue((rewards[~dones] == 0).all())
+        self.assertGreater(self.actor.games_played, 0)
+
+    def test_collect_concatenates_steps(self):
+        states, actions, rewards, next_states, dones = self.actor.collect(5)
+        self.assertEqual(tuple(states.shape), (80, 9))
+        self.assertEqual(len(actions), 80)
+        self.assertTrue(torch.all(rewards <= WIN_REWARD))
+
+
+class TestSelfPlayLearner(unittest.TestCase):
+    def test_actors_feed_learner(self):
+        torch.manual_seed(0)
+        model = NNModel_V1()
+        before = [param.detach().clone() for param in model.parameters()]
+        with SelfPlayLearner(
+            model, n_actors=2, games_per_actor=8, batch_size=32, publish_every=2, seed=0
+        ) as learner:
+            stats = learner.run(max_train_steps=6)
+            processes = list(learner._processes)
+        print(
+            f"Testing self-play: {stats['games']:.0f} games, {stats['transitions']:.0f} transitions received."
+        )
+        self.assertEqual(learner.train_steps, 6)
+        self.assertEqual(learner.weights_version, 3)
+        self.assertGreater(learner.transitions_received, 0)
+        self.assertEqual(len(learner.memory), learner.transitions_received)
+        self.assertFalse(any(process.is_alive() for process in processes))
+        self.assertFalse(
+            all(torch.equal(a, b) for a, b in zip(before, model.parameters()))
+        )
+
+    def test_run_needs_limit(self):
+        with self.assertRaises(ValueError):
+            SelfPlayLearner(NNModel_V1()).run()
+
+    def test_learner_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Learner(NNModel_V1())
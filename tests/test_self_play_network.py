@@ -0,0 +1,178 @@
+import socket
+import struct
+import threading
+import unittest
+import zlib
+
+import numpy as np
+import torch
+
+from ttt_ai.game.agent.model.NNModel_V1 import NNModel_V1
+from ttt_ai.self_play.actor import SelfPlayActor
+from ttt_ai.self_play.network import (
+    MAX_MESSAGE_SIZE,
+    MSG_ACK,
+    MSG_GET_WEIGHTS,
+    MSG_TRANSITIONS,
+    RECEIVED_BATCHES,
+    TRANSITIONS_HEADER,
+    TcpActor,
+    TcpLearner,
+    decode_transitions,
+    decode_weights,
+    encode_transitions,
+    encode_weights,
+    receive_message,
+    send_message,
+)
+
+
+class TestProtocol(unittest.TestCase):
+    def test_message_round_trip(self):
+        left, right = socket.socketpair()
+        with left, right:
+            sent = send_message(left, MSG_ACK, b"\x00" * 1000)
+            message_type, payload = receive_message(right)
+        self.assertEqual(message_type, MSG_ACK)
+        self.assertEqual(payload, b"\x00" * 1000)
+        self.assertEqual(sent, 1005)
+
+    def test_closed_connection(self):
+        left, right = socket.socketpair()
+        left.close()
+        with right, self.assertRaises(ConnectionError):
+            receive_message(right)
+
+    def test_transitions_round_trip(self):
+        torch.manual_seed(0)
+        actor = SelfPlayActor(NNModel_V1(), batch_size=32, epsilon=0.5, seed=0)
+        states, actions, rewards, next_states, dones = (
+            tensor.numpy() for tensor in actor.collect(9)
+        )
+        payload = encode_transitions(states, actions, rewards, dones, games=7)
+        decoded = decode_transitions(payload)
+        for expected, array in zip((states, actions, rewards, next_states, dones), decoded):
+            self.assertTrue(np.array_equal(expected, array))
+        self.assertEqual(decoded[5], 7)
+        print(f"Testing transition encoding: {len(payload) / len(actions):.2f} bytes/transition.")
+        self.assertLess(len(payload), len(actions) * 16)
+
+    def test_malformed_transitions(self):
+        states = np.full((4, 9), -1, dtype=np.int8)
+        payload = zlib.decompress(encode_transitions(states, [0, 1, 2, 3], [0.0] * 4, [False] * 4))
+        # The header promises more transitions than the payload holds
+        lying_header = TRANSITIONS_HEADER.pack(5, 9, 0) + payload[TRANSITIONS_HEADER.size :]
+        bad_action = payload[: TRANSITIONS_HEADER.size + 36] + struct.pack("<h", 9) + payload[-26:]
+        zip_bomb = zlib.compress(b"\x00" * (MAX_MESSAGE_SIZE + 1))
+        # The first field of the first board, where its action is played
+        first_field = TRANSITIONS_HEADER.size
+        bad_field = payload[:first_field] + b"\x05" + payload[first_field + 1 :]
+        occupied = payload[:first_field] + b"\x00" + payload[first_field + 1 :]
+        for malformed in (
+            zlib.compress(lying_header),
+            zlib.compress(bad_action),
+            zlib.compress(payload)[:-4],
+            b"not zlib",
+            zip_bomb,
+            zlib.compress(bad_field),
+            zlib.compress(occupied),
+        ):
+            with self.assertRaises(ValueError):
+                decode_transitions(malformed)
+
+        # A well-formed batch of another board size
+        other_size = encode_transitions(
+            np.full((2, 16), -1, dtype=np.int8), [0, 1], [0.0] * 2, [False] * 2
+        )
+        self.assertEqual(len(decode_transitions(other_size)[0][0]), 16)
+        with self.assertRaises(ValueError):
+            decode_transitions(other_size, expected_fields=9)
+
+    def test_weights_round_trip(self):
+        model = NNModel_V1()
+        state_dict = decode_weights(encode_weights(model))
+        for name, tensor in model.state_dict().items():
+            self.assertTrue(torch.equal(tensor, state_dict[name]))
+
+
+class TestTcpSelfPlay(unittest.TestCase):
+    def test_actors_on_localhost(self):
+        torch.manual_seed(0)
+        learner = TcpLearner(NNModel_V1(), batch_size=32, publish_every=2, seed=0)
+        with learner:
+            host, port = learner.address
+            stop_event = threading.Event()
+            actors = [
+                TcpActor(NNModel_V1(), host, port, games_per_batch=8, seed=i) for i in range(2)
+            ]
+            threads = [
+                threading.Thread(target=actor.run, kwargs={"stop_event": stop_event})
+                for actor in actors
+            ]
+            for thread in threads:
+                thread.start()
+            stats = learner.run(max_train_steps=10)
+            stop_event.set()
+        # Actors waiting for room in the full queue are released by stop
+        for thread in threads:
+            thread.join(timeout=10)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(learner.weights_version, 5)
+        self.assertGreater(stats["transitions"], 0)
+        self.assertGreater(stats["bytes_per_transition"], 0)
+        for actor in actors:
+            self.assertGreaterEqual(actor.weights_version, 0)
+            self.assertGreater(actor.transitions_sent, 0)
+        # Transitions still in flight when the learner stopped are not counted
+        self.assertLessEqual(
+            learner.transitions_received, sum(actor.transitions_sent for actor in actors)
+        )
+
+    def test_actor_loads_learner_weights(self):
+        learner_model = NNModel_V1()
+        with TcpLearner(learner_model) as learner:
+            actor = TcpActor(NNModel_V1(), *learner.address, games_per_batch=4)
+            actor.run(max_batches=1)
+        self.assertEqual(actor.weights_version, 0)
+        for name, tensor in learner_model.state_dict().items():
+            self.assertTrue(torch.equal(tensor, actor.actor.model.state_dict()[name]))
+
+    def test_backpressure_bounds_received_batches(self):
+        with TcpLearner(NNModel_V1()) as learner:
+            stop_event = threading.Event()
+            actor = TcpActor(NNModel_V1(), *learner.address, games_per_batch=4)
+            thread = threading.Thread(target=actor.run, kwargs={"stop_event": stop_event})
+            thread.start()
+            # Nothing is ingested, the actor waits once the queue is full
+            while learner.received.qsize() < RECEIVED_BATCHES:
+                threading.Event().wait(0.01)
+            threading.Event().wait(0.2)
+            self.assertLessEqual(actor.batches_sent, RECEIVED_BATCHES + 1)
+            stop_event.set()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+
+    def test_malformed_message_closes_connection(self):
+        other_size = encode_transitions(
+            np.full((2, 16), -1, dtype=np.int8), [0, 1], [0.0] * 2, [False] * 2
+        )
+        with TcpLearner(NNModel_V1()) as learner:
+            for message_type, payload in ((MSG_TRANSITIONS, other_size), (MSG_GET_WEIGHTS, b"\x00")):
+                with socket.create_connection(learner.address, 5) as sock:
+                    send_message(sock, message_type, payload)
+                    with self.assertRaises(ConnectionError):
+                        receive_message(sock)
+            self.assertEqual(learner.received.qsize(), 0)
+
+    def test_stop_closes_actor_connections(self):
+        learner = TcpLearner(NNModel_V1())
+        learner.start()
+        actor = TcpActor(NNModel_V1(), *learner.address, games_per_batch=4)
+        thread = threading.Thread(target=actor.run)  # no limit, only the learner can end it
+        thread.start()
+        while actor.batches_sent == 0:
+            learner.ingest(0.01)
+        learner.stop()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+        print(f"Testing stop: the actor sent {actor.batches_sent} batches before the learner stopped.")
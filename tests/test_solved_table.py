@@ -0,0 +1,93 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from ttt_ai.game.agent.minimax_agent import MiniMaxAgent, SearchMode
+from ttt_ai.game.agent.solved_table import (
+    SolvedTable,
+    generate_solved_table,
+    get_position_index,
+)
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+
+
+class TestSolvedTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        path = generate_solved_table(Path(cls.temp_dir.name) / "solved_3x3.bin")
+        cls.table = SolvedTable(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.table.close()
+        cls.temp_dir.cleanup()
+
+    def test_position_index(self):
+        self.assertEqual(get_position_index(0, 0), 0)
+        self.assertEqual(get_position_index(0b1, 0), 1)
+        self.assertEqual(get_position_index(0, 0b10), 6)
+        self.assertEqual(get_position_index(0, 0b111111111), 3**9 - 1)
+
+    def test_empty_board_is_a_draw(self):
+        value, distance, move_mask = self.table.lookup(0, 0, FieldState.X)
+        print("Testing that the empty board is a draw after 9 plies.")
+        self.assertEqual((value, distance, move_mask), (0, 9, 0b111111111))
+
+    def test_immediate_win(self):
+        board = Board()
+        for index, player in [(0, FieldState.X), (4, FieldState.O), (1, FieldState.X), (8, FieldState.O)]:
+            board.push(index, player)
+        value, distance, move_mask = self.table.lookup(
+            board.bit_board.x_bits, board.bit_board.o_bits, FieldState.X
+        )
+        self.assertEqual((value, distance, move_mask), (1, 1, 1 << 2))
+        self.assertEqual(self.table.get_best_move(board, FieldState.X), 2)
+
+    def test_game_over_has_no_move(self):
+        board = Board()
+        for index in [0, 3, 1, 4, 2]:
+            board.push(index)
+        self.assertIsNone(self.table.get_best_move(board, FieldState.O))
+        self.assertEqual(
+            self.table.lookup(board.bit_board.x_bits, board.bit_board.o_bits, FieldState.O)[0],
+            -1,
+        )
+
+    def test_matches_alpha_beta(self):
+        random.seed(3)
+        board = Board()
+        for _ in range(100):
+            board.reset()
+            for _ in range(random.randint(0, 6)):
+                if board.is_game_over():
+                    break
+                board.push(board.get_flat_index_of_radom_free_field())
+            if board.is_game_over():
+                continue
+            player = board.get_player_to_move()
+            table_agent = MiniMaxAgent(
+                player, 0, search_mode=SearchMode.SOLVED_TABLE, solved_table=self.table
+            )
+            search_agent = MiniMaxAgent(player, 0, search_mode=SearchMode.ALPHA_BETA)
+            _, _, move_mask = self.table.lookup(
+                board.bit_board.x_bits, board.bit_board.o_bits, player
+            )
+            self.assertTrue(move_mask >> search_agent.get_best_move(board) & 1)
+            self.assertTrue(move_mask >> table_agent.get_best_move(board) & 1)
+
+    def test_label_boards(self):
+        board = Board()
+        boards = [board.flatten()]
+        board.push(0)
+        board.push(4)
+        board.push(1)
+        boards.append(board.flatten())
+        labels = self.table.label_boards(np.array(boards), np.array([0, 1]))
+        self.assertTrue(labels[0].all())
+        print("Testing that O must block at field 2.")
+        self.assertEqual(np.flatnonzero(labels[1]).tolist(), [2])
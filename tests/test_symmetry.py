@@ -0,0 +1,143 @@
+import random
+import unittest
+
+import numpy as np
+
+from ttt_ai.game.board import Board
+from ttt_ai.game.field import FieldState
+from ttt_ai.game.symmetry import (
+    INVERSE_TRANSFORM,
+    N_TRANSFORMS,
+    canonicalize,
+    canonicalize_bits,
+    expand_symmetries,
+    from_canonical_move,
+    to_canonical_move,
+    transform_bits,
+    transform_board,
+    transform_transitions,
+)
+
+
+def _random_board(size: int = 3) -> Board:
+    board = Board(size)
+    for index in random.sample(range(size * size), random.randint(0, size * size)):
+        board.get_field_by_flat_index(index).state = random.choice(
+            [FieldState.X, FieldState.O]
+        )
+    return board
+
+
+class TestSymmetryTransforms(unittest.TestCase):
+    def test_rotation(self):
+        # X in the top left corner moves to the top right corner
+        self.assertEqual(to_canonical_move(0, 1), 2)
+        self.assertEqual(transform_board(list(range(9)), 1), [6, 3, 0, 7, 4, 1, 8, 5, 2])
+
+    def test_transforms_are_distinct_and_invertible(self):
+        flat = list(range(9))
+        transformed = {tuple(transform_board(flat, t)) for t in range(N_TRANSFORMS)}
+        self.assertEqual(len(transformed), N_TRANSFORMS)
+        for t in range(N_TRANSFORMS):
+            self.assertEqual(
+                transform_board(transform_board(flat, t), INVERSE_TRANSFORM[t]), flat
+            )
+
+    def test_bits_match_flat_board(self):
+        for size in [3, 4]:
+            for _ in range(50):
+                board = _random_board(size)
+                for t in range(N_TRANSFORMS):
+                    flat = transform_board(board.flatten(), t, size)
+                    x_bits = transform_bits(board.bit_board.x_bits, t, size)
+                    o_bits = transform_bits(board.bit_board.o_bits, t, size)
+                    expected_x = sum(1 << i for i, value in enumerate(flat) if value == 0)
+                    expected_o = sum(1 << i for i, value in enumerate(flat) if value == 1)
+                    self.assertEqual((x_bits, o_bits), (expected_x, expected_o))
+
+
+class TestSymmetryCanonicalize(unittest.TestCase):
+    def test_equivalent_boards_share_canonical_form(self):
+        for _ in range(100):
+            board = _random_board()
+            flat = board.flatten()
+            canonical, _ = canonicalize(flat)
+            canonical_bits = canonicalize_bits(
+                board.bit_board.x_bits, board.bit_board.o_bits
+            )[:2]
+            for t in range(N_TRANSFORMS):
+                self.assertEqual(canonicalize(transform_board(flat, t))[0], canonical)
+                self.assertEqual(
+                    canonicalize_bits(
+                        transform_bits(board.bit_board.x_bits, t),
+                        transform_bits(board.bit_board.o_bits, t),
+                    )[:2],
+                    canonical_bits,
+                )
+
+    def test_moves_map_between_frames(self):
+        for _ in range(100):
+            board = _random_board()
+            flat = board.flatten()
+            canonical, transform = canonicalize(flat)
+            for move in range(9):
+                canonical_move = to_canonical_move(move, transform)
+                self.assertEqual(canonical[canonical_move], flat[move])
+                self.assertEqual(from_canonical_move(canonical_move, transform), move)
+
+    def test_number_of_canonical_positions(self):
+        empty = canonicalize([-1] * 9)[0]
+        first_moves = set()
+        for move in range(9):
+            flat = [-1] * 9
+            flat[move] = 0
+            first_moves.add(canonicalize(flat)[0])
+        print("Testing the 3 distinct first moves: corner, edge and center.")
+        self.assertEqual(len(first_moves), 3)
+        self.assertNotIn(empty, first_moves)
+
+
+class TestBatchTransforms(unittest.TestCase):
+    def test_matches_single_transforms(self):
+        random.seed(3)
+        for size in (3, 4):
+            boards = [_random_board(size) for _ in range(32)]
+            states = np.array([board.flatten() for board in boards], dtype=np.int8)
+            next_states = np.roll(states, 1, axis=0)
+            actions = np.array([random.randrange(size * size) for _ in boards], dtype=np.int16)
+            transforms = np.array([random.randrange(N_TRANSFORMS) for _ in boards])
+            new_states, new_actions, new_next_states = transform_transitions(
+                states, actions, next_states, transforms, size
+            )
+            for row, transform in enumerate(transforms):
+                self.assertEqual(
+                    new_states[row].tolist(), transform_board(states[row].tolist(), transform, size)
+                )
+                self.assertEqual(
+                    new_next_states[row].tolist(),
+                    transform_board(next_states[row].tolist(), transform, size),
+                )
+                self.assertEqual(new_actions[row], to_canonical_move(int(actions[row]), transform, size))
+                # The move lands on the same field of the transformed board
+                self.assertEqual(new_states[row][new_actions[row]], states[row][actions[row]])
+            self.assertEqual(new_actions.dtype, np.int16)
+
+    def test_unplayed_moves_stay_negative(self):
+        states = np.full((2, 9), -1, dtype=np.int8)
+        _, actions, _ = transform_transitions(
+            states, np.array([-1, 0]), states, np.array([1, 1])
+        )
+        self.assertEqual(actions.tolist(), [-1, 2])
+
+    def test_expand_symmetries(self):
+        board = _random_board()
+        states = np.array([board.flatten()], dtype=np.int8)
+        expanded = expand_symmetries(states, [4], [1.0], states, [True])
+        print(f"Testing symmetry expansion to {len(expanded[1])} transitions.")
+        self.assertEqual(len(expanded[1]), N_TRANSFORMS)
+        self.assertTrue((expanded[1] == 4).all())  # the center stays the center
+        self.assertTrue((expanded[2] == 1.0).all() and expanded[4].all())
+        self.assertEqual(
+            {tuple(row) for row in expanded[0].tolist()},
+            {tuple(transform_board(board.flatten(), t)) for t in range(N_TRANSFORMS)},
+        )
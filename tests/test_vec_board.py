@@ -0,0 +1,94 @@
+import unittest
+
+import numpy as np
+
+from ttt_ai.game.agent.minimax_agent import MiniMaxAgent
+from ttt_ai.game.field import FieldState
+from ttt_ai.game.vec_board import O, X, VecBoard
+
+
+class TestVecBoardStep(unittest.TestCase):
+    def test_step_and_winner(self):
+        vec_board = VecBoard(2, auto_reset=False)
+        # X plays 0, 1, 2 on the first board and 0, 4, 8 on the second one
+        for x_moves, o_moves in [([0, 0], [3, 1]), ([1, 4], [4, 2])]:
+            winners, dones = vec_board.step(np.array(x_moves))
+            self.assertFalse(dones.any())
+            winners, dones = vec_board.step(np.array(o_moves))
+            self.assertFalse(dones.any())
+        winners, dones = vec_board.step(np.array([2, 8]))
+        print(f"Testing winners {winners} after three X moves.")
+        self.assertEqual(winners.tolist(), [X, X])
+        self.assertEqual(dones.tolist(), [True, True])
+
+    def test_illegal_move(self):
+        vec_board = VecBoard(2)
+        vec_board.step(np.array([4, 4]))
+        with self.assertRaises(ValueError):
+            vec_board.step(np.array([4, 0]))
+        with self.assertRaises(ValueError):
+            vec_board.step(np.array([9, 0]))
+
+    def test_draw_and_auto_reset(self):
+        vec_board = VecBoard(1)
+        # X O X / X O O / O X X
+        for move in [0, 1, 2, 4, 3, 5, 7, 6]:
+            winners, dones = vec_board.step(np.array([move]))
+            self.assertFalse(dones.any())
+        winners, dones = vec_board.step(np.array([8]))
+        self.assertEqual(winners.tolist(), [0])
+        self.assertTrue(dones[0])
+        self.assertEqual(vec_board.games_finished, 1)
+        self.assertTrue(vec_board.legal_move_mask().all())
+        self.assertEqual(vec_board.current_player.tolist(), [X])
+
+    def test_random_games(self):
+        vec_board = VecBoard(256, seed=1)
+        for _ in range(100):
+            legal = vec_board.legal_move_mask()
+            moves = vec_board.random_legal_moves()
+            self.assertTrue(legal[np.arange(256), moves].all())
+            vec_board.step(moves)
+        self.assertGreater(vec_board.games_finished, 0)
+
+
+class TestVecBoardConversion(unittest.TestCase):
+    def test_flatten_matches_board(self):
+        vec_board = VecBoard(64, auto_reset=False, seed=2)
+        for _ in range(4):
+            vec_board.step(vec_board.random_legal_moves())
+        flattened = vec_board.flatten()
+        for index in range(vec_board.batch_size):
+            board = vec_board.get_board(index)
+            self.assertEqual(flattened[index].tolist(), board.flatten())
+            self.assertEqual(
+                board.is_winner(FieldState.X), vec_board.get_winners()[index] == X
+            )
+            self.assertEqual(
+                board.is_winner(FieldState.O), vec_board.get_winners()[index] == O
+            )
+
+    def test_agent_get_best_moves(self):
+        vec_board = VecBoard(3, auto_reset=False)
+        vec_board.step(np.array([0, 4, 8]))
+        vec_board.step(np.array([3, 0, 4]))
+        vec_board.step(np.array([1, 8, 0]))
+        agent = MiniMaxAgent(FieldState.O, 0)
+        rows = vec_board.current_player == O
+        moves = agent.get_best_moves(vec_board, rows)
+        print(f"Testing minimax moves {moves} on a batch.")
+        # O must block X on the first board
+        self.assertEqual(moves[0], 2)
+        self.assertEqual(len(moves), 3)
+
+
+class TestVecBoardGeneralized(unittest.TestCase):
+    def test_winners_match_board(self):
+        vec_board = VecBoard(32, auto_reset=False, seed=3, size=5, win_length=4)
+        for _ in range(12):
+            vec_board.step(vec_board.random_legal_moves())
+        winners = vec_board.get_winners()
+        for index in range(vec_board.batch_size):
+            board = vec_board.get_board(index)
+            self.assertEqual(board.is_winner(FieldState.X), winners[index] == X)
+            self.assertEqual(board.is_winner(FieldState.O), winners[index] == O)